@@ -0,0 +1,89 @@
+"""Throughput benchmark for the local ``HashingEmbedding`` on synthetic catalog chunks.
+
+Runs on one core with no network access::
+
+    python -m benchmarks.embedding --chunks 20000 --batch-size 256
+    python -m benchmarks.embedding --dimension 768 --chunk-chars 1024 --json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import statistics
+import time
+from typing import Dict, List, Optional
+
+from src.services.embeddings_fallback import HashingEmbedding
+
+VOCABULARY = (
+    "store hours open close weekday weekend parking entrance appointment booking cancel price discount"
+    " warranty return shipping delivery size colour leather cotton wireless headphones charger battery"
+    " SKU-1042 SKU-2281 model X200 pro max mini gift card loyalty points branch downtown airport mall"
+).split()
+
+
+def synthetic_chunks(count: int, chars: int, seed: int = 7) -> List[str]:
+    rng = random.Random(seed)
+    chunks = []
+    for _ in range(count):
+        words: List[str] = []
+        size = 0
+        while size < chars:
+            word = rng.choice(VOCABULARY)
+            words.append(word)
+            size += len(word) + 1
+        chunks.append(" ".join(words))
+    return chunks
+
+
+def run_benchmark(
+    chunks: int = 10_000, batch_size: int = 256, dimension: int = 1536, chunk_chars: int = 512, runs: int = 3
+) -> Dict[str, float]:
+    embedder = HashingEmbedding(dimension=dimension)
+    texts = synthetic_chunks(chunks, chunk_chars)
+    embedder.embed_matrix(texts[:batch_size])  # warm the word-hash cache
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        for start in range(0, len(texts), batch_size):
+            embedder.embed_matrix(texts[start:start + batch_size])
+        timings.append(time.perf_counter() - started)
+    best = min(timings)
+    return {
+        "chunks": chunks,
+        "batch_size": batch_size,
+        "dimension": dimension,
+        "chunk_chars": chunk_chars,
+        "best_s": round(best, 3),
+        "median_s": round(statistics.median(timings), 3),
+        "chunks_per_s": round(chunks / best, 1),
+        "mb_per_s": round(chunks * chunk_chars / best / 1e6, 2),
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--chunks", type=int, default=10_000)
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--dimension", type=int, default=1536)
+    parser.add_argument("--chunk-chars", type=int, default=512)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args(argv)
+
+    report = run_benchmark(args.chunks, args.batch_size, args.dimension, args.chunk_chars, args.runs)
+    if args.json:
+        print(json.dumps(report))
+    else:
+        print(
+            f"{report['chunks']} chunks of ~{report['chunk_chars']} chars into {report['dimension']} dims "
+            f"(batch {report['batch_size']}): {report['chunks_per_s']:.0f} chunks/s, "
+            f"{report['mb_per_s']:.2f} MB/s, best {report['best_s']}s"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,317 @@
+"""In-process stand-ins for the external systems, with configurable injected latency.
+
+They implement the same surfaces the services use (``PineconeIndexProtocol`` and its async
+counterpart, the pymongo collection calls, ``CalendarClient`` and ``EmailClient``) so the real
+services and orchestrator can be exercised on one machine without network access.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import itertools
+import math
+import random
+import threading
+import time
+from dataclasses import dataclass
+from types import SimpleNamespace
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from src.adapters.calendar_client import CalendarClient
+from src.adapters.email_client import EmailClient
+from src.adapters.pinecone_client import AsyncPineconeIndexProtocol, PineconeIndexProtocol
+
+
+@dataclass
+class Latency:
+    """Delay applied to every fake call: ``mean_s`` plus uniform ``±jitter_s``."""
+
+    mean_s: float = 0.0
+    jitter_s: float = 0.0
+
+    def sample(self) -> float:
+        if not self.mean_s and not self.jitter_s:
+            return 0.0
+        return max(0.0, self.mean_s + random.uniform(-self.jitter_s, self.jitter_s))
+
+    def sleep(self) -> None:
+        delay = self.sample()
+        if delay:
+            time.sleep(delay)
+
+    async def asleep(self) -> None:
+        delay = self.sample()
+        if delay:
+            await asyncio.sleep(delay)
+
+
+def _matches_filter(metadata: Dict[str, Any], filter_payload: Optional[Dict[str, Any]]) -> bool:
+    if not filter_payload:
+        return True
+    for key, condition in filter_payload.items():
+        if key == "$and":
+            if not all(_matches_filter(metadata, clause) for clause in condition):
+                return False
+        elif key == "$or":
+            if not any(_matches_filter(metadata, clause) for clause in condition):
+                return False
+        elif isinstance(condition, dict):
+            value = metadata.get(key)
+            if "$eq" in condition and value != condition["$eq"]:
+                return False
+            if "$in" in condition and value not in condition["$in"]:
+                return False
+        elif metadata.get(key) != condition:
+            return False
+    return True
+
+
+def _cosine(left: Sequence[float], right: Sequence[float]) -> float:
+    dot = sum(a * b for a, b in zip(left, right))
+    norm = math.sqrt(sum(a * a for a in left)) * math.sqrt(sum(b * b for b in right))
+    return dot / norm if norm else 0.0
+
+
+class FakePineconeIndex(PineconeIndexProtocol):
+    """Brute-force in-memory index that accepts both the dict and tuple upsert formats."""
+
+    def __init__(self, latency: Optional[Latency] = None) -> None:
+        self.latency = latency or Latency()
+        self._namespaces: Dict[str, Dict[str, Tuple[List[float], Dict[str, Any]]]] = {}
+        self._lock = threading.Lock()
+        self.query_calls = 0
+        self.upsert_calls = 0
+
+    def _search(
+        self,
+        vector: Sequence[float],
+        top_k: int = 10,
+        include_metadata: bool = False,
+        include_values: bool = False,
+        filter: Optional[Dict[str, Any]] = None,
+        namespace: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        with self._lock:
+            self.query_calls += 1
+            records = list(self._namespaces.get(namespace or "", {}).items())
+        scored = [
+            (_cosine(vector, values), record_id, values, metadata)
+            for record_id, (values, metadata) in records
+            if _matches_filter(metadata, filter)
+        ]
+        scored.sort(key=lambda item: item[0], reverse=True)
+        matches = []
+        for score, record_id, values, metadata in scored[:top_k]:
+            match: Dict[str, Any] = {"id": record_id, "score": score}
+            if include_metadata:
+                match["metadata"] = dict(metadata)
+            if include_values:
+                match["values"] = list(values)
+            matches.append(match)
+        return {"matches": matches, "namespace": namespace or ""}
+
+    def _store(self, vectors: List, namespace: Optional[str]) -> Dict[str, int]:
+        with self._lock:
+            self.upsert_calls += 1
+            target = self._namespaces.setdefault(namespace or "", {})
+            for vector in vectors:
+                if isinstance(vector, dict):
+                    record_id, values, metadata = vector["id"], vector["values"], vector.get("metadata", {})
+                else:
+                    record_id, values, metadata = vector
+                target[record_id] = (list(values), dict(metadata or {}))
+        return {"upserted_count": len(vectors)}
+
+    def query(self, *args, **kwargs) -> Dict:
+        self.latency.sleep()
+        return self._search(*args, **kwargs)
+
+    def upsert(self, vectors: List, namespace: str | None = None) -> Dict[str, int]:
+        self.latency.sleep()
+        return self._store(vectors, namespace)
+
+    def list(self, prefix: Optional[str] = None, limit: int = 100, namespace: str | None = None) -> Iterator[List[str]]:
+        with self._lock:
+            ids = [record_id for record_id in self._namespaces.get(namespace or "", {}) if record_id.startswith(prefix or "")]
+        for start in range(0, len(ids), limit):
+            yield ids[start:start + limit]
+
+    def fetch(self, ids: Sequence[str], namespace: str | None = None) -> Dict[str, Any]:
+        with self._lock:
+            records = self._namespaces.get(namespace or "", {})
+            vectors = {
+                record_id: {"id": record_id, "values": list(records[record_id][0]), "metadata": dict(records[record_id][1])}
+                for record_id in ids
+                if record_id in records
+            }
+        return {"vectors": vectors, "namespace": namespace or ""}
+
+    def delete(self, ids: Optional[Sequence[str]] = None, delete_all: bool = False, namespace: str | None = None) -> Dict:
+        with self._lock:
+            records = self._namespaces.get(namespace or "", {})
+            for record_id in list(records) if delete_all else ids or ():
+                records.pop(record_id, None)
+        return {}
+
+    def describe_index_stats(self, **_: Any) -> Dict[str, Any]:
+        with self._lock:
+            namespaces = {name: {"vector_count": len(records)} for name, records in self._namespaces.items()}
+        return {"namespaces": namespaces, "total_vector_count": sum(n["vector_count"] for n in namespaces.values())}
+
+
+class FakeAsyncPineconeIndex(AsyncPineconeIndexProtocol):
+    """Async view over a :class:`FakePineconeIndex` that waits with ``asyncio.sleep``."""
+
+    def __init__(self, index: FakePineconeIndex) -> None:
+        self._index = index
+
+    async def query(self, *args, **kwargs) -> Dict:
+        await self._index.latency.asleep()
+        return self._index._search(*args, **kwargs)
+
+    async def upsert(self, vectors: List, namespace: str | None = None) -> Dict[str, int]:
+        await self._index.latency.asleep()
+        return self._index._store(vectors, namespace)
+
+    async def describe_index_stats(self, **kwargs: Any) -> Dict[str, Any]:
+        return self._index.describe_index_stats(**kwargs)
+
+
+class FakeMongoCollection:
+    """Dict-backed subset of ``pymongo.collection.Collection``."""
+
+    def __init__(self, latency: Optional[Latency] = None) -> None:
+        self.latency = latency or Latency()
+        self.documents: Dict[Any, Dict[str, Any]] = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def _insert(self, document: Dict[str, Any]) -> SimpleNamespace:
+        with self._lock:
+            document_id = document.get("_id") or f"fake-{next(self._ids)}"
+            self.documents[document_id] = {**document, "_id": document_id}
+        return SimpleNamespace(inserted_id=document_id, acknowledged=True)
+
+    def insert_one(self, document: Dict[str, Any]) -> SimpleNamespace:
+        self.latency.sleep()
+        return self._insert(document)
+
+    def find_one(self, query: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        self.latency.sleep()
+        with self._lock:
+            if "_id" in query:
+                return self.documents.get(query["_id"])
+            for document in self.documents.values():
+                if all(document.get(key) == value for key, value in query.items()):
+                    return document
+        return None
+
+    def replace_one(self, query: Dict[str, Any], document: Dict[str, Any], upsert: bool = False) -> None:
+        self.latency.sleep()
+        with self._lock:
+            self.documents[query["_id"]] = dict(document)
+
+    def delete_one(self, query: Dict[str, Any]) -> None:
+        self.latency.sleep()
+        with self._lock:
+            self.documents.pop(query.get("_id"), None)
+
+    def create_index(self, *args: Any, **kwargs: Any) -> str:
+        return "fake_index"
+
+
+class FakeAsyncMongoCollection:
+    def __init__(self, collection: FakeMongoCollection) -> None:
+        self._collection = collection
+
+    async def insert_one(self, document: Dict[str, Any]) -> SimpleNamespace:
+        await self._collection.latency.asleep()
+        return self._collection._insert(document)
+
+
+class FakeCalendarClient(CalendarClient):
+    """Calendar client that records events in memory instead of calling Google."""
+
+    def __init__(self, latency: Optional[Latency] = None, default_timezone: str = "UTC") -> None:
+        super().__init__(service_account_file="", default_timezone=default_timezone)
+        self.latency = latency or Latency()
+        self.events: Dict[str, Dict[str, Any]] = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def _create(self, calendar_id: str, body: Dict[str, Any]) -> Dict[str, Any]:
+        with self._lock:
+            event = {**body, "id": f"evt-{next(self._ids)}", "calendarId": calendar_id}
+            self.events[event["id"]] = event
+        return event
+
+    def _patch(self, event_id: str, body: Dict[str, Any]) -> Dict[str, Any]:
+        with self._lock:
+            event = self.events.setdefault(event_id, {"id": event_id})
+            event.update(body)
+        return dict(event)
+
+    def list_events(self, calendar_id: str, time_min: str, time_max: str, org_id: str = "") -> Dict[str, Any]:
+        self.latency.sleep()
+        with self._lock:
+            items = [event for event in self.events.values() if event.get("calendarId") == calendar_id]
+        return {"items": items}
+
+    def create_event(self, calendar_id: str, body: Dict[str, Any], org_id: str = "") -> Dict[str, Any]:
+        self.latency.sleep()
+        return self._create(calendar_id, body)
+
+    def patch_event(self, calendar_id: str, event_id: str, body: Dict[str, Any], org_id: str = "") -> Dict[str, Any]:
+        self.latency.sleep()
+        return self._patch(event_id, body)
+
+    async def acreate_event(self, calendar_id: str, body: Dict[str, Any], org_id: str = "") -> Dict[str, Any]:
+        await self.latency.asleep()
+        return self._create(calendar_id, body)
+
+    async def apatch_event(
+        self, calendar_id: str, event_id: str, body: Dict[str, Any], org_id: str = ""
+    ) -> Dict[str, Any]:
+        await self.latency.asleep()
+        return self._patch(event_id, body)
+
+
+class FakeEmailClient(EmailClient):
+    def __init__(self, latency: Optional[Latency] = None) -> None:
+        super().__init__(api_key="fake", sender_domain="example.com")
+        self.latency = latency or Latency()
+        self.sent: List[Dict[str, str]] = []
+
+    def send(self, recipient: str, subject: str, body: str) -> Dict[str, str]:
+        self.latency.sleep()
+        self.sent.append({"recipient": recipient, "subject": subject})
+        return {"status": "queued", "recipient": recipient, "subject": subject}
+
+    async def asend(self, recipient: str, subject: str, body: str) -> Dict[str, str]:
+        await self.latency.asleep()
+        self.sent.append({"recipient": recipient, "subject": subject})
+        return {"status": "queued", "recipient": recipient, "subject": subject}
+
+
+class LatencyEmbedder:
+    """Wraps a local embedder and adds the round-trip latency of a hosted embedding API."""
+
+    def __init__(self, inner: Any, latency: Optional[Latency] = None) -> None:
+        self._inner = inner
+        self.latency = latency or Latency()
+
+    def embed(self, text: str) -> List[float]:
+        self.latency.sleep()
+        return self._inner.embed(text)
+
+    async def aembed(self, text: str) -> List[float]:
+        await self.latency.asleep()
+        return self._inner.embed(text)
+
+    def embed_batch(self, texts: Sequence[str]) -> List[List[float]]:
+        self.latency.sleep()
+        return [self._inner.embed(text) for text in texts]
+
+    async def aembed_batch(self, texts: Sequence[str]) -> List[List[float]]:
+        await self.latency.asleep()
+        return [self._inner.embed(text) for text in texts]
@@ -0,0 +1,287 @@
+"""Offline load test for ``/api/v1/chat`` and ``/api/v1/ingest``.
+
+The real FastAPI app, orchestrator and services run in-process against the fakes in
+``benchmarks.fakes``; only the external systems are simulated, with injected latency::
+
+    python -m benchmarks.load_test --requests 2000 --concurrency 200 --latency-ms 40
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+import math
+import resource
+import statistics
+import time
+import tracemalloc
+from collections import defaultdict
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional
+
+import httpx
+
+from benchmarks.fakes import (
+    FakeAsyncMongoCollection,
+    FakeAsyncPineconeIndex,
+    FakeCalendarClient,
+    FakeEmailClient,
+    FakeMongoCollection,
+    FakePineconeIndex,
+    Latency,
+    LatencyEmbedder,
+)
+from src.app.dependencies import get_ingestion_pipeline, get_orchestrator
+from src.app.main import app
+from src.ingestion.pipeline import IngestionPipeline
+from src.orchestrator.graph import AgentOrchestrator
+from src.orchestrator.session import SessionStore
+from src.services.calendar import CalendarService
+from src.services.embeddings_fallback import DeterministicEmbedding
+from src.services.intent_rules import RuleBasedIntentClassifier
+from src.services.lead import LeadService
+from src.services.rag import RagService
+
+ORG_ID = "bench_org"
+BRANCH_ID = "bench_branch"
+
+# One representative message per intent route of the graph.
+CHAT_SCENARIOS: Dict[str, str] = {
+    "RAG_INFO": "What are your opening hours on weekends?",
+    "PURCHASE_INTEREST": "I'm interested in buying the premium plan, reach me at lead@example.com",
+    "BOOKING": "Can I book an appointment for tomorrow?",
+    "CANCEL_BOOKING": "Please cancel my visit",
+}
+
+INGEST_TEXT = " ".join(
+    f"Section {i}: our premium plan includes onboarding, support and weekend hours." for i in range(120)
+)
+
+
+@dataclass
+class FakeEnvironment:
+    index: FakePineconeIndex
+    collection: FakeMongoCollection
+    calendar: FakeCalendarClient
+    email: FakeEmailClient
+    orchestrator: AgentOrchestrator
+    pipeline: IngestionPipeline
+
+
+def build_environment(latency: Latency, embed_latency: Optional[Latency] = None) -> FakeEnvironment:
+    index = FakePineconeIndex(latency)
+    collection = FakeMongoCollection(latency)
+    calendar = FakeCalendarClient(latency)
+    email = FakeEmailClient(latency)
+    embedder = LatencyEmbedder(DeterministicEmbedding(), embed_latency or latency)
+    orchestrator = AgentOrchestrator(
+        rag_service=RagService(pinecone_index=index, embedder=embedder, async_index=FakeAsyncPineconeIndex(index)),
+        lead_service=LeadService(
+            collection=collection,
+            email_client=email,
+            async_collection=FakeAsyncMongoCollection(collection),
+        ),
+        calendar_service=CalendarService(calendar_client=calendar),
+        intent_classifier=RuleBasedIntentClassifier().classify,
+        session_store=SessionStore(),
+    )
+    pipeline = IngestionPipeline(pinecone_index=index, embedder=embedder)
+    return FakeEnvironment(index, collection, calendar, email, orchestrator, pipeline)
+
+
+@contextmanager
+def installed(environment: FakeEnvironment) -> Iterator[None]:
+    app.dependency_overrides[get_orchestrator] = lambda: environment.orchestrator
+    app.dependency_overrides[get_ingestion_pipeline] = lambda: environment.pipeline
+    try:
+        yield
+    finally:
+        app.dependency_overrides.pop(get_orchestrator, None)
+        app.dependency_overrides.pop(get_ingestion_pipeline, None)
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    """Nearest-rank percentile."""
+
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = max(1, math.ceil(pct / 100.0 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+@dataclass
+class LoadReport:
+    requests: int
+    concurrency: int
+    elapsed_s: float
+    latencies: Dict[str, List[float]] = field(default_factory=dict)
+    errors: Dict[str, int] = field(default_factory=dict)
+    max_rss_mb: float = 0.0
+    traced_peak_mb: Optional[float] = None
+
+    @property
+    def throughput_rps(self) -> float:
+        return self.requests / self.elapsed_s if self.elapsed_s else 0.0
+
+    def routes(self) -> Dict[str, Dict[str, float]]:
+        summary = {}
+        for route, samples in sorted(self.latencies.items()):
+            summary[route] = {
+                "count": len(samples),
+                "errors": self.errors.get(route, 0),
+                "mean_ms": round(statistics.fmean(samples) * 1000, 2) if samples else 0.0,
+                "p50_ms": round(percentile(samples, 50) * 1000, 2),
+                "p95_ms": round(percentile(samples, 95) * 1000, 2),
+                "p99_ms": round(percentile(samples, 99) * 1000, 2),
+            }
+        return summary
+
+    def as_dict(self) -> Dict[str, object]:
+        return {
+            "requests": self.requests,
+            "concurrency": self.concurrency,
+            "elapsed_s": round(self.elapsed_s, 3),
+            "throughput_rps": round(self.throughput_rps, 1),
+            "max_rss_mb": round(self.max_rss_mb, 1),
+            "traced_peak_mb": None if self.traced_peak_mb is None else round(self.traced_peak_mb, 1),
+            "routes": self.routes(),
+        }
+
+
+def _chat_payload(session_id: str, message: str) -> dict:
+    return {
+        "context": {"org_id": ORG_ID, "branch_id": BRANCH_ID, "user_session_id": session_id},
+        "message": {"role": "user", "content": message},
+    }
+
+
+def _ingest_payload(request_id: int) -> dict:
+    return {
+        "context": {"org_id": ORG_ID, "branch_id": BRANCH_ID, "user_session_id": f"ingest-{request_id}"},
+        "documents": [{"text": INGEST_TEXT}],
+    }
+
+
+async def run_load(
+    requests: int = 500,
+    concurrency: int = 50,
+    latency: Optional[Latency] = None,
+    embed_latency: Optional[Latency] = None,
+    ingest_every: int = 50,
+    trace_memory: bool = False,
+) -> LoadReport:
+    """Fire ``requests`` calls with at most ``concurrency`` in flight.
+
+    Chat messages rotate through ``CHAT_SCENARIOS``; every ``ingest_every``-th request is an
+    ingestion (0 disables ingestion). Chat latency is keyed by the intent the graph routed to.
+    """
+
+    environment = build_environment(latency or Latency(), embed_latency)
+    scenarios = list(CHAT_SCENARIOS.values())
+    latencies: Dict[str, List[float]] = defaultdict(list)
+    errors: Dict[str, int] = defaultdict(int)
+    queue: "asyncio.Queue[int]" = asyncio.Queue()
+    for request_id in range(requests):
+        queue.put_nowait(request_id)
+
+    async def worker(worker_id: int, client: httpx.AsyncClient) -> None:
+        session_id = f"bench-session-{worker_id}"
+        while True:
+            try:
+                request_id = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            is_ingest = bool(ingest_every) and request_id % ingest_every == ingest_every - 1
+            started = time.perf_counter()
+            if is_ingest:
+                response = await client.post("/api/v1/ingest", json=_ingest_payload(request_id))
+                route = "ingest"
+            else:
+                message = scenarios[request_id % len(scenarios)]
+                response = await client.post("/api/v1/chat", json=_chat_payload(session_id, message))
+                route = f"chat:{response.json().get('intent', 'ERROR')}" if response.status_code == 200 else "chat:ERROR"
+            elapsed = time.perf_counter() - started
+            if response.status_code != 200:
+                errors[route] += 1
+            latencies[route].append(elapsed)
+
+    if trace_memory:
+        tracemalloc.start()
+    transport = httpx.ASGITransport(app=app)
+    with installed(environment):
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            started = time.perf_counter()
+            await asyncio.gather(*(worker(worker_id, client) for worker_id in range(concurrency)))
+            elapsed = time.perf_counter() - started
+
+    traced_peak = None
+    if trace_memory:
+        traced_peak = tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+        tracemalloc.stop()
+    # ru_maxrss is reported in kilobytes on Linux.
+    max_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    return LoadReport(
+        requests=requests,
+        concurrency=concurrency,
+        elapsed_s=elapsed,
+        latencies=dict(latencies),
+        errors=dict(errors),
+        max_rss_mb=max_rss_mb,
+        traced_peak_mb=traced_peak,
+    )
+
+
+def print_report(report: LoadReport) -> None:
+    print(
+        f"{report.requests} requests, concurrency {report.concurrency}: "
+        f"{report.throughput_rps:.1f} req/s in {report.elapsed_s:.2f}s, max RSS {report.max_rss_mb:.1f} MB"
+        + (f", traced peak {report.traced_peak_mb:.1f} MB" if report.traced_peak_mb is not None else "")
+    )
+    print(f"{'route':<26}{'count':>7}{'errors':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for route, row in report.routes().items():
+        print(
+            f"{route:<26}{row['count']:>7}{row['errors']:>8}"
+            f"{row['p50_ms']:>10}{row['p95_ms']:>10}{row['p99_ms']:>10}"
+        )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="Mean latency of each fake call")
+    parser.add_argument("--jitter-ms", type=float, default=5.0)
+    parser.add_argument("--embed-latency-ms", type=float, default=None, help="Defaults to --latency-ms")
+    parser.add_argument("--ingest-every", type=int, default=50, help="Every Nth request ingests; 0 disables")
+    parser.add_argument("--trace-memory", action="store_true", help="Report tracemalloc peak (slower)")
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args(argv)
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    latency = Latency(args.latency_ms / 1000, args.jitter_ms / 1000)
+    embed_latency = None
+    if args.embed_latency_ms is not None:
+        embed_latency = Latency(args.embed_latency_ms / 1000, args.jitter_ms / 1000)
+    report = asyncio.run(
+        run_load(
+            requests=args.requests,
+            concurrency=args.concurrency,
+            latency=latency,
+            embed_latency=embed_latency,
+            ingest_every=args.ingest_every,
+            trace_memory=args.trace_memory,
+        )
+    )
+    if args.json:
+        print(json.dumps(report.as_dict()))
+    else:
+        print_report(report)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,139 @@
+"""Cold-start benchmark: import time and time-to-first-request per entry point.
+
+Each measurement runs in a fresh interpreter so module caches do not leak between runs::
+
+    python -m benchmarks.startup --runs 5
+    python -m benchmarks.startup --entry api --fast-startup
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+
+HEAVY_MODULES = ("langgraph", "langchain_core", "pinecone", "pymongo", "googleapiclient", "google.genai")
+
+# Each probe prints a JSON object with ``import_s`` and ``first_request_s``.
+PROBES: Dict[str, str] = {
+    "api": """
+import time
+started = time.perf_counter()
+from src.app.main import app
+imported = time.perf_counter()
+from fastapi.testclient import TestClient
+with TestClient(app) as client:
+    assert client.get("/health").status_code == 200
+done = time.perf_counter()
+""",
+    "ingestion": """
+import time
+started = time.perf_counter()
+from src.ingestion.pipeline import IngestionPipeline
+from src.services.embeddings_fallback import DeterministicEmbedding
+imported = time.perf_counter()
+
+class _Index:
+    def upsert(self, vectors, namespace=None):
+        return {"upserted_count": len(vectors)}
+
+IngestionPipeline(pinecone_index=_Index(), embedder=DeterministicEmbedding()).run(
+    context={"org_id": "bench", "branch_id": "bench"},
+    documents=[{"text": "cold start probe " * 200}],
+)
+done = time.perf_counter()
+""",
+    "orchestrator": """
+import time
+started = time.perf_counter()
+from src.orchestrator.graph import AgentOrchestrator
+from src.orchestrator.state import ConversationState
+from src.services.intent_rules import RuleBasedIntentClassifier
+from src.services.rag import RetrievalResult
+imported = time.perf_counter()
+
+class _Rag:
+    def retrieve(self, context, query, history):
+        return RetrievalResult(answer="ok")
+
+orchestrator = AgentOrchestrator(_Rag(), None, None, RuleBasedIntentClassifier().classify)
+orchestrator.run(ConversationState(user_query="hours?", context={"org_id": "o", "branch_id": "b"}))
+done = time.perf_counter()
+""",
+}
+
+_REPORT = """
+import json, sys
+print(json.dumps({
+    "import_s": imported - started,
+    "first_request_s": done - imported,
+    "heavy_modules": [name for name in %r if name in sys.modules],
+}))
+"""
+
+
+def measure(entry: str, fast_startup: bool) -> Dict[str, object]:
+    env = dict(os.environ, FAST_STARTUP=str(fast_startup).lower(), PYTHONPATH=str(REPO_ROOT))
+    code = PROBES[entry] + _REPORT % (HEAVY_MODULES,)
+    completed = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=REPO_ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def summarize(entry: str, fast_startup: bool, samples: List[Dict[str, object]]) -> Dict[str, object]:
+    imports = [float(sample["import_s"]) for sample in samples]
+    first = [float(sample["first_request_s"]) for sample in samples]
+    return {
+        "entry": entry,
+        "fast_startup": fast_startup,
+        "runs": len(samples),
+        "import_ms_p50": round(statistics.median(imports) * 1000, 1),
+        "first_request_ms_p50": round(statistics.median(first) * 1000, 1),
+        "heavy_modules": samples[-1]["heavy_modules"],
+    }
+
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--entry", choices=sorted(PROBES), action="append")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--fast-startup", action="store_true", help="Only measure FAST_STARTUP=true")
+    parser.add_argument("--json", action="store_true", help="Emit JSON lines instead of a table")
+    args = parser.parse_args(argv)
+
+    modes = [True] if args.fast_startup else [False, True]
+    rows = []
+    for entry in args.entry or sorted(PROBES):
+        for fast_startup in modes:
+            samples = [measure(entry, fast_startup) for _ in range(args.runs)]
+            rows.append(summarize(entry, fast_startup, samples))
+
+    if args.json:
+        for row in rows:
+            print(json.dumps(row))
+        return 0
+
+    print(f"{'entry':<14}{'fast':<7}{'import p50 ms':>15}{'first req p50 ms':>19}  heavy modules loaded")
+    for row in rows:
+        print(
+            f"{row['entry']:<14}{str(row['fast_startup']):<7}{row['import_ms_p50']:>15}"
+            f"{row['first_request_ms_p50']:>19}  {', '.join(row['heavy_modules']) or '-'}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
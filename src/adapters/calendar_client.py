@@ -1,46 +1,126 @@
 ﻿from __future__ import annotations
 
-from dataclasses import dataclass
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
 from typing import Any, Dict
 
-try:
-    from google.oauth2 import service_account
-    from googleapiclient.discovery import build
-except ImportError:  # pragma: no cover
-    service_account = None
-    build = None
+from src.utils.aio import run_blocking
+from src.utils.metrics import observe_adapter
+
+
+def _google_sdk():
+    """Import the Google client libraries on first use; they are slow to load."""
+
+    try:
+        from google.oauth2 import service_account
+        from googleapiclient.discovery import build
+    except ImportError:  # pragma: no cover
+        return None, None
+    return service_account, build
+
+
+def _auth_request():
+    from google.auth.transport.requests import Request
+
+    return Request()
 
 
 @dataclass
 class CalendarClient:
+    """Google Calendar adapter that reuses credentials and discovery-built services.
+
+    Delegated credentials are loaded once and refreshed ahead of expiry under a lock. The
+    built service holds an ``httplib2.Http`` which is not thread-safe, so each worker thread
+    builds its own service (and ``events()`` resource) once and reuses it for every calendar.
+    """
+
     service_account_file: str
     default_timezone: str
     scopes: tuple[str, ...] = ("https://www.googleapis.com/auth/calendar",)
+    token_refresh_margin_s: float = 300.0
+    _credentials: Any = field(default=None, init=False, repr=False)
+    _credentials_lock: threading.Lock = field(default_factory=threading.Lock, init=False, repr=False)
+    _local: threading.local = field(default_factory=threading.local, init=False, repr=False)
 
     def _service(self):
+        credentials = self._fresh_credentials()
+        service = getattr(self._local, "service", None)
+        if service is None or getattr(self._local, "credentials", None) is not credentials:
+            _, build = _google_sdk()
+            service = build("calendar", "v3", credentials=credentials, cache_discovery=False)
+            self._local.service = service
+            self._local.credentials = credentials
+            self._local.events = None
+        return service
+
+    def _events(self):
+        service = self._service()
+        events = getattr(self._local, "events", None)
+        if events is None:
+            events = service.events()
+            self._local.events = events
+        return events
+
+    def _fresh_credentials(self):
+        credentials = self._credentials
+        if credentials is not None and not self._needs_refresh(credentials):
+            return credentials
+        with self._credentials_lock:
+            credentials = self._credentials
+            if credentials is None:
+                credentials = self._load_credentials()
+                self._credentials = credentials
+            if self._needs_refresh(credentials):
+                with observe_adapter("google_calendar", "token_refresh"):
+                    credentials.refresh(_auth_request())
+        return credentials
+
+    def _load_credentials(self):
+        service_account, build = _google_sdk()
         if not service_account or not build:
             raise RuntimeError("google-api-python-client is required for Calendar access")
         credentials = service_account.Credentials.from_service_account_file(
             self.service_account_file, scopes=self.scopes
         )
-        delegated = credentials.with_subject(credentials.service_account_email)
-        return build("calendar", "v3", credentials=delegated, cache_discovery=False)
+        return credentials.with_subject(credentials.service_account_email)
 
-    def list_events(self, calendar_id: str, time_min: str, time_max: str) -> Dict[str, Any]:
-        service = self._service()
-        events = (
-            service.events()
-            .list(calendarId=calendar_id, timeMin=time_min, timeMax=time_max, singleEvents=True)
-            .execute()
-        )
+    def _needs_refresh(self, credentials) -> bool:
+        if not getattr(credentials, "token", None):
+            return True
+        expiry = getattr(credentials, "expiry", None)
+        if expiry is None:
+            return False
+        # google-auth reports expiry as a naive UTC datetime.
+        return expiry - timedelta(seconds=self.token_refresh_margin_s) <= datetime.utcnow()
+
+    def list_events(self, calendar_id: str, time_min: str, time_max: str, org_id: str = "") -> Dict[str, Any]:
+        with observe_adapter("google_calendar", "events.list", org_id):
+            events = (
+                self._events()
+                .list(calendarId=calendar_id, timeMin=time_min, timeMax=time_max, singleEvents=True)
+                .execute()
+            )
         return events
 
-    def create_event(self, calendar_id: str, body: Dict[str, Any]) -> Dict[str, Any]:
-        service = self._service()
-        event = service.events().insert(calendarId=calendar_id, body=body).execute()
+    def create_event(self, calendar_id: str, body: Dict[str, Any], org_id: str = "") -> Dict[str, Any]:
+        with observe_adapter("google_calendar", "events.insert", org_id):
+            event = self._events().insert(calendarId=calendar_id, body=body).execute()
         return event
 
-    def patch_event(self, calendar_id: str, event_id: str, body: Dict[str, Any]) -> Dict[str, Any]:
-        service = self._service()
-        event = service.events().patch(calendarId=calendar_id, eventId=event_id, body=body).execute()
-        return event
\ No newline at end of file
+    def patch_event(self, calendar_id: str, event_id: str, body: Dict[str, Any], org_id: str = "") -> Dict[str, Any]:
+        with observe_adapter("google_calendar", "events.patch", org_id):
+            event = self._events().patch(calendarId=calendar_id, eventId=event_id, body=body).execute()
+        return event
+
+    # googleapiclient has no asyncio transport, so the async variants offload to the I/O pool.
+    async def alist_events(self, calendar_id: str, time_min: str, time_max: str, org_id: str = "") -> Dict[str, Any]:
+        return await run_blocking(self.list_events, calendar_id, time_min, time_max, org_id)
+
+    async def acreate_event(self, calendar_id: str, body: Dict[str, Any], org_id: str = "") -> Dict[str, Any]:
+        return await run_blocking(self.create_event, calendar_id, body, org_id)
+
+    async def apatch_event(
+        self, calendar_id: str, event_id: str, body: Dict[str, Any], org_id: str = ""
+    ) -> Dict[str, Any]:
+        return await run_blocking(self.patch_event, calendar_id, event_id, body, org_id)
@@ -13,4 +13,8 @@ class EmailClient:
         # Placeholder for integration with SendGrid / SMTP provider
         if not self.api_key:
             raise RuntimeError("Email client configured without API key")
-        return {"status": "queued", "recipient": recipient, "subject": subject}
\ No newline at end of file
+        return {"status": "queued", "recipient": recipient, "subject": subject}
+
+    async def asend(self, recipient: str, subject: str, body: str) -> Dict[str, str]:  # pragma: no cover
+        # Provider SDKs expose async HTTP clients; the placeholder has no I/O to await yet.
+        return self.send(recipient=recipient, subject=subject, body=body)
@@ -0,0 +1,612 @@
+from __future__ import annotations
+
+import json
+import logging
+import math
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Mapping, Optional, Sequence, Tuple
+from urllib.parse import quote, unquote
+
+from src.adapters.pinecone_client import PineconeIndexProtocol
+from src.utils.vectors import block_dot
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_NAMESPACE_DIR = "__default__"
+HEADER_FILE = "segment.json"
+VECTORS_FILES = {"float32": "vectors.f32", "float16": "vectors.f16"}
+RECORDS_FILE = "records.jsonl"
+COMPACT_SUFFIX = ".compact"
+SUPPORTED_METRICS = ("cosine", "dotproduct")
+
+Record = Tuple[str, Sequence[float], Dict[str, Any]]
+
+_MISSING = object()
+
+
+def _numpy():
+    try:
+        import numpy  # type: ignore
+    except ImportError:  # pragma: no cover - numpy is listed in requirements
+        return None
+    return numpy
+
+
+def _namespace_dir(namespace: Optional[str]) -> str:
+    return quote(namespace, safe="") if namespace else DEFAULT_NAMESPACE_DIR
+
+
+def _namespace_name(directory: str) -> str:
+    return "" if directory == DEFAULT_NAMESPACE_DIR else unquote(directory)
+
+
+def _as_record(vector: Any) -> Record:
+    if isinstance(vector, Mapping):
+        return vector["id"], vector["values"], dict(vector.get("metadata") or {})
+    record_id, values, *rest = vector
+    return record_id, values, dict(rest[0] or {}) if rest else {}
+
+
+class _Ivf:
+    """Coarse quantizer: centroids plus the list each row was assigned to."""
+
+    def __init__(self, centroids, assignments, trained_rows: int) -> None:
+        self.centroids = centroids
+        self.assignments = assignments
+        self.trained_rows = trained_rows
+
+
+class _Segment:
+    """One namespace: a float32 or float16 matrix on disk plus its ids and metadata.
+
+    ``vectors.f32`` (or ``vectors.f16``) holds the rows back to back and is memory-mapped
+    read-only. ``records.jsonl`` is the matching log of ``["u", id, metadata]`` rows and
+    ``["d", id]`` tombstones; the live row for an id is its last upsert. Both files are
+    appended to, and a torn tail from a crash is ignored on load. Once replaced and deleted
+    rows reach ``compact_dead_ratio`` of the file, ``compact`` rewrites both with only the
+    live rows.
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        metric: str,
+        dimension: Optional[int],
+        dtype: str = "float32",
+        compact_dead_ratio: float = 0.5,
+    ) -> None:
+        self.np = _numpy()
+        self.directory = directory
+        self.metric = metric
+        self.dimension = dimension
+        self.dtype = dtype
+        self.compact_dead_ratio = compact_dead_ratio
+        self.ids: List[str] = []
+        self.metadata: List[Dict[str, Any]] = []
+        self.rows: Dict[str, int] = {}
+        self.alive = self.np.zeros(0, dtype=bool)
+        self.matrix = None
+        self.ivf: Optional[_Ivf] = None
+        self.lock = threading.RLock()
+        self._generation = 0
+        self._training: Optional[threading.Thread] = None
+        self._filter_masks: Dict[str, Any] = {}
+        self._columns: Dict[str, Any] = {}
+        self._load()
+
+    @property
+    def live_count(self) -> int:
+        return len(self.rows)
+
+    @property
+    def dead_count(self) -> int:
+        return len(self.ids) - len(self.rows)
+
+    # -- persistence -------------------------------------------------------------------------
+
+    def _load(self) -> None:
+        header = self.directory / HEADER_FILE
+        if not header.exists():
+            return
+        meta = json.loads(header.read_text(encoding="utf-8"))
+        self.dimension = int(meta["dimension"])
+        self.metric = meta.get("metric", self.metric)
+        self.dtype = meta.get("dtype", "float32")
+        self._finish_compaction()
+        vectors = self.directory / VECTORS_FILES[self.dtype]
+        row_bytes = self.np.dtype(self.dtype).itemsize * self.dimension
+        stored_rows = vectors.stat().st_size // row_bytes if vectors.exists() else 0
+        records = self.directory / RECORDS_FILE
+        if records.exists():
+            with records.open(encoding="utf-8") as handle:
+                for line in handle:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        logger.warning("Ignoring torn record in %s", records)
+                        break
+                    if entry[0] == "u":
+                        if len(self.ids) >= stored_rows:
+                            break
+                        self.rows[entry[1]] = len(self.ids)
+                        self.ids.append(entry[1])
+                        self.metadata.append(entry[2])
+                    else:
+                        self.rows.pop(entry[1], None)
+        if vectors.exists() and vectors.stat().st_size != len(self.ids) * row_bytes:
+            # Drop vectors whose records never made it to disk so later appends stay aligned.
+            with vectors.open("r+b") as handle:
+                handle.truncate(len(self.ids) * row_bytes)
+        alive = self.np.zeros(len(self.ids), dtype=bool)
+        alive[list(self.rows.values())] = True
+        self.alive = alive
+        self._remap()
+
+    def _remap(self) -> None:
+        np = self.np
+        if not self.ids:
+            self.matrix = np.zeros((0, self.dimension or 0), dtype=self.dtype)
+            return
+        vectors = self.directory / VECTORS_FILES[self.dtype]
+        self.matrix = np.memmap(vectors, dtype=self.dtype, mode="r", shape=(len(self.ids), self.dimension))
+
+    def _prepare(self, values: Sequence[Sequence[float]]):
+        np = self.np
+        matrix = np.asarray(values, dtype=np.float32)
+        if matrix.ndim != 2:
+            raise ValueError("Vectors must all have the same dimension")
+        if self.dimension is None:
+            self.dimension = int(matrix.shape[1])
+        if matrix.shape[1] != self.dimension:
+            raise ValueError(f"Vector dimension {matrix.shape[1]} does not match index dimension {self.dimension}")
+        if self.metric == "cosine":
+            norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+            matrix = matrix / np.where(norms == 0, 1, norms)
+        return np.ascontiguousarray(matrix, dtype=np.float32)
+
+    def upsert(self, records: List[Record]) -> int:
+        if not records:
+            return 0
+        with self.lock:
+            matrix = self._prepare([values for _, values, _ in records])
+            self.directory.mkdir(parents=True, exist_ok=True)
+            header = self.directory / HEADER_FILE
+            if not header.exists():
+                header.write_text(
+                    json.dumps({"dimension": self.dimension, "metric": self.metric, "dtype": self.dtype}),
+                    encoding="utf-8",
+                )
+            # Vectors first: a crash before the records are written leaves rows that are ignored.
+            with (self.directory / VECTORS_FILES[self.dtype]).open("ab") as handle:
+                handle.write(matrix.astype(self.dtype, copy=False).tobytes())
+            with (self.directory / RECORDS_FILE).open("a", encoding="utf-8") as handle:
+                handle.writelines(json.dumps(["u", record_id, metadata]) + "\n" for record_id, _, metadata in records)
+
+            first_row = len(self.ids)
+            alive = self.np.concatenate([self.alive, self.np.ones(len(records), dtype=bool)])
+            for offset, (record_id, _, metadata) in enumerate(records):
+                previous = self.rows.get(record_id)
+                if previous is not None:
+                    alive[previous] = False
+                self.rows[record_id] = first_row + offset
+                self.ids.append(record_id)
+                self.metadata.append(metadata)
+            self.alive = alive
+            self._remap()
+            if self.ivf is not None:
+                self.ivf.assignments = self.np.concatenate(
+                    [self.ivf.assignments, self._assign(matrix, self.ivf.centroids)]
+                )
+            self._invalidate()
+            self._maybe_compact()
+        return len(records)
+
+    def delete(self, ids: Optional[Sequence[str]] = None, delete_all: bool = False) -> None:
+        with self.lock:
+            targets = list(self.rows) if delete_all else [record_id for record_id in ids or () if record_id in self.rows]
+            if not targets:
+                return
+            with (self.directory / RECORDS_FILE).open("a", encoding="utf-8") as handle:
+                handle.writelines(json.dumps(["d", record_id]) + "\n" for record_id in targets)
+            alive = self.alive.copy()
+            for record_id in targets:
+                alive[self.rows.pop(record_id)] = False
+            self.alive = alive
+            self._invalidate()
+            self._maybe_compact()
+
+    def _invalidate(self) -> None:
+        self._filter_masks = {}
+        self._columns = {}
+
+    # -- compaction --------------------------------------------------------------------------
+
+    def _maybe_compact(self) -> None:
+        dead = self.dead_count
+        if self.compact_dead_ratio > 0 and dead and dead >= self.compact_dead_ratio * len(self.ids):
+            self.compact()
+
+    def _staged_paths(self) -> Tuple[Path, Path, Path]:
+        vectors = self.directory / (VECTORS_FILES[self.dtype] + COMPACT_SUFFIX)
+        records = self.directory / (RECORDS_FILE + COMPACT_SUFFIX)
+        return vectors, records, records.with_name(records.name + ".tmp")
+
+    def compact(self, chunk: int = 65_536) -> int:
+        """Rewrite the vectors and records files with only the live rows; returns rows dropped."""
+
+        np = self.np
+        with self.lock:
+            dropped = self.dead_count
+            if not dropped:
+                return 0
+            live_rows = np.flatnonzero(self.alive)
+            staged_vectors, staged_records, partial_records = self._staged_paths()
+            with staged_vectors.open("wb") as handle:
+                for start in range(0, len(live_rows), chunk):
+                    handle.write(np.ascontiguousarray(self.matrix[live_rows[start:start + chunk]]).tobytes())
+                handle.flush()
+                os.fsync(handle.fileno())
+            ids = [self.ids[row] for row in live_rows]
+            metadata = [self.metadata[row] for row in live_rows]
+            with partial_records.open("w", encoding="utf-8") as handle:
+                handle.writelines(json.dumps(["u", record_id, meta]) + "\n" for record_id, meta in zip(ids, metadata))
+                handle.flush()
+                os.fsync(handle.fileno())
+            # Renaming the staged records is the commit point: ``_load`` finishes the swap if a
+            # crash lands after it and discards the staged files if it lands before.
+            os.replace(partial_records, staged_records)
+            self._finish_compaction()
+
+            self.ids = ids
+            self.metadata = metadata
+            self.rows = {record_id: row for row, record_id in enumerate(ids)}
+            self.alive = np.ones(len(ids), dtype=bool)
+            self._generation += 1
+            if self.ivf is not None:
+                self.ivf.assignments = self.ivf.assignments[live_rows]
+            self._remap()
+            self._invalidate()
+        logger.info("Compacted %s: dropped %d dead rows, kept %d", self.directory.name, dropped, len(ids))
+        return dropped
+
+    def _finish_compaction(self) -> None:
+        staged_vectors, staged_records, partial_records = self._staged_paths()
+        if staged_records.exists():
+            if staged_vectors.exists():
+                os.replace(staged_vectors, self.directory / VECTORS_FILES[self.dtype])
+            os.replace(staged_records, self.directory / RECORDS_FILE)
+            return
+        for leftover in (staged_vectors, partial_records):
+            leftover.unlink(missing_ok=True)
+
+    # -- filters -----------------------------------------------------------------------------
+
+    def filter_mask(self, filter_payload: Mapping[str, Any]):
+        cache_key = json.dumps(filter_payload, sort_keys=True, default=str)
+        mask = self._filter_masks.get(cache_key)
+        if mask is None:
+            mask = self._mask(filter_payload)
+            self._filter_masks[cache_key] = mask
+        return mask
+
+    def _mask(self, filter_payload: Mapping[str, Any]):
+        np = self.np
+        mask = np.ones(len(self.ids), dtype=bool)
+        for key, condition in filter_payload.items():
+            if key == "$and":
+                for clause in condition:
+                    mask &= self._mask(clause)
+            elif key == "$or":
+                any_clause = np.zeros(len(self.ids), dtype=bool)
+                for clause in condition:
+                    any_clause |= self._mask(clause)
+                mask &= any_clause
+            else:
+                mask &= self._field_mask(key, condition)
+        return mask
+
+    def _column(self, name: str):
+        column = self._columns.get(name)
+        if column is None:
+            column = self.np.empty(len(self.ids), dtype=object)
+            column[:] = [metadata.get(name, _MISSING) for metadata in self.metadata]
+            self._columns[name] = column
+        return column
+
+    def _field_mask(self, name: str, condition: Any):
+        np = self.np
+        column = self._column(name)
+        if not isinstance(condition, Mapping):
+            condition = {"$eq": condition}
+        mask = np.ones(len(self.ids), dtype=bool)
+        for operator, operand in condition.items():
+            if operator == "$eq":
+                mask &= column == operand
+            elif operator == "$ne":
+                mask &= column != operand
+            elif operator in ("$in", "$nin"):
+                members = set(operand)
+                hits = np.fromiter((value in members for value in column), dtype=bool, count=len(column))
+                mask &= hits if operator == "$in" else ~hits
+            elif operator == "$exists":
+                present = np.fromiter((value is not _MISSING for value in column), dtype=bool, count=len(column))
+                mask &= present if operand else ~present
+            elif operator in ("$gt", "$gte", "$lt", "$lte"):
+                compare = {
+                    "$gt": lambda value: value > operand,
+                    "$gte": lambda value: value >= operand,
+                    "$lt": lambda value: value < operand,
+                    "$lte": lambda value: value <= operand,
+                }[operator]
+                mask &= np.fromiter(
+                    (isinstance(value, (int, float)) and compare(value) for value in column),
+                    dtype=bool,
+                    count=len(column),
+                )
+            else:
+                raise ValueError(f"Unsupported metadata filter operator: {operator}")
+        return mask
+
+    # -- IVF ---------------------------------------------------------------------------------
+
+    def ensure_ivf(self, min_vectors: int) -> Optional[_Ivf]:
+        """Return the current quantizer, retraining it on a background thread when missing or stale.
+
+        Callers keep using the previous quantizer, or exact search, until the new one is swapped in.
+        """
+
+        if self._needs_ivf(min_vectors):
+            with self.lock:
+                training = self._training
+                if self._needs_ivf(min_vectors) and (training is None or not training.is_alive()):
+                    self._training = threading.Thread(
+                        target=self.build_ivf, name=f"ivf-{self.directory.name}", daemon=True
+                    )
+                    self._training.start()
+        return self.ivf
+
+    def _needs_ivf(self, min_vectors: int) -> bool:
+        live = self.live_count
+        if not min_vectors or live < min_vectors:
+            return False
+        return self.ivf is None or live > 2 * self.ivf.trained_rows
+
+    def build_ivf(self) -> Optional[_Ivf]:
+        """Train a quantizer over a snapshot of the rows without holding the lock, then swap it in."""
+
+        np = self.np
+        with self.lock:
+            matrix, alive, generation = self.matrix, self.alive, self._generation
+        if not alive.any():
+            return self.ivf
+        centroids = self._train(matrix, alive)
+        assignments = self._assign(matrix, centroids)
+        with self.lock:
+            if generation != self._generation:
+                # A compaction renumbered the rows meanwhile; the next query trains again.
+                return self.ivf
+            tail = self._assign(self.matrix[len(assignments):], centroids)
+            self.ivf = _Ivf(centroids, np.concatenate([assignments, tail]), int(alive.sum()))
+        logger.info(
+            "Trained IVF with %d lists over %d vectors in %s", len(centroids), alive.sum(), self.directory.name
+        )
+        return self.ivf
+
+    def _train(self, matrix, alive, iterations: int = 10, seed: int = 0):
+        np = self.np
+        rng = np.random.default_rng(seed)
+        live_rows = np.flatnonzero(alive)
+        nlist = max(1, min(4096, int(math.sqrt(len(live_rows)))))
+        sample_rows = np.sort(rng.choice(live_rows, size=min(len(live_rows), nlist * 64), replace=False))
+        sample = np.asarray(matrix[sample_rows], dtype=np.float32)
+        centroids = sample[rng.choice(len(sample), size=nlist, replace=False)].copy()
+        for _ in range(iterations):
+            labels = np.argmax(sample @ centroids.T, axis=1)
+            for cluster in range(nlist):
+                members = sample[labels == cluster]
+                centroids[cluster] = members.mean(axis=0) if len(members) else sample[rng.integers(len(sample))]
+            if self.metric == "cosine":
+                norms = np.linalg.norm(centroids, axis=1, keepdims=True)
+                centroids /= np.where(norms == 0, 1, norms)
+        return centroids
+
+    def _assign(self, matrix, centroids, chunk: int = 65_536):
+        np = self.np
+        if not len(matrix):
+            return np.zeros(0, dtype=np.int32)
+        labels = [
+            np.argmax(np.asarray(matrix[start:start + chunk], dtype=np.float32) @ centroids.T, axis=1)
+            for start in range(0, len(matrix), chunk)
+        ]
+        return np.concatenate(labels).astype(np.int32)
+
+
+class LocalVectorIndex(PineconeIndexProtocol):
+    """In-process vector index with one memory-mapped float32 segment per namespace.
+
+    Implements the parts of the Pinecone index API the services use (``query``, ``upsert``,
+    ``delete`` and ``describe_index_stats``) including metadata filters. Search is an exact
+    top-k over a NumPy dot product; namespaces with at least ``ivf_min_vectors`` live vectors
+    switch to an IVF coarse quantizer that scores only the ``nprobe`` closest lists. The
+    quantizer is trained on a background thread (or by ``build_ivf``) and queries stay exact
+    until it is ready.
+
+    ``vector_dtype="float16"`` halves the size of new segments; rows are widened to float32
+    block by block when scored. Existing segments keep the dtype they were created with.
+
+    Replaced and deleted rows stay on disk until they make up ``compact_dead_ratio`` of a
+    segment, at which point it is rewritten with only the live rows (0 disables this;
+    ``compact`` runs it on demand).
+    """
+
+    def __init__(
+        self,
+        path: str | Path,
+        metric: str = "cosine",
+        dimension: Optional[int] = None,
+        ivf_min_vectors: int = 0,
+        nprobe: int = 8,
+        vector_dtype: str = "float32",
+        compact_dead_ratio: float = 0.5,
+    ) -> None:
+        if _numpy() is None:
+            raise RuntimeError("numpy is required for the local vector index")
+        if vector_dtype not in VECTORS_FILES:
+            raise RuntimeError(f"Local vector index stores {', '.join(VECTORS_FILES)} vectors, not {vector_dtype}")
+        if metric not in SUPPORTED_METRICS:
+            raise RuntimeError(f"Local vector index supports {', '.join(SUPPORTED_METRICS)} metrics, not {metric}")
+        self._path = Path(path)
+        self._metric = metric
+        self._dimension = dimension
+        self._ivf_min_vectors = ivf_min_vectors
+        self._nprobe = nprobe
+        self._vector_dtype = vector_dtype
+        self._compact_dead_ratio = compact_dead_ratio
+        self._segments: Dict[str, _Segment] = {}
+        self._lock = threading.Lock()
+
+    def _segment(self, namespace: Optional[str], create: bool = False) -> Optional[_Segment]:
+        name = namespace or ""
+        segment = self._segments.get(name)
+        if segment is not None:
+            return segment
+        directory = self._path / _namespace_dir(name)
+        if not create and not directory.exists():
+            return None
+        with self._lock:
+            segment = self._segments.get(name)
+            if segment is None:
+                segment = _Segment(
+                    directory, self._metric, self._dimension, self._vector_dtype, self._compact_dead_ratio
+                )
+                self._segments[name] = segment
+        return segment
+
+    def upsert(self, vectors: List, namespace: str | None = None) -> Dict[str, int]:
+        records = [_as_record(vector) for vector in vectors]
+        segment = self._segment(namespace, create=True)
+        upserted = segment.upsert(records)
+        segment.ensure_ivf(self._ivf_min_vectors)
+        return {"upserted_count": upserted}
+
+    def delete(
+        self,
+        ids: Optional[Sequence[str]] = None,
+        delete_all: bool = False,
+        namespace: str | None = None,
+        **_: Any,
+    ) -> Dict[str, Any]:
+        segment = self._segment(namespace)
+        if segment is not None:
+            segment.delete(ids, delete_all=delete_all)
+        return {}
+
+    def build_ivf(self, namespace: str | None = None) -> bool:
+        """Train a namespace's IVF quantizer now instead of waiting for the background thread."""
+
+        segment = self._segment(namespace)
+        return segment is not None and segment.build_ivf() is not None
+
+    def compact(self, namespace: str | None = None) -> int:
+        """Drop replaced and deleted rows from a namespace's files now; returns rows dropped."""
+
+        segment = self._segment(namespace)
+        return segment.compact() if segment is not None else 0
+
+    def list(self, prefix: Optional[str] = None, limit: int = 100, namespace: str | None = None) -> Iterator[List[str]]:
+        """Yield pages of live ids, like the serverless ``Index.list`` generator."""
+
+        segment = self._segment(namespace)
+        if segment is None:
+            return
+        with segment.lock:
+            ids = [record_id for record_id in segment.rows if not prefix or record_id.startswith(prefix)]
+        for start in range(0, len(ids), limit):
+            yield ids[start:start + limit]
+
+    def fetch(self, ids: Sequence[str], namespace: str | None = None, **_: Any) -> Dict[str, Any]:
+        segment = self._segment(namespace)
+        vectors: Dict[str, Dict[str, Any]] = {}
+        if segment is not None:
+            with segment.lock:
+                for record_id in ids:
+                    row = segment.rows.get(record_id)
+                    if row is not None:
+                        vectors[record_id] = {
+                            "id": record_id,
+                            "values": segment.matrix[row].tolist(),
+                            "metadata": dict(segment.metadata[row]),
+                        }
+        return {"vectors": vectors, "namespace": namespace or ""}
+
+    def query(
+        self,
+        vector: Sequence[float],
+        top_k: int = 10,
+        include_metadata: bool = False,
+        include_values: bool = False,
+        filter: Optional[Dict[str, Any]] = None,
+        namespace: Optional[str] = None,
+        **_: Any,
+    ) -> Dict[str, Any]:
+        segment = self._segment(namespace)
+        if segment is None or not segment.live_count or top_k <= 0:
+            return {"matches": [], "namespace": namespace or ""}
+        np = segment.np
+        query_vector = segment._prepare([vector])[0]
+        segment.ensure_ivf(self._ivf_min_vectors)
+        with segment.lock:
+            matrix, alive, ids, metadata = segment.matrix, segment.alive, segment.ids, segment.metadata
+            candidates = alive & segment.filter_mask(filter) if filter else None
+            ivf = segment.ivf
+            assignments = ivf.assignments if ivf is not None else None
+
+        if assignments is not None:
+            probes = np.argsort(-(ivf.centroids @ query_vector))[: self._nprobe]
+            in_probes = np.isin(assignments, probes)
+            candidates = (candidates if candidates is not None else alive) & in_probes
+
+        if candidates is None:
+            scores = block_dot(matrix, query_vector)
+            scores[~alive] = -np.inf
+            rows = np.arange(len(scores))
+        else:
+            rows = np.flatnonzero(candidates)
+            scores = np.asarray(matrix[rows], dtype=np.float32) @ query_vector
+
+        k = min(top_k, len(scores))
+        if not k:
+            return {"matches": [], "namespace": namespace or ""}
+        best = np.argpartition(-scores, k - 1)[:k]
+        best = best[np.argsort(-scores[best], kind="stable")]
+        matches = []
+        for position in best:
+            score = float(scores[position])
+            if score == -np.inf:
+                break
+            row = int(rows[position])
+            match: Dict[str, Any] = {"id": ids[row], "score": score}
+            if include_metadata:
+                match["metadata"] = dict(metadata[row])
+            if include_values:
+                match["values"] = matrix[row].tolist()
+            matches.append(match)
+        return {"matches": matches, "namespace": namespace or ""}
+
+    def describe_index_stats(self, **_: Any) -> Dict[str, Any]:
+        namespaces: Dict[str, Dict[str, int]] = {}
+        dimension = self._dimension
+        if self._path.exists():
+            for directory in sorted(os.listdir(self._path)):
+                if not (self._path / directory / HEADER_FILE).exists():
+                    continue
+                segment = self._segment(_namespace_name(directory))
+                namespaces[_namespace_name(directory)] = {"vector_count": segment.live_count}
+                dimension = dimension or segment.dimension
+        return {
+            "namespaces": namespaces,
+            "dimension": dimension or 0,
+            "total_vector_count": sum(stats["vector_count"] for stats in namespaces.values()),
+        }
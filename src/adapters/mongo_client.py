@@ -1,21 +1,125 @@
 ﻿from __future__ import annotations
 
-from dataclasses import dataclass
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional
 
-try:
-    from pymongo import MongoClient
-except ImportError:  # pragma: no cover - optional during local dev
-    MongoClient = None
+from src.utils.aio import run_blocking
+
+
+def _mongo_client_class():
+    try:
+        from pymongo import MongoClient
+    except ImportError:  # pragma: no cover - optional during local dev
+        return None
+    return MongoClient
+
+
+def _async_mongo_client_class():
+    try:  # pymongo >= 4.10 ships a native asyncio client
+        from pymongo import AsyncMongoClient
+    except ImportError:  # pragma: no cover - older pymongo
+        return None
+    return AsyncMongoClient
 
 
 @dataclass
 class MongoClientFactory:
+    """Owns one pooled client per process and hands out cached collection handles.
+
+    pymongo clients are thread-safe and maintain their own connection pool, so a single
+    instance is shared by every request; creating one per call repeats server discovery
+    and opens a fresh pool each time.
+    """
+
     uri: str
     db_name: str
+    max_pool_size: int = 100
+    min_pool_size: int = 0
+    max_idle_time_ms: Optional[int] = None
+    connect_timeout_ms: int = 5_000
+    server_selection_timeout_ms: int = 5_000
+    socket_timeout_ms: Optional[int] = None
+    wait_queue_timeout_ms: Optional[int] = None
+    _client: Any = field(default=None, init=False, repr=False)
+    _async_client: Any = field(default=None, init=False, repr=False)
+    _collections: Dict[str, Any] = field(default_factory=dict, init=False, repr=False)
+    _async_collections: Dict[str, Any] = field(default_factory=dict, init=False, repr=False)
+    _lock: threading.Lock = field(default_factory=threading.Lock, init=False, repr=False)
+
+    def client_options(self) -> Dict[str, Any]:
+        options = {
+            "maxPoolSize": self.max_pool_size,
+            "minPoolSize": self.min_pool_size,
+            "connectTimeoutMS": self.connect_timeout_ms,
+            "serverSelectionTimeoutMS": self.server_selection_timeout_ms,
+            "maxIdleTimeMS": self.max_idle_time_ms,
+            "socketTimeoutMS": self.socket_timeout_ms,
+            "waitQueueTimeoutMS": self.wait_queue_timeout_ms,
+        }
+        return {name: value for name, value in options.items() if value is not None}
+
+    def get_client(self):
+        if self._client is None:
+            MongoClient = _mongo_client_class()
+            if MongoClient is None:
+                raise RuntimeError("pymongo package is required for MongoDB access")
+            with self._lock:
+                if self._client is None:
+                    self._client = MongoClient(self.uri, **self.client_options())
+        return self._client
 
     def get_collection(self, collection_name: str):
-        if MongoClient is None:
-            raise RuntimeError("pymongo package is required for MongoDB access")
-        client = MongoClient(self.uri)
-        database = client[self.db_name]
-        return database[collection_name]
\ No newline at end of file
+        collection = self._collections.get(collection_name)
+        if collection is None:
+            client = self.get_client()
+            with self._lock:
+                collection = self._collections.setdefault(collection_name, client[self.db_name][collection_name])
+        return collection
+
+    def get_async_collection(self, collection_name: str) -> "AsyncCollectionProtocol":
+        """Return a collection whose operations can be awaited from the event loop."""
+
+        collection = self._async_collections.get(collection_name)
+        if collection is not None:
+            return collection
+        AsyncMongoClient = _async_mongo_client_class()
+        if AsyncMongoClient is None:
+            collection = ThreadedAsyncCollection(self.get_collection(collection_name))
+        else:
+            with self._lock:
+                if self._async_client is None:
+                    self._async_client = AsyncMongoClient(self.uri, **self.client_options())
+                collection = self._async_client[self.db_name][collection_name]
+        with self._lock:
+            return self._async_collections.setdefault(collection_name, collection)
+
+    async def aclose(self) -> None:
+        """Close both pools; safe to call when no client was ever created."""
+
+        with self._lock:
+            client, self._client = self._client, None
+            async_client, self._async_client = self._async_client, None
+            self._collections.clear()
+            self._async_collections.clear()
+        if client is not None:
+            client.close()
+        if async_client is not None:
+            await async_client.close()
+
+
+class AsyncCollectionProtocol:
+    """Subset of the async Mongo collection API needed by the lead service."""
+
+    async def insert_one(self, document: Dict[str, Any]):  # pragma: no cover - interface only
+        raise NotImplementedError
+
+
+class ThreadedAsyncCollection(AsyncCollectionProtocol):
+    """Adapts a blocking pymongo collection by offloading calls to the I/O pool."""
+
+    def __init__(self, collection) -> None:
+        self._collection = collection
+
+    async def insert_one(self, document: Dict[str, Any]):
+        return await run_blocking(self._collection.insert_one, document)
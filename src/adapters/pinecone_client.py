@@ -1,40 +1,141 @@
 ﻿from __future__ import annotations
 
-from dataclasses import dataclass
-from typing import Dict, List
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
 
-try:  # Newer Pinecone SDK (>=3)
-    from pinecone import Pinecone as PineconeClient  # type: ignore
-except ImportError:  # pragma: no cover - fallback to legacy SDK
-    PineconeClient = None  # type: ignore
+from src.utils.aio import run_blocking
 
-try:
-    import pinecone  # type: ignore  # legacy module entry point
-except ImportError:  # pragma: no cover - pinecone optional during dev
-    pinecone = None
+
+def _pinecone_sdk():
+    """Import the Pinecone SDK on first use; returns ``(module, client_class)``."""
+
+    try:
+        import pinecone  # type: ignore  # legacy module entry point
+    except ImportError:  # pragma: no cover - pinecone optional during dev
+        return None, None
+    # Newer Pinecone SDK (>=3) exposes the Pinecone client class.
+    return pinecone, getattr(pinecone, "Pinecone", None)
+
+
+def _grpc_client_class():
+    try:
+        from pinecone.grpc import PineconeGRPC  # type: ignore
+    except ImportError:  # pragma: no cover - requires the pinecone[grpc] extra
+        return None
+    return PineconeGRPC
 
 
 @dataclass
 class PineconeClientFactory:
+    """Creates one Pinecone client per process and caches an index handle per index name.
+
+    Index handles own the HTTP connection pool (or gRPC channel), so reusing them keeps
+    connections warm instead of paying TLS and client setup on every retrieval.
+    """
+
     api_key: str
     environment: str
     index_name: str
+    index_host: str = ""
+    pool_maxsize: int = 64
+    pool_threads: Optional[int] = None
+    timeout_s: Optional[float] = None
+    use_grpc: bool = False
+    _client: Any = field(default=None, init=False, repr=False)
+    _indexes: Dict[str, Any] = field(default_factory=dict, init=False, repr=False)
+    _async_indexes: Dict[str, "ThreadedAsyncIndex"] = field(default_factory=dict, init=False, repr=False)
+    _lock: threading.Lock = field(default_factory=threading.Lock, init=False, repr=False)
+    _hits: int = field(default=0, init=False, repr=False)
+    _misses: int = field(default=0, init=False, repr=False)
+
+    def get_index(self, index_name: Optional[str] = None):  # type: ignore[override]
+        """Return a cached Pinecone index instance compatible with the active SDK."""
 
-    def get_index(self):  # type: ignore[override]
-        """Return a Pinecone index instance compatible with the active SDK."""
+        name = index_name or self.index_name
+        index = self._indexes.get(name)
+        if index is not None:
+            self._hits += 1
+            return index
+        with self._lock:
+            index = self._indexes.get(name)
+            if index is None:
+                index = self._open_index(name)
+                self._indexes[name] = index
+                self._misses += 1
+            else:
+                self._hits += 1
+        return index
 
+    def get_async_index(self, index_name: Optional[str] = None) -> "AsyncPineconeIndexProtocol":
+        """Return a non-blocking view over the index for use inside the event loop."""
+
+        name = index_name or self.index_name
+        async_index = self._async_indexes.get(name)
+        if async_index is None:
+            async_index = ThreadedAsyncIndex(self.get_index(name))
+            with self._lock:
+                async_index = self._async_indexes.setdefault(name, async_index)
+        return async_index
+
+    def pool_stats(self) -> Dict[str, Any]:
+        return {
+            "transport": "grpc" if self.use_grpc else "http",
+            "pool_maxsize": self.pool_maxsize,
+            "cached_indexes": len(self._indexes),
+            "handle_hits": self._hits,
+            "handle_misses": self._misses,
+        }
+
+    def _open_index(self, name: str):
+        pinecone, PineconeClient = _pinecone_sdk()
         if PineconeClient is not None:
             if not self.api_key:
                 raise RuntimeError("Pinecone API key must be configured")
-            client = PineconeClient(api_key=self.api_key)
-            return client.Index(self.index_name)
+            client = self._get_client(PineconeClient)
+            index_kwargs: Dict[str, Any] = {}
+            if self.index_host and name == self.index_name:
+                # A known host skips the describe_index round-trip.
+                index_kwargs["host"] = self.index_host
+            if self.pool_threads and not self.use_grpc:
+                index_kwargs["pool_threads"] = self.pool_threads
+            return client.Index(name, **index_kwargs)
 
         if not pinecone:
             raise RuntimeError("pinecone package is required to use RagService")
         if not self.environment:
             raise RuntimeError("Pinecone environment must be configured for legacy SDK usage")
-        pinecone.init(api_key=self.api_key, environment=self.environment)
-        return pinecone.Index(self.index_name)
+        if self._client is None:
+            pinecone.init(api_key=self.api_key, environment=self.environment)
+            self._client = pinecone
+        return pinecone.Index(name)
+
+    def _get_client(self, PineconeClient):
+        if self._client is not None:
+            return self._client
+        client_class = PineconeClient
+        if self.use_grpc:
+            client_class = _grpc_client_class()
+            if client_class is None:
+                raise RuntimeError("pinecone[grpc] extra is required for gRPC transport")
+        options: Dict[str, Any] = {"connection_pool_maxsize": self.pool_maxsize}
+        if self.timeout_s is not None:
+            options["timeout"] = self.timeout_s
+        try:
+            self._client = client_class(api_key=self.api_key, **options)
+        except TypeError:
+            # Older SDKs take pool sizing on the index handle rather than the client.
+            self._client = client_class(api_key=self.api_key)
+        return self._client
+
+
+def match_to_dict(match: Any) -> Dict[str, Any]:
+    """A query match as a plain dict; SDK ``ScoredVector`` objects are converted with ``to_dict``."""
+
+    if isinstance(match, dict):
+        return dict(match)
+    to_dict = getattr(match, "to_dict", None)
+    return to_dict() if callable(to_dict) else dict(match)
 
 
 class PineconeIndexProtocol:
@@ -45,3 +146,33 @@ class PineconeIndexProtocol:
 
     def upsert(self, vectors: List, namespace: str | None = None):  # pragma: no cover
         raise NotImplementedError
+
+
+class AsyncPineconeIndexProtocol:
+    """Awaitable counterpart of :class:`PineconeIndexProtocol`."""
+
+    async def query(self, *args, **kwargs) -> Dict:  # pragma: no cover - interface only
+        raise NotImplementedError
+
+    async def upsert(self, vectors: List, namespace: str | None = None):  # pragma: no cover
+        raise NotImplementedError
+
+
+class ThreadedAsyncIndex(AsyncPineconeIndexProtocol):
+    """Adapts a blocking index to the async protocol by offloading calls to the I/O pool."""
+
+    def __init__(self, index: PineconeIndexProtocol) -> None:
+        self._index = index
+
+    @property
+    def sync_index(self) -> PineconeIndexProtocol:
+        return self._index
+
+    async def query(self, *args, **kwargs) -> Dict:
+        return await run_blocking(self._index.query, *args, **kwargs)
+
+    async def upsert(self, vectors: List, namespace: str | None = None) -> Any:
+        return await run_blocking(self._index.upsert, vectors=vectors, namespace=namespace)
+
+    async def describe_index_stats(self, **kwargs) -> Dict:
+        return await run_blocking(self._index.describe_index_stats, **kwargs)
@@ -1,7 +1,7 @@
 ﻿from __future__ import annotations
 
 from functools import lru_cache
-from typing import List
+from typing import List, Optional
 
 from pydantic import AliasChoices, Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -12,8 +12,18 @@ class Settings(BaseSettings):
 
     app_name: str = Field(default="Conversational Sales Agent")
     debug: bool = Field(default=False)
+    # Skip orchestrator warm-up so SDKs load on the first request that needs them.
+    fast_startup: bool = Field(default=False)
 
-    # Vector DB
+    # Vector DB: "pinecone" or "local" (in-process index under local_index_path)
+    vector_backend: str = Field(default="pinecone")
+    local_index_path: str = Field(default="data/vector_index")
+    local_index_ivf_min_vectors: int = Field(default=50_000)
+    local_index_nprobe: int = Field(default=8)
+    # Storage for new local index segments: "float32" or "float16".
+    local_index_dtype: str = Field(default="float32")
+    # Rewrite a segment once replaced/deleted rows reach this share of it (0 disables).
+    local_index_compact_dead_ratio: float = Field(default=0.5)
     pinecone_api_key: str = Field(default="")
     pinecone_environment: str = Field(default="")
     pinecone_index: str = Field(default="")
@@ -22,11 +32,31 @@ class Settings(BaseSettings):
     pinecone_cloud: str = Field(default="")
     pinecone_region: str = Field(default="")
     pinecone_pod_type: str = Field(default="")
+    pinecone_index_host: str = Field(default="")
+    pinecone_pool_maxsize: int = Field(default=64)
+    pinecone_pool_threads: Optional[int] = Field(default=None)
+    pinecone_timeout_s: Optional[float] = Field(default=None)
+    pinecone_use_grpc: bool = Field(default=False)
 
     # MongoDB
     mongo_uri: str = Field(default="mongodb://localhost:27017")
     mongo_database: str = Field(default="sales_agent")
     leads_collection: str = Field(default="leads")
+    mongo_max_pool_size: int = Field(default=100)
+    mongo_min_pool_size: int = Field(default=0)
+    mongo_max_idle_time_ms: Optional[int] = Field(default=None)
+    mongo_connect_timeout_ms: int = Field(default=5_000)
+    mongo_server_selection_timeout_ms: int = Field(default=5_000)
+    mongo_socket_timeout_ms: Optional[int] = Field(default=None)
+    mongo_wait_queue_timeout_ms: Optional[int] = Field(default=None)
+
+    # Conversation sessions
+    session_backend: str = Field(default="memory")  # "memory" or "mongo"
+    sessions_collection: str = Field(default="sessions")
+    session_ttl_seconds: float = Field(default=1800.0)
+    session_max_entries: int = Field(default=10_000)
+    session_max_bytes: int = Field(default=64 * 1024 * 1024)
+    session_max_history: int = Field(default=50)
 
     # Google Calendar
     google_service_account_file: str = Field(
@@ -45,6 +75,53 @@ class Settings(BaseSettings):
         default="text-embedding-004",
         validation_alias=AliasChoices("GEMINI_EMBED_MODEL", "GEMINI_EMBEDDING_MODEL"),
     )
+    # Texts per embed_content request (Gemini allows 100) and chunks ingestion embeds per call.
+    embedding_max_batch_size: int = Field(default=100)
+    ingestion_embed_batch_size: int = Field(default=400)
+    # Vectors per Pinecone upsert request while ingestion streams batches.
+    ingestion_upsert_batch_size: int = Field(default=100)
+    # Gemini request budget: concurrent batch requests, requests per minute (0 = unlimited),
+    # retries on throttling/timeouts/5xx, and the per-request timeout.
+    embedding_max_concurrency: int = Field(default=4)
+    embedding_requests_per_minute: float = Field(default=1500.0)
+    embedding_max_retries: int = Field(default=4)
+    embedding_timeout_s: float = Field(default=30.0)
+    # On-disk vectors of previously ingested chunk texts; an empty path disables the store.
+    embedding_store_path: str = Field(default="data/embedding_store.sqlite3")
+    embedding_store_max_bytes: int = Field(default=512 * 1024 * 1024)
+    # Vector precision for the embedding store and cache: "float32", "float16" or "int8".
+    # Stored vectors are re-upserted on refreshes, so the store keeps full precision by default.
+    embedding_store_dtype: str = Field(default="float32")
+    # Query-embedding cache; max entries of 0 disables it.
+    embedding_cache_max_entries: int = Field(default=50_000)
+    embedding_cache_max_bytes: int = Field(default=64 * 1024 * 1024)
+    embedding_cache_ttl_seconds: float = Field(default=3600.0)
+    embedding_cache_dtype: str = Field(default="float16")
+    # Retrieval result cache, invalidated per tenant namespace by ingestion; 0 disables it.
+    retrieval_cache_max_entries: int = Field(default=10_000)
+    retrieval_cache_ttl_seconds: float = Field(default=300.0)
+    # Also search the shared legacy namespace (by org/branch filter) while vectors are migrated.
+    rag_legacy_fallback: bool = Field(default=False)
+    rag_top_k: int = Field(default=5)
+    # Org-wide retrieval: concurrent branch queries and the time each one gets.
+    rag_fanout_concurrency: int = Field(default=8)
+    rag_fanout_shard_timeout_s: float = Field(default=1.5)
+    # Context packing: token budget for retrieved snippets (0 disables) and MMR relevance weight.
+    context_token_budget: int = Field(default=1024)
+    context_mmr_lambda: float = Field(default=0.7)
+    # Semantic answer cache for paraphrased questions; max entries of 0 disables it.
+    semantic_cache_threshold: float = Field(default=0.95)
+    semantic_cache_max_entries_per_tenant: int = Field(default=512)
+    semantic_cache_max_bytes: int = Field(default=32 * 1024 * 1024)
+    semantic_cache_dtype: str = Field(default="float16")  # "float32" or "float16"
+    # In-process BM25 index fused with vector results; filled by ingestion in this process.
+    lexical_index_enabled: bool = Field(default=True)
+    # Start retrieval while an async intent classifier runs; unused results are cancelled.
+    speculative_retrieval: bool = Field(default=False)
+
+    # Concurrency
+    io_thread_pool_size: int = Field(default=64)
+
     allowed_origins: List[str] = Field(
         default_factory=list,
         validation_alias="ALLOWED_ORIGINS",
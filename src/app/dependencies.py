@@ -1,39 +1,108 @@
 from __future__ import annotations
 
+import logging
+from dataclasses import asdict
 from functools import lru_cache
 
-from fastapi import Depends
-
-from src.app.config import Settings, get_settings
+from src.app.config import get_settings
 from src.adapters.calendar_client import CalendarClient
 from src.adapters.email_client import EmailClient
+from src.adapters.local_index import LocalVectorIndex
 from src.adapters.mongo_client import MongoClientFactory
-from src.adapters.pinecone_client import PineconeClientFactory
+from src.adapters.pinecone_client import (
+    AsyncPineconeIndexProtocol,
+    PineconeClientFactory,
+    PineconeIndexProtocol,
+    ThreadedAsyncIndex,
+)
 from src.ingestion.pipeline import IngestionPipeline
 from src.orchestrator.graph import AgentOrchestrator
+from src.orchestrator.session import MongoSessionBackend, SessionStore
 from src.services.calendar import CalendarService
-from src.services.embeddings_fallback import DeterministicEmbedding
+from src.services.context_packing import ContextPacker
+from src.services.embedding_cache import CachingEmbedder
+from src.services.embedding_store import EmbeddingStore
+from src.services.embeddings_fallback import HashingEmbedding
 from src.services.intent_rules import RuleBasedIntentClassifier
 from src.services.lead import LeadService
+from src.services.lexical import LexicalIndex
 from src.services.rag import RagService
+from src.services.retrieval_cache import NamespaceVersions, RetrievalCache
+from src.services.semantic_cache import SemanticCache
+from src.utils.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
 
 
 @lru_cache(maxsize=1)
 def get_mongo_factory() -> MongoClientFactory:
     settings = get_settings()
-    return MongoClientFactory(settings.mongo_uri, settings.mongo_database)
+    return MongoClientFactory(
+        settings.mongo_uri,
+        settings.mongo_database,
+        max_pool_size=settings.mongo_max_pool_size,
+        min_pool_size=settings.mongo_min_pool_size,
+        max_idle_time_ms=settings.mongo_max_idle_time_ms,
+        connect_timeout_ms=settings.mongo_connect_timeout_ms,
+        server_selection_timeout_ms=settings.mongo_server_selection_timeout_ms,
+        socket_timeout_ms=settings.mongo_socket_timeout_ms,
+        wait_queue_timeout_ms=settings.mongo_wait_queue_timeout_ms,
+    )
 
 
 @lru_cache(maxsize=1)
 def get_pinecone_factory() -> PineconeClientFactory:
     settings = get_settings()
-    return PineconeClientFactory(
+    factory = PineconeClientFactory(
         api_key=settings.pinecone_api_key,
         environment=settings.pinecone_environment,
         index_name=settings.pinecone_index,
+        index_host=settings.pinecone_index_host,
+        pool_maxsize=settings.pinecone_pool_maxsize,
+        pool_threads=settings.pinecone_pool_threads,
+        timeout_s=settings.pinecone_timeout_s,
+        use_grpc=settings.pinecone_use_grpc,
+    )
+    REGISTRY.gauge(
+        "agent_pinecone_pool",
+        "Pinecone client pool configuration and index handle cache statistics.",
+        ("stat",),
+        lambda: {
+            (name,): value
+            for name, value in factory.pool_stats().items()
+            if isinstance(value, (int, float))
+        },
+    )
+    return factory
+
+
+@lru_cache(maxsize=1)
+def get_local_index() -> LocalVectorIndex:
+    settings = get_settings()
+    return LocalVectorIndex(
+        settings.local_index_path,
+        metric=settings.pinecone_metric or "cosine",
+        ivf_min_vectors=settings.local_index_ivf_min_vectors,
+        nprobe=settings.local_index_nprobe,
+        vector_dtype=settings.local_index_dtype,
+        compact_dead_ratio=settings.local_index_compact_dead_ratio,
     )
 
 
+@lru_cache(maxsize=1)
+def get_vector_index() -> PineconeIndexProtocol:
+    if get_settings().vector_backend == "local":
+        return get_local_index()
+    return get_pinecone_factory().get_index()
+
+
+@lru_cache(maxsize=1)
+def get_async_vector_index() -> AsyncPineconeIndexProtocol:
+    if get_settings().vector_backend == "local":
+        return ThreadedAsyncIndex(get_local_index())
+    return get_pinecone_factory().get_async_index()
+
+
 @lru_cache(maxsize=1)
 def get_email_client() -> EmailClient:
     settings = get_settings()
@@ -50,61 +119,239 @@ def get_calendar_client() -> CalendarClient:
 
 
 @lru_cache(maxsize=1)
-def get_embedder():
+def get_base_embedder():
+    """Gemini (or local hashing) embedder without the query cache; ingestion uses it directly."""
+
     settings = get_settings()
     if settings.gemini_api_key:
         try:
             from src.services.embeddings import EmbeddingService
 
-            return EmbeddingService(settings.gemini_embedding_model, settings.gemini_api_key)
+            service = EmbeddingService(
+                settings.gemini_embedding_model,
+                settings.gemini_api_key,
+                max_batch_size=settings.embedding_max_batch_size,
+                max_concurrency=settings.embedding_max_concurrency,
+                requests_per_minute=settings.embedding_requests_per_minute,
+                max_retries=settings.embedding_max_retries,
+                timeout_s=settings.embedding_timeout_s,
+            )
         except RuntimeError:
             pass
-    return DeterministicEmbedding()
+        else:
+            REGISTRY.gauge(
+                "agent_embedding_client",
+                "Gemini embedding client queue depth, request counts and latency.",
+                ("stat",),
+                lambda: {(name,): value for name, value in asdict(service.stats()).items()},
+            )
+            return service
+    return HashingEmbedding(dimension=settings.pinecone_dimension)
+
 
+@lru_cache(maxsize=1)
+def get_embedder():
+    """Embedder for retrieval queries, behind the query-embedding cache."""
 
-def get_lead_service(
-    settings: Settings = Depends(get_settings),
-    mongo_factory: MongoClientFactory = Depends(get_mongo_factory),
-    email_client: EmailClient = Depends(get_email_client),
-) -> LeadService:
+    settings = get_settings()
+    embedder = get_base_embedder()
+    if settings.embedding_cache_max_entries <= 0:
+        return embedder
+    cache = CachingEmbedder(
+        embedder,
+        ttl_seconds=settings.embedding_cache_ttl_seconds,
+        max_entries=settings.embedding_cache_max_entries,
+        max_bytes=settings.embedding_cache_max_bytes,
+        vector_dtype=settings.embedding_cache_dtype,
+    )
+    REGISTRY.gauge(
+        "agent_embedding_cache",
+        "Query-embedding cache statistics.",
+        ("stat",),
+        lambda: {(name,): value for name, value in asdict(cache.stats()).items()},
+    )
+    return cache
+
+
+@lru_cache(maxsize=1)
+def get_lead_service() -> LeadService:
+    settings = get_settings()
+    mongo_factory = get_mongo_factory()
     return LeadService(
         collection=mongo_factory.get_collection(settings.leads_collection),
-        email_client=email_client,
+        email_client=get_email_client(),
+        async_collection=mongo_factory.get_async_collection(settings.leads_collection),
+    )
+
+
+@lru_cache(maxsize=1)
+def get_namespace_versions() -> NamespaceVersions:
+    return NamespaceVersions()
+
+
+@lru_cache(maxsize=1)
+def get_retrieval_cache() -> RetrievalCache | None:
+    settings = get_settings()
+    if settings.retrieval_cache_max_entries <= 0:
+        return None
+    cache = RetrievalCache(
+        versions=get_namespace_versions(),
+        ttl_seconds=settings.retrieval_cache_ttl_seconds,
+        max_entries=settings.retrieval_cache_max_entries,
+    )
+    REGISTRY.gauge(
+        "agent_retrieval_cache",
+        "Retrieval result cache statistics.",
+        ("stat",),
+        lambda: {(name,): value for name, value in asdict(cache.stats()).items()},
     )
+    return cache
 
 
-def get_rag_service(
-    pinecone_factory: PineconeClientFactory = Depends(get_pinecone_factory),
-    embedder = Depends(get_embedder),
-) -> RagService:
-    return RagService(pinecone_index=pinecone_factory.get_index(), embedder=embedder)
+@lru_cache(maxsize=1)
+def get_semantic_cache() -> SemanticCache | None:
+    settings = get_settings()
+    if settings.semantic_cache_max_entries_per_tenant <= 0:
+        return None
+    cache = SemanticCache(
+        versions=get_namespace_versions(),
+        threshold=settings.semantic_cache_threshold,
+        max_entries_per_tenant=settings.semantic_cache_max_entries_per_tenant,
+        max_bytes=settings.semantic_cache_max_bytes,
+        vector_dtype=settings.semantic_cache_dtype,
+    )
+    REGISTRY.gauge(
+        "agent_semantic_cache",
+        "Semantic answer cache statistics.",
+        ("stat",),
+        lambda: {(name,): value for name, value in asdict(cache.stats()).items()},
+    )
+    return cache
+
+
+@lru_cache(maxsize=1)
+def get_lexical_index() -> LexicalIndex | None:
+    if not get_settings().lexical_index_enabled:
+        return None
+    index = LexicalIndex()
+    REGISTRY.gauge(
+        "agent_lexical_index",
+        "BM25 lexical index size.",
+        ("stat",),
+        lambda: {(name,): value for name, value in asdict(index.stats()).items()},
+    )
+    return index
+
+
+@lru_cache(maxsize=1)
+def get_rag_service() -> RagService:
+    settings = get_settings()
+    return RagService(
+        pinecone_index=get_vector_index(),
+        embedder=get_embedder(),
+        async_index=get_async_vector_index(),
+        cache=get_retrieval_cache(),
+        top_k=settings.rag_top_k,
+        legacy_fallback=settings.rag_legacy_fallback,
+        lexical_index=get_lexical_index(),
+        packer=(
+            ContextPacker(token_budget=settings.context_token_budget, mmr_lambda=settings.context_mmr_lambda)
+            if settings.context_token_budget > 0
+            else None
+        ),
+        semantic_cache=get_semantic_cache(),
+        fanout_concurrency=settings.rag_fanout_concurrency,
+        shard_timeout_s=settings.rag_fanout_shard_timeout_s,
+    )
+
+
+@lru_cache(maxsize=1)
+def get_embedding_store() -> EmbeddingStore | None:
+    settings = get_settings()
+    if not settings.embedding_store_path:
+        return None
+    store = EmbeddingStore(
+        settings.embedding_store_path,
+        max_bytes=settings.embedding_store_max_bytes,
+        vector_dtype=settings.embedding_store_dtype,
+    )
+    REGISTRY.gauge(
+        "agent_embedding_store",
+        "Persistent ingestion embedding store statistics.",
+        ("stat",),
+        lambda: {(name,): value for name, value in asdict(store.stats()).items()},
+    )
+    return store
 
 
-def get_ingestion_pipeline(
-    pinecone_factory: PineconeClientFactory = Depends(get_pinecone_factory),
-    embedder = Depends(get_embedder),
-) -> IngestionPipeline:
+@lru_cache(maxsize=1)
+def get_ingestion_pipeline() -> IngestionPipeline:
     return IngestionPipeline(
-        pinecone_index=pinecone_factory.get_index(),
-        embedder=embedder,
+        pinecone_index=get_vector_index(),
+        embedder=get_base_embedder(),
+        versions=get_namespace_versions(),
+        lexical_index=get_lexical_index(),
+        embed_batch_size=get_settings().ingestion_embed_batch_size,
+        upsert_batch_size=get_settings().ingestion_upsert_batch_size,
+        embedding_store=get_embedding_store(),
     )
 
 
-def get_calendar_service(
-    calendar_client: CalendarClient = Depends(get_calendar_client),
-) -> CalendarService:
-    return CalendarService(calendar_client=calendar_client)
+@lru_cache(maxsize=1)
+def get_calendar_service() -> CalendarService:
+    return CalendarService(calendar_client=get_calendar_client())
+
+
+@lru_cache(maxsize=1)
+def get_session_store() -> SessionStore:
+    settings = get_settings()
+    backend = None
+    if settings.session_backend == "mongo":
+        backend = MongoSessionBackend(get_mongo_factory().get_collection(settings.sessions_collection))
+    store = SessionStore(
+        ttl_seconds=settings.session_ttl_seconds,
+        max_entries=settings.session_max_entries,
+        max_bytes=settings.session_max_bytes,
+        max_history=settings.session_max_history,
+        backend=backend,
+    )
+    REGISTRY.gauge(
+        "agent_session_store",
+        "Session store cache statistics.",
+        ("stat",),
+        lambda: {(name,): value for name, value in asdict(store.stats()).items()},
+    )
+    return store
+
 
+@lru_cache(maxsize=1)
+def get_orchestrator() -> AgentOrchestrator:
+    """Process-lifetime orchestrator; the compiled graph and services are shared by all requests."""
 
-def get_orchestrator(
-    rag_service: RagService = Depends(get_rag_service),
-    lead_service: LeadService = Depends(get_lead_service),
-    calendar_service: CalendarService = Depends(get_calendar_service),
-) -> AgentOrchestrator:
     classifier = RuleBasedIntentClassifier()
     return AgentOrchestrator(
-        rag_service=rag_service,
-        lead_service=lead_service,
-        calendar_service=calendar_service,
+        rag_service=get_rag_service(),
+        lead_service=get_lead_service(),
+        calendar_service=get_calendar_service(),
         intent_classifier=classifier.classify,
-    )
\ No newline at end of file
+        session_store=get_session_store(),
+        speculative_retrieval=get_settings().speculative_retrieval,
+    )
+
+
+def warm_up() -> None:
+    """Build the shared orchestrator ahead of the first request."""
+
+    try:
+        get_orchestrator()
+    except RuntimeError:
+        # Missing credentials should not keep the API from starting; the first
+        # chat request retries and surfaces the error.
+        logger.warning("Orchestrator warm-up skipped", exc_info=True)
+
+
+async def shutdown() -> None:
+    """Release pooled connections held by the process-wide clients."""
+
+    if get_mongo_factory.cache_info().currsize:
+        await get_mongo_factory().aclose()
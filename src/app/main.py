@@ -1,13 +1,29 @@
 ﻿from __future__ import annotations
 
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
 from fastapi import FastAPI
 
 from src.app.config import get_settings
+from src.app.dependencies import shutdown, warm_up
 from src.app.routes import router
+from src.utils.aio import configure_io_executor, shutdown_io_executor
 from src.utils.logging import configure_logging
 
 settings = get_settings()
 configure_logging()
 
-app = FastAPI(title=settings.app_name, debug=settings.debug)
+
+@asynccontextmanager
+async def lifespan(_: FastAPI) -> AsyncIterator[None]:
+    configure_io_executor(settings.io_thread_pool_size)
+    if not settings.fast_startup:
+        warm_up()
+    yield
+    await shutdown()
+    shutdown_io_executor()
+
+
+app = FastAPI(title=settings.app_name, debug=settings.debug, lifespan=lifespan)
 app.include_router(router)
\ No newline at end of file
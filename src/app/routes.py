@@ -1,45 +1,79 @@
 ﻿from __future__ import annotations
 
 from fastapi import APIRouter, Depends, status
+from fastapi.responses import Response, StreamingResponse
 
 from src.app.config import Settings
 from src.app.dependencies import get_ingestion_pipeline, get_orchestrator, get_settings
+from src.app.streaming import chat_event_stream
 from src.ingestion.pipeline import IngestionPipeline
+from src.orchestrator.graph import AgentOrchestrator
 from src.orchestrator.intents import Intent
 from src.orchestrator.state import ConversationState
 from src.schemas.chat import ChatRequest, ChatResponse
 from src.schemas.ingestion import IngestionRequest, IngestionStatus
+from src.utils.metrics import PROMETHEUS_CONTENT_TYPE, REGISTRY
 
 router = APIRouter()
 
 
 @router.get("/health", status_code=status.HTTP_200_OK)
-def health(settings: Settings = Depends(get_settings)) -> dict:
+async def health(settings: Settings = Depends(get_settings)) -> dict:
     return {"app": settings.app_name, "status": "ok"}
 
 
-@router.post("/api/v1/chat", response_model=ChatResponse)
-def chat(
-    payload: ChatRequest,
-    orchestrator = Depends(get_orchestrator),
-) -> ChatResponse:
-    context_dict = payload.context.dict()
-    state = ConversationState(
+@router.get("/metrics", include_in_schema=False)
+async def metrics() -> Response:
+    return Response(content=REGISTRY.render(), media_type=PROMETHEUS_CONTENT_TYPE)
+
+
+def _initial_state(payload: ChatRequest) -> ConversationState:
+    return ConversationState(
         intent=Intent.RAG_INFO,
         user_query=payload.message.content,
-        context=context_dict,
+        context=payload.context.dict(),
         history=[message.dict() for message in payload.history],
     )
-    final_state = orchestrator.run(state)
+
+
+def _chat_response(orchestrator: AgentOrchestrator, final_state: ConversationState) -> ChatResponse:
     reply = final_state.history[-1]["content"] if final_state.history else ""
     return ChatResponse(
         reply=reply,
         intent=final_state.intent.value,
-        lead_captured=orchestrator.lead_is_complete(final_state.lead_data),
+        lead_captured=orchestrator.lead_is_complete(final_state.lead_data, final_state.context),
         appointment_id=final_state.appointment_id,
     )
 
 
+@router.post("/api/v1/chat", response_model=ChatResponse)
+async def chat(
+    payload: ChatRequest,
+    orchestrator: AgentOrchestrator = Depends(get_orchestrator),
+) -> ChatResponse:
+    final_state = await orchestrator.arun(_initial_state(payload))
+    return _chat_response(orchestrator, final_state)
+
+
+@router.post("/api/v1/chat/stream")
+async def chat_stream(
+    payload: ChatRequest,
+    orchestrator: AgentOrchestrator = Depends(get_orchestrator),
+) -> StreamingResponse:
+    """Server-Sent Events variant of ``/api/v1/chat``; the last event carries the ``ChatResponse``."""
+
+    events = chat_event_stream(
+        orchestrator,
+        _initial_state(payload),
+        build_response=lambda final_state: _chat_response(orchestrator, final_state),
+    )
+    return StreamingResponse(
+        events,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @router.post("/api/v1/ingest", response_model=IngestionStatus)
 def ingest(
     payload: IngestionRequest,
@@ -47,7 +81,7 @@ def ingest(
 ) -> IngestionStatus:
     status_payload = pipeline.run(
         context=payload.context.dict(),
-        documents=[doc.dict() for doc in payload.documents],
+        documents=(doc.dict() for doc in payload.documents),
     )
     return IngestionStatus(
         processed=status_payload.get("processed", 0),
@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+import json
+import logging
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+
+from src.orchestrator.graph import AgentOrchestrator
+from src.orchestrator.state import ConversationState
+from src.schemas.chat import ChatResponse
+
+logger = logging.getLogger(__name__)
+
+
+def format_sse(event: str, data: Dict[str, Any]) -> str:
+    payload = json.dumps(data, separators=(",", ":"), default=str)
+    return f"event: {event}\ndata: {payload}\n\n"
+
+
+def _new_messages(previous: ConversationState, current: ConversationState) -> List[Dict[str, str]]:
+    return current.history[len(previous.history):]
+
+
+def _intent_event(previous: ConversationState, current: ConversationState) -> Optional[Dict[str, Any]]:
+    return {"intent": current.intent.value}
+
+
+def _retrieval_event(previous: ConversationState, current: ConversationState) -> Optional[Dict[str, Any]]:
+    replies = [message["content"] for message in _new_messages(previous, current) if message["role"] == "assistant"]
+    return {"snippets": current.retrieved, "reply": replies[-1] if replies else ""}
+
+
+def _lead_saved_event(previous: ConversationState, current: ConversationState) -> Optional[Dict[str, Any]]:
+    messages = _new_messages(previous, current)
+    if not messages:
+        return None
+    return {"message": messages[-1]["content"], "lead_data": current.lead_data}
+
+
+def _booking_event(previous: ConversationState, current: ConversationState) -> Optional[Dict[str, Any]]:
+    messages = _new_messages(previous, current)
+    return {
+        "appointment_id": current.appointment_id,
+        "message": messages[-1]["content"] if messages else "",
+    }
+
+
+# Graph node -> (SSE event name, payload builder). Builders returning None suppress the event.
+NODE_EVENTS: Dict[str, tuple[str, Callable[[ConversationState, ConversationState], Optional[Dict[str, Any]]]]] = {
+    "intent_classifier": ("intent", _intent_event),
+    "rag_chain": ("retrieval", _retrieval_event),
+    "lead_saver": ("lead_saved", _lead_saved_event),
+    "booking": ("booking", _booking_event),
+}
+
+
+async def chat_event_stream(
+    orchestrator: AgentOrchestrator,
+    state: ConversationState,
+    build_response: Callable[[ConversationState], ChatResponse],
+) -> AsyncIterator[str]:
+    """Emit one SSE event per finished graph node, then the final ``ChatResponse``."""
+
+    current = state
+    try:
+        async for node_name, node_state in orchestrator.astream(state):
+            event = NODE_EVENTS.get(node_name)
+            if event is not None:
+                event_name, builder = event
+                data = builder(current, node_state)
+                if data is not None:
+                    yield format_sse(event_name, data)
+            current = node_state
+    except Exception:
+        logger.exception("Chat stream failed", extra={"context": state.context})
+        yield format_sse("error", {"detail": "Chat processing failed"})
+        return
+    yield format_sse("response", build_response(current).model_dump())
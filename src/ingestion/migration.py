@@ -0,0 +1,140 @@
+"""Move vectors stored in the shared legacy namespace into per-tenant namespaces.
+
+Older ingestions kept every tenant in one namespace and told them apart by ``org_id`` /
+``branch_id`` metadata. Retrieval now reads only ``tenant_namespace(context)``, so those vectors
+have to be copied across once (``RAG_LEGACY_FALLBACK=true`` keeps them searchable meanwhile)::
+
+    python -m src.ingestion.migration --dry-run
+    python -m src.ingestion.migration --org-id acme --delete-source
+
+The CLI runs in its own process, so it cannot invalidate a running server's retrieval cache:
+servers pick up the migrated vectors once cached results expire (``RETRIEVAL_CACHE_TTL_SECONDS``)
+or after a restart.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+from collections import defaultdict
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, Iterable, List, Optional
+
+from src.services.namespaces import LEGACY_NAMESPACE, tenant_namespace
+from src.services.retrieval_cache import NamespaceVersions
+from src.utils.metrics import observe_adapter
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class MigrationReport:
+    scanned: int = 0
+    skipped: int = 0
+    migrated: Dict[str, int] = field(default_factory=dict)
+    deleted: int = 0
+
+
+def _field(record: Any, name: str) -> Any:
+    if isinstance(record, dict):
+        return record.get(name)
+    return getattr(record, name, None)
+
+
+def _fetched_vectors(response: Any) -> Dict[str, Any]:
+    return _field(response, "vectors") or {}
+
+
+def _id_pages(index: Any, namespace: str, batch_size: int) -> Iterable[List[str]]:
+    lister = getattr(index, "list", None)
+    if not callable(lister):
+        raise RuntimeError("Migration needs an index that supports list() (serverless Pinecone or the local index)")
+    # Collect the ids up front so upserts and deletes do not disturb pagination.
+    ids = [record_id for page in lister(namespace=namespace) for record_id in page]
+    for start in range(0, len(ids), batch_size):
+        yield ids[start:start + batch_size]
+
+
+def migrate_legacy_vectors(
+    index: Any,
+    *,
+    source_namespace: str = LEGACY_NAMESPACE,
+    org_id: Optional[str] = None,
+    branch_id: Optional[str] = None,
+    batch_size: int = 100,
+    delete_source: bool = False,
+    dry_run: bool = False,
+    versions: Optional[NamespaceVersions] = None,
+) -> MigrationReport:
+    """Copy each vector to the namespace its metadata resolves to, optionally limited to a tenant.
+
+    Upserts are idempotent, so an interrupted run can simply be repeated. Source vectors are only
+    deleted after their batch has been written to the tenant namespaces.
+    """
+
+    report = MigrationReport()
+    touched: Dict[str, Dict[str, str]] = {}
+    for page in _id_pages(index, source_namespace, batch_size):
+        with observe_adapter("pinecone", "fetch"):
+            fetched = _fetched_vectors(index.fetch(ids=page, namespace=source_namespace))
+        batches: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        moved: List[str] = []
+        for record_id, record in fetched.items():
+            report.scanned += 1
+            metadata = dict(_field(record, "metadata") or {})
+            if not metadata.get("org_id") or not metadata.get("branch_id"):
+                report.skipped += 1
+                continue
+            if (org_id and metadata["org_id"] != org_id) or (branch_id and metadata["branch_id"] != branch_id):
+                continue
+            context = {"org_id": metadata["org_id"], "branch_id": metadata["branch_id"]}
+            namespace = tenant_namespace(context)
+            touched[namespace] = context
+            batches[namespace].append({"id": record_id, "values": list(_field(record, "values")), "metadata": metadata})
+            moved.append(record_id)
+
+        for namespace, vectors in batches.items():
+            report.migrated[namespace] = report.migrated.get(namespace, 0) + len(vectors)
+            if not dry_run:
+                with observe_adapter("pinecone", "upsert"):
+                    index.upsert(vectors=vectors, namespace=namespace)
+        if delete_source and moved and not dry_run:
+            with observe_adapter("pinecone", "delete"):
+                index.delete(ids=moved, namespace=source_namespace)
+            report.deleted += len(moved)
+
+    if versions is not None and not dry_run:
+        for context in touched.values():
+            versions.bump(context)
+    logger.info("Legacy namespace migration finished", extra={"report": asdict(report)})
+    return report
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--org-id")
+    parser.add_argument("--branch-id")
+    parser.add_argument("--source-namespace", default=LEGACY_NAMESPACE)
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument("--delete-source", action="store_true", help="Remove migrated vectors from the source")
+    parser.add_argument("--dry-run", action="store_true", help="Only report what would be moved")
+    args = parser.parse_args(argv)
+
+    from src.app.dependencies import get_vector_index
+
+    report = migrate_legacy_vectors(
+        get_vector_index(),
+        source_namespace=args.source_namespace,
+        org_id=args.org_id,
+        branch_id=args.branch_id,
+        batch_size=args.batch_size,
+        delete_source=args.delete_source,
+        dry_run=args.dry_run,
+    )
+    print(json.dumps(asdict(report), indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
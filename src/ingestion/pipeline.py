@@ -1,13 +1,21 @@
 from __future__ import annotations
 
+import hashlib
 import logging
 import time
 import uuid
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Iterable, List, Protocol, Sequence, Tuple
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Protocol, Sequence, Set, Tuple
 
 from src.adapters.pinecone_client import PineconeIndexProtocol
 from src.ingestion.parsers import simple_chunk
+from src.services.embedding_store import EmbeddingStore
+from src.services.lexical import LexicalIndex
+from src.services.namespaces import tenant_namespace
+from src.services.retrieval_cache import NamespaceVersions
+from src.utils.metrics import observe_adapter
+from src.utils.vectors import CompactVector, as_float_list
 
 logger = logging.getLogger(__name__)
 
@@ -16,13 +24,60 @@ class EmbeddingProvider(Protocol):
     def embed(self, text: str) -> List[float]:
         ...
 
+    def embed_batch(self, texts: Sequence[str]) -> List[List[float]]:
+        ...
+
 
 VectorDict = dict
 VectorLegacy = Tuple[str, List[float], dict]
+PendingChunk = Tuple[int, dict]
+
+_CHUNK_ID_NAMESPACE = uuid.UUID("6f1d2f0e-3c1a-5b8e-9d7a-2f4c8b1e0a53")
+
+
+def document_key(source_path: Optional[str], text: str) -> str:
+    """Identity of a document: its ``source_path``, or a digest of the text when it has none."""
+
+    if source_path:
+        return f"path:{source_path}"
+    return f"text:{hashlib.sha256(text.encode('utf-8')).hexdigest()}"
+
+
+def chunk_id(namespace: str, document: str, position: int) -> str:
+    """Stable id for the ``position``-th chunk of ``document`` in ``namespace``.
+
+    Re-ingesting a file therefore overwrites its chunks in place; the vectors of chunks past the
+    end of a file that shrank are left behind.
+    """
+
+    return str(uuid.uuid5(_CHUNK_ID_NAMESPACE, f"{namespace}\x1f{document}\x1f{position}"))
+
+
+@dataclass
+class IngestionProgress:
+    """Running totals of one ``IngestionPipeline.run``, reported after every upserted batch."""
+
+    documents: int = 0
+    processed: int = 0
+    failed: int = 0
+    batches: int = 0
+    elapsed_s: float = 0.0
 
 
 class IngestionPipeline:
-    """Processes documents into Pinecone with tenant metadata."""
+    """Processes documents into Pinecone with tenant metadata.
+
+    ``run`` streams: documents are read and chunked lazily, and every ``embed_batch_size`` chunks
+    are embedded through one ``embed_batch`` call and upserted right away, ``upsert_batch_size``
+    vectors per request. Memory stays bounded by one batch whatever the request size, and the
+    batches written before a crash stay in the index. The provider splits each embedding batch
+    into API-sized requests. With an ``embedding_store``, chunks whose exact text was embedded
+    before by the same model reuse the stored vector, so a re-run only embeds what changed.
+    Vectors are held as float32 ``CompactVector`` buffers until they are handed to the index,
+    in the record format the first upsert found the SDK to accept. Chunk ids are derived from
+    the tenant namespace, the document and the chunk position (see ``chunk_id``), so re-running
+    a crashed or repeated ingestion overwrites the vectors it wrote instead of duplicating them.
+    """
 
     def __init__(
         self,
@@ -31,76 +86,167 @@ class IngestionPipeline:
         base_path: Path | None = None,
         chunk_size: int = 512,
         chunk_overlap: int = 50,
+        versions: Optional[NamespaceVersions] = None,
+        lexical_index: Optional[LexicalIndex] = None,
+        embed_batch_size: int = 256,
+        embedding_store: Optional[EmbeddingStore] = None,
+        upsert_batch_size: int = 100,
     ) -> None:
         self._index = pinecone_index
         self._embedder = embedder
         self._base_path = Path(base_path) if base_path else Path.cwd()
         self._chunk_size = chunk_size
         self._chunk_overlap = chunk_overlap
+        self._versions = versions
+        self._lexical_index = lexical_index
+        self._embed_batch_size = max(1, embed_batch_size)
+        self._upsert_batch_size = max(1, upsert_batch_size)
+        self._embedding_store = embedding_store
+        self._embedding_model = getattr(embedder, "model_name", type(embedder).__name__)
+        # "dict" or "tuple" once an upsert has shown which record format the SDK accepts.
+        self._vector_format: Optional[str] = None
+
+    def run(
+        self,
+        *,
+        context: dict,
+        documents: Iterable[dict],
+        progress: Optional[Callable[[IngestionProgress], None]] = None,
+    ) -> dict:
+        report = IngestionProgress()
+        failed_documents: Set[int] = set()
+        started = time.perf_counter()
+        namespace = self._build_namespace(context)
+        last_written: List[str] = []
+
+        try:
+            for batch in self._chunk_batches(documents, namespace, report, failed_documents):
+                vectors = self._embed_chunks(context, batch)
+                if vectors is None:
+                    failed_documents.update(ordinal for ordinal, _ in batch)
+                    report.failed = len(failed_documents)
+                else:
+                    last_written = self._store(namespace, vectors, context.get("org_id") or "")
+                    report.processed += len(vectors)
+                report.batches += 1
+                report.elapsed_s = time.perf_counter() - started
+                logger.info(
+                    "Ingestion batch %d: %d documents read, %d chunks upserted, %d failed",
+                    report.batches,
+                    report.documents,
+                    report.processed,
+                    report.failed,
+                    extra={"namespace": namespace},
+                )
+                if progress is not None:
+                    progress(report)
+            if last_written:
+                self._await_visible(namespace, last_written)
+        finally:
+            if last_written and self._versions is not None:
+                # Bumped once the new vectors are queryable, or after a run that stopped part way,
+                # so cached retrievals cannot outlive them.
+                self._versions.bump(context)
+        return {"processed": report.processed, "failed": report.failed}
 
-    def run(self, *, context: dict, documents: Iterable[dict]) -> dict:
-        processed = 0
-        failed = 0
-        vectors_modern: List[VectorDict] = []
-        vectors_legacy: List[VectorLegacy] = []
+    def _chunk_batches(
+        self,
+        documents: Iterable[dict],
+        namespace: str,
+        report: IngestionProgress,
+        failed_documents: Set[int],
+    ) -> Iterator[List[PendingChunk]]:
+        """Yield ``embed_batch_size`` chunks at a time, tagged with their document's ordinal."""
 
-        for document in documents:
+        pending: List[PendingChunk] = []
+        for ordinal, document in enumerate(documents):
+            report.documents += 1
+            chunks = 0
             try:
-                resolved_chunks = list(self._prepare_chunks(document))
-                if not resolved_chunks:
-                    logger.warning("No content extracted from document", extra={"document": document})
-                    continue
-
-                for chunk in resolved_chunks:
-                    text = chunk["text"]
-                    metadata = {
-                        "org_id": context.get("org_id"),
-                        "branch_id": context.get("branch_id"),
-                        "session_id": context.get("user_session_id"),
-                        "source_path": chunk.get("source_path"),
-                        "text": text,
-                    }
-                    values = self._embedder.embed(text)
-                    vectors_modern.append(
-                        {
-                            "id": chunk["chunk_id"],
-                            "values": values,
-                            "metadata": metadata,
-                        }
-                    )
-                    vectors_legacy.append((chunk["chunk_id"], values, metadata))
-                    processed += 1
+                for chunk in self._prepare_chunks(document, namespace):
+                    pending.append((ordinal, chunk))
+                    chunks += 1
+                    if len(pending) >= self._embed_batch_size:
+                        yield pending
+                        pending = []
             except Exception:  # pragma: no cover - defensive logging
                 logger.exception("Failed to ingest document", extra={"document": document})
-                failed += 1
+                failed_documents.add(ordinal)
+                report.failed = len(failed_documents)
+                continue
+            if not chunks:
+                logger.warning("No content extracted from document", extra={"document": document})
+        if pending:
+            yield pending
 
-        if not vectors_modern:
-            return {"processed": processed, "failed": failed}
+    def _embed_chunks(self, context: dict, batch: List[PendingChunk]) -> Optional[List[VectorDict]]:
+        """Vectors for one batch of chunks, or ``None`` if embedding it failed."""
 
-        namespace = self._build_namespace(context)
-        baseline_count = self._namespace_vector_count(namespace)
-        self._upsert(namespace, vectors_modern, vectors_legacy)
-        self._await_vector_count(namespace, baseline_count + len(vectors_modern))
-        return {"processed": processed, "failed": failed}
+        chunks = [chunk for _, chunk in batch]
+        try:
+            embeddings = self._embed_texts([chunk["text"] for chunk in chunks])
+        except Exception:  # pragma: no cover - defensive logging
+            logger.exception("Failed to embed chunks", extra={"chunks": len(chunks)})
+            return None
+        vectors: List[VectorDict] = []
+        for chunk, values in zip(chunks, embeddings):
+            metadata = {
+                "org_id": context.get("org_id"),
+                "branch_id": context.get("branch_id"),
+                "session_id": context.get("user_session_id"),
+                "source_path": chunk.get("source_path"),
+                "text": chunk["text"],
+            }
+            vectors.append({"id": chunk["chunk_id"], "values": values, "metadata": metadata})
+        return vectors
+
+    def _store(self, namespace: str, vectors: List[VectorDict], org_id: str = "") -> List[str]:
+        """Upsert ``vectors`` and index them lexically; returns the ids of the last upsert request."""
+
+        request: List[VectorDict] = []
+        for start in range(0, len(vectors), self._upsert_batch_size):
+            request = vectors[start:start + self._upsert_batch_size]
+            self._upsert(namespace, request, org_id)
+        if self._lexical_index is not None:
+            self._lexical_index.add(
+                namespace,
+                ((vector["id"], vector["metadata"]["text"], vector["metadata"]) for vector in vectors),
+            )
+        return [vector["id"] for vector in request]
 
-    def _prepare_chunks(self, document: dict) -> Iterable[dict]:
+    def _embed_texts(self, texts: List[str]) -> List[CompactVector]:
+        if self._embedding_store is None:
+            return [CompactVector.encode(values) for values in self._embedder.embed_batch(texts)]
+        embeddings = self._embedding_store.get_many(self._embedding_model, texts)
+        missing = [position for position, values in enumerate(embeddings) if values is None]
+        if missing:
+            missing_texts = [texts[position] for position in missing]
+            fresh = [CompactVector.encode(values) for values in self._embedder.embed_batch(missing_texts)]
+            self._embedding_store.put_many(self._embedding_model, missing_texts, fresh)
+            for position, values in zip(missing, fresh):
+                embeddings[position] = values
+        return embeddings  # type: ignore[return-value]
+
+    def _prepare_chunks(self, document: dict, namespace: str) -> Iterable[dict]:
         text = document.get("text")
         source_path = document.get("source_path") or document.get("source_file")
 
         if text:
-            yield from self._chunk_text(text=text, source_path=source_path)
+            yield from self._chunk_text(text=text, source_path=source_path, namespace=namespace)
             return
 
         if not source_path:
             raise ValueError("Document must provide either 'text' or 'source_path'.")
 
         file_content = self._load_file(source_path)
-        yield from self._chunk_text(text=file_content, source_path=source_path)
+        yield from self._chunk_text(text=file_content, source_path=source_path, namespace=namespace)
 
-    def _chunk_text(self, *, text: str, source_path: str | None) -> Iterable[dict]:
-        for chunk in simple_chunk(text, chunk_size=self._chunk_size, overlap=self._chunk_overlap):
+    def _chunk_text(self, *, text: str, source_path: str | None, namespace: str) -> Iterable[dict]:
+        document = document_key(source_path, text)
+        chunks = simple_chunk(text, chunk_size=self._chunk_size, overlap=self._chunk_overlap)
+        for position, chunk in enumerate(chunks):
             yield {
-                "chunk_id": str(uuid.uuid4()),
+                "chunk_id": chunk_id(namespace, document, position),
                 "text": chunk,
                 "source_path": source_path,
             }
@@ -113,51 +259,57 @@ class IngestionPipeline:
             raise FileNotFoundError(f"Source file not found: {source_path}")
         return candidate.read_text(encoding="utf-8")
 
-    def _upsert(
-        self,
-        namespace: str,
-        modern_vectors: Sequence[VectorDict],
-        legacy_vectors: Sequence[VectorLegacy],
-    ) -> None:
-        try:
-            self._index.upsert(vectors=list(modern_vectors), namespace=namespace)
+    def _upsert(self, namespace: str, vectors: Sequence[VectorDict], org_id: str = "") -> None:
+        # Float lists are built here, at the SDK boundary, and only in the format being sent.
+        if self._vector_format == "tuple":
+            self._send(namespace, self._legacy_payload(vectors), org_id)
             return
+        modern_vectors = [{**vector, "values": as_float_list(vector["values"])} for vector in vectors]
+        try:
+            self._send(namespace, modern_vectors, org_id)
         except TypeError:
-            pass
+            if self._vector_format == "dict":
+                raise
         except Exception as exc:
-            if not self._should_retry_with_legacy_format(exc):
+            if self._vector_format == "dict" or not self._should_retry_with_legacy_format(exc):
                 raise
-        self._index.upsert(vectors=list(legacy_vectors), namespace=namespace)
+        else:
+            self._vector_format = "dict"
+            return
+        self._send(namespace, self._legacy_payload(modern_vectors), org_id)
+        self._vector_format = "tuple"
+
+    def _send(self, namespace: str, vectors: Sequence[Any], org_id: str = "") -> None:
+        with observe_adapter("pinecone", "upsert", org_id):
+            self._index.upsert(vectors=vectors, namespace=namespace)
+
+    @staticmethod
+    def _legacy_payload(vectors: Sequence[VectorDict]) -> List[VectorLegacy]:
+        return [(vector["id"], as_float_list(vector["values"]), vector["metadata"]) for vector in vectors]
+
+    def _await_visible(self, namespace: str, ids: Sequence[str]) -> None:
+        """Wait up to 20 s until ``ids`` can be fetched, i.e. the last upsert is queryable.
+
+        Ids are deterministic, so an upsert may overwrite existing vectors and the namespace
+        vector count is no measure of progress.
+        """
 
-    def _await_vector_count(self, namespace: str, target_count: int) -> None:
-        describe = getattr(self._index, "describe_index_stats", None)
-        if not callable(describe):
+        fetch = getattr(self._index, "fetch", None)
+        if not callable(fetch):
             return
 
         deadline = time.time() + 20
         while time.time() < deadline:
             try:
-                stats = describe()
+                response = fetch(ids=list(ids), namespace=namespace)
             except Exception:
                 time.sleep(0.5)
                 continue
-            namespaces = stats.get("namespaces", {}) if isinstance(stats, dict) else {}
-            current = int(namespaces.get(namespace, {}).get("vector_count", 0))
-            if current >= target_count:
+            found = response.get("vectors") if isinstance(response, dict) else getattr(response, "vectors", None)
+            if found is not None and len(found) >= len(set(ids)):
                 return
             time.sleep(0.5)
 
-    def _namespace_vector_count(self, namespace: str) -> int:
-        describe = getattr(self._index, "describe_index_stats", None)
-        if not callable(describe):
-            return 0
-        try:
-            stats = describe()
-        except Exception:
-            return 0
-        namespaces = stats.get("namespaces", {}) if isinstance(stats, dict) else {}
-        return int(namespaces.get(namespace, {}).get("vector_count", 0))
-
     @staticmethod
     def _should_retry_with_legacy_format(exc: Exception) -> bool:
         message = str(exc)
@@ -170,6 +322,4 @@ class IngestionPipeline:
 
     @staticmethod
     def _build_namespace(context: dict) -> str:
-        org_id = context.get("org_id", "default_org")
-        branch_id = context.get("branch_id", "default_branch")
-        return f"{org_id}::{branch_id}"
+        return tenant_namespace(context)
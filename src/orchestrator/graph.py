@@ -1,40 +1,179 @@
 ﻿from __future__ import annotations
 
-from typing import Callable, Dict
-
-from langgraph.graph import END, StateGraph
+import asyncio
+import threading
+import time
+from dataclasses import dataclass, replace
+from typing import TYPE_CHECKING, Any, AsyncIterator, Awaitable, Callable, Dict, Mapping, Optional, Tuple
 
 from src.orchestrator.intents import Intent
+from src.orchestrator.session import SessionStore
 from src.orchestrator.state import ConversationState
 from src.services.calendar import CalendarService
 from src.services.lead import LeadService
-from src.services.rag import RagService
+from src.services.rag import RagService, RetrievalResult
+from src.utils.metrics import CHAT_TURNS, GRAPH_NODE_SECONDS, SPECULATIVE_RETRIEVALS, SPECULATIVE_WASTED_SECONDS
+
+if TYPE_CHECKING:  # pragma: no cover - LangGraph is imported when the graph is built
+    from langchain_core.runnables import RunnableConfig
+    from langgraph.graph import StateGraph
+
+
+TenantKey = Tuple[str, Optional[str]]
+IntentClassifierFn = Callable[[ConversationState], Intent]
+AsyncIntentClassifierFn = Callable[[ConversationState], Awaitable[Intent]]
+
+
+@dataclass(frozen=True)
+class TenantServices:
+    """Services a graph run resolves for a tenant; shared across concurrent requests."""
+
+    rag_service: RagService
+    lead_service: LeadService
+    calendar_service: CalendarService
+    intent_classifier: IntentClassifierFn
+    async_intent_classifier: Optional[AsyncIntentClassifierFn] = None
+
+
+class _Speculation:
+    """A retrieval started for a turn before the intent router has picked ``rag_chain``."""
+
+    def __init__(self, task: "asyncio.Task[RetrievalResult]", org_id: str) -> None:
+        self.task = task
+        self.org_id = org_id
+        self.used = False
+        self.started = time.perf_counter()
+        self.finished: Optional[float] = None
+        task.add_done_callback(self._on_done)
+
+    def _on_done(self, task: "asyncio.Task[RetrievalResult]") -> None:
+        self.finished = time.perf_counter()
+        if not task.cancelled():
+            # Mark a failure as retrieved; it is re-raised only if the result is used.
+            task.exception()
+
+    async def result(self) -> RetrievalResult:
+        self.used = True
+        SPECULATIVE_RETRIEVALS.inc(org_id=self.org_id, outcome="used")
+        return await self.task
+
+    def settle(self) -> None:
+        """Cancel or discard the retrieval if the turn did not use it."""
+
+        if self.used:
+            return
+        if self.task.done():
+            outcome, ended = "discarded", self.finished or time.perf_counter()
+        else:
+            self.task.cancel()
+            outcome, ended = "cancelled", time.perf_counter()
+        SPECULATIVE_RETRIEVALS.inc(org_id=self.org_id, outcome=outcome)
+        SPECULATIVE_WASTED_SECONDS.observe(ended - self.started, org_id=self.org_id, outcome=outcome)
 
 
 class AgentOrchestrator:
-    """LangGraph-based state machine for the conversational sales agent."""
+    """LangGraph-based state machine for the conversational sales agent.
+
+    The graph is compiled once and reused for every run, so a single instance is meant to
+    live for the whole process. Per-tenant service overrides are resolved at node execution
+    time, which lets tenants be reconfigured without rebuilding the graph. Every node has a
+    sync and an async implementation: ``run`` drives the former and ``arun`` the latter.
+
+    With a ``session_store`` the lead data, appointment and history of a conversation are
+    restored before each run and saved after it, so clients only need to send the new message.
+
+    With ``speculative_retrieval`` the async runs of tenants that use an async intent classifier
+    start retrieval while the classifier is still running. ``rag_chain`` picks up that result, and
+    any other route cancels it, or discards it if it already finished.
+    """
 
     def __init__(
         self,
         rag_service: RagService,
         lead_service: LeadService,
         calendar_service: CalendarService,
-        intent_classifier: Callable[[ConversationState], Intent],
+        intent_classifier: IntentClassifierFn,
+        async_intent_classifier: Optional[AsyncIntentClassifierFn] = None,
+        session_store: Optional[SessionStore] = None,
+        speculative_retrieval: bool = False,
     ) -> None:
-        self._rag_service = rag_service
-        self._lead_service = lead_service
-        self._calendar_service = calendar_service
-        self._intent_classifier = intent_classifier
-        self._graph = self._build_graph()
+        self._session_store = session_store
+        self._speculative_retrieval = speculative_retrieval
+        self._default_services = TenantServices(
+            rag_service=rag_service,
+            lead_service=lead_service,
+            calendar_service=calendar_service,
+            intent_classifier=intent_classifier,
+            async_intent_classifier=async_intent_classifier,
+        )
+        self._tenant_services: Dict[TenantKey, TenantServices] = {}
+        self._tenant_lock = threading.Lock()
+        self._graph = self._build_graph().compile()
+
+    def configure_tenant(
+        self,
+        org_id: str,
+        branch_id: Optional[str] = None,
+        *,
+        rag_service: Optional[RagService] = None,
+        lead_service: Optional[LeadService] = None,
+        calendar_service: Optional[CalendarService] = None,
+        intent_classifier: Optional[IntentClassifierFn] = None,
+        async_intent_classifier: Optional[AsyncIntentClassifierFn] = None,
+    ) -> TenantServices:
+        """Override services for an org (or a single branch when ``branch_id`` is given)."""
+
+        overrides: Dict[str, Any] = {
+            "rag_service": rag_service,
+            "lead_service": lead_service,
+            "calendar_service": calendar_service,
+            "intent_classifier": intent_classifier,
+            "async_intent_classifier": async_intent_classifier,
+        }
+        services = replace(
+            self._default_services,
+            **{name: value for name, value in overrides.items() if value is not None},
+        )
+        with self._tenant_lock:
+            # Copy-on-write keeps lookups lock-free for in-flight runs.
+            updated = dict(self._tenant_services)
+            updated[(org_id, branch_id)] = services
+            self._tenant_services = updated
+        return services
+
+    def reset_tenant(self, org_id: str, branch_id: Optional[str] = None) -> None:
+        with self._tenant_lock:
+            updated = dict(self._tenant_services)
+            updated.pop((org_id, branch_id), None)
+            self._tenant_services = updated
+
+    def _services_for(self, context: Mapping[str, str]) -> TenantServices:
+        tenant_services = self._tenant_services
+        if not tenant_services:
+            return self._default_services
+        org_id = context.get("org_id")
+        branch_id = context.get("branch_id")
+        return (
+            tenant_services.get((org_id, branch_id))
+            or tenant_services.get((org_id, None))
+            or self._default_services
+        )
 
     def _build_graph(self) -> StateGraph[ConversationState]:
+        from langchain_core.runnables import RunnableLambda
+        from langgraph.graph import END, StateGraph
+
         graph: StateGraph[ConversationState] = StateGraph(ConversationState)
 
-        graph.add_node("intent_classifier", self._intent_node)
-        graph.add_node("rag_chain", self._rag_node)
-        graph.add_node("lead_capture", self._lead_node)
-        graph.add_node("lead_saver", self._lead_saver_node)
-        graph.add_node("booking", self._booking_node)
+        nodes = {
+            "intent_classifier": (self._intent_node, self._aintent_node),
+            "rag_chain": (self._rag_node, self._arag_node),
+            "lead_capture": (self._lead_node, self._alead_node),
+            "lead_saver": (self._lead_saver_node, self._alead_saver_node),
+            "booking": (self._booking_node, self._abooking_node),
+        }
+        for name, (func, afunc) in nodes.items():
+            graph.add_node(name, RunnableLambda(self._timed(name, func), afunc=self._atimed(name, afunc)))
 
         graph.set_entry_point("intent_classifier")
 
@@ -56,22 +195,93 @@ class AgentOrchestrator:
 
         return graph
 
+    @staticmethod
+    def _record_node(name: str, state: ConversationState, result: Optional[ConversationState], started: float) -> None:
+        # The intent label reflects the routing decision, so read it from the node's output.
+        GRAPH_NODE_SECONDS.observe(
+            time.perf_counter() - started,
+            node=name,
+            org_id=state.context.get("org_id", ""),
+            intent=(result or state).intent.value,
+            outcome="ok" if result is not None else "error",
+        )
+
+    def _timed(
+        self, name: str, func: Callable[[ConversationState], ConversationState]
+    ) -> Callable[[ConversationState], ConversationState]:
+        def node(state: ConversationState) -> ConversationState:
+            started = time.perf_counter()
+            result = None
+            try:
+                result = func(state)
+                return result
+            finally:
+                self._record_node(name, state, result, started)
+
+        return node
+
+    def _atimed(
+        self, name: str, afunc: Callable[..., Awaitable[ConversationState]]
+    ) -> Callable[..., Awaitable[ConversationState]]:
+        from langchain_core.runnables.utils import accepts_config
+
+        pass_config = accepts_config(afunc)
+
+        async def node(state: ConversationState, config: "RunnableConfig") -> ConversationState:
+            started = time.perf_counter()
+            result = None
+            try:
+                result = await (afunc(state, config) if pass_config else afunc(state))
+                return result
+            finally:
+                self._record_node(name, state, result, started)
+
+        return node
+
     def _intent_node(self, state: ConversationState) -> ConversationState:
         updated = state.copy()
-        updated.intent = self._intent_classifier(updated)
+        updated.intent = self._services_for(updated.context).intent_classifier(updated)
+        return updated
+
+    async def _aintent_node(self, state: ConversationState) -> ConversationState:
+        updated = state.copy()
+        services = self._services_for(updated.context)
+        if services.async_intent_classifier is not None:
+            updated.intent = await services.async_intent_classifier(updated)
+        else:
+            # Sync classifiers are expected to be cheap heuristics that are safe on the loop.
+            updated.intent = services.intent_classifier(updated)
         return updated
 
     def _rag_node(self, state: ConversationState) -> ConversationState:
         updated = state.copy()
-        response = self._rag_service.answer_query(
+        result = self._services_for(updated.context).rag_service.retrieve(
             context=updated.context, query=updated.user_query, history=updated.history
         )
-        updated.history.append({"role": "assistant", "content": response})
-        return updated
+        return self._with_retrieval(updated, result)
+
+    async def _arag_node(
+        self, state: ConversationState, config: Optional["RunnableConfig"] = None
+    ) -> ConversationState:
+        updated = state.copy()
+        speculation = ((config or {}).get("configurable") or {}).get("speculation")
+        if speculation is not None and not speculation.used:
+            result = await speculation.result()
+        else:
+            result = await self._services_for(updated.context).rag_service.aretrieve(
+                context=updated.context, query=updated.user_query, history=updated.history
+            )
+        return self._with_retrieval(updated, result)
+
+    @staticmethod
+    def _with_retrieval(state: ConversationState, result: RetrievalResult) -> ConversationState:
+        state.retrieved = list(result.snippets)
+        state.history.append({"role": "assistant", "content": result.answer})
+        return state
 
     def _lead_node(self, state: ConversationState) -> ConversationState:
         updated = state.copy()
-        lead_data = self._lead_service.capture_lead_step(
+        lead_data = self._services_for(updated.context).lead_service.capture_lead_step(
             context=updated.context,
             user_query=updated.user_query,
             existing_lead=updated.lead_data,
@@ -79,16 +289,41 @@ class AgentOrchestrator:
         updated.lead_data.update(lead_data)
         return updated
 
+    async def _alead_node(self, state: ConversationState) -> ConversationState:
+        return self._lead_node(state)
+
     def _lead_saver_node(self, state: ConversationState) -> ConversationState:
         updated = state.copy()
-        if self._lead_service.is_complete(updated.lead_data):
-            lead_record = self._lead_service.persist_lead(updated.context, updated.lead_data)
+        lead_service = self._services_for(updated.context).lead_service
+        if lead_service.is_complete(updated.lead_data):
+            lead_record = lead_service.persist_lead(updated.context, updated.lead_data)
+            updated.history.append({"role": "system", "content": f"Lead saved: {lead_record['id']}"})
+        return updated
+
+    async def _alead_saver_node(self, state: ConversationState) -> ConversationState:
+        updated = state.copy()
+        lead_service = self._services_for(updated.context).lead_service
+        if lead_service.is_complete(updated.lead_data):
+            lead_record = await lead_service.apersist_lead(updated.context, updated.lead_data)
             updated.history.append({"role": "system", "content": f"Lead saved: {lead_record['id']}"})
         return updated
 
     def _booking_node(self, state: ConversationState) -> ConversationState:
         updated = state.copy()
-        booking_result = self._calendar_service.handle_booking(
+        booking_result = self._services_for(updated.context).calendar_service.handle_booking(
+            context=updated.context,
+            user_query=updated.user_query,
+            lead_data=updated.lead_data,
+            appointment_id=updated.appointment_id,
+            intent=updated.intent,
+        )
+        updated.appointment_id = booking_result.appointment_id
+        updated.history.append({"role": "system", "content": booking_result.message})
+        return updated
+
+    async def _abooking_node(self, state: ConversationState) -> ConversationState:
+        updated = state.copy()
+        booking_result = await self._services_for(updated.context).calendar_service.ahandle_booking(
             context=updated.context,
             user_query=updated.user_query,
             lead_data=updated.lead_data,
@@ -103,7 +338,99 @@ class AgentOrchestrator:
         return state.intent
 
     def run(self, state: ConversationState) -> ConversationState:
-        return self._graph.invoke(state)
+        stored = self._session_store.load(state.context) if self._session_store else None
+        restored = self._restore(state, stored)
+        final_state = self._as_state(self._graph.invoke(restored))
+        if self._session_store is not None:
+            self._session_store.save(self._session_snapshot(restored, final_state))
+        self._count_turn(final_state)
+        return final_state
+
+    async def arun(self, state: ConversationState) -> ConversationState:
+        stored = await self._session_store.aload(state.context) if self._session_store else None
+        restored = self._restore(state, stored)
+        speculation = self._speculate(restored)
+        try:
+            final_state = self._as_state(await self._graph.ainvoke(restored, self._run_config(speculation)))
+        finally:
+            if speculation is not None:
+                speculation.settle()
+        if self._session_store is not None:
+            await self._session_store.asave(self._session_snapshot(restored, final_state))
+        self._count_turn(final_state)
+        return final_state
+
+    async def astream(self, state: ConversationState) -> AsyncIterator[Tuple[str, ConversationState]]:
+        """Yield ``(node_name, state)`` as each graph node finishes."""
+
+        stored = await self._session_store.aload(state.context) if self._session_store else None
+        restored = self._restore(state, stored)
+        final_state = restored
+        speculation = self._speculate(restored)
+        try:
+            async for update in self._graph.astream(
+                restored, self._run_config(speculation), stream_mode="updates"
+            ):
+                for node_name, values in update.items():
+                    final_state = self._as_state(values)
+                    yield node_name, final_state
+        finally:
+            if speculation is not None:
+                speculation.settle()
+        if self._session_store is not None:
+            await self._session_store.asave(self._session_snapshot(restored, final_state))
+        self._count_turn(final_state)
+
+    def _speculate(self, state: ConversationState) -> Optional[_Speculation]:
+        # Sync classifiers run on the event loop, so there would be nothing to overlap with.
+        if not self._speculative_retrieval:
+            return None
+        services = self._services_for(state.context)
+        if services.async_intent_classifier is None:
+            return None
+        task = asyncio.ensure_future(
+            services.rag_service.aretrieve(context=state.context, query=state.user_query, history=list(state.history))
+        )
+        return _Speculation(task, state.context.get("org_id", ""))
+
+    @staticmethod
+    def _run_config(speculation: Optional[_Speculation]) -> Optional[Dict[str, Any]]:
+        return {"configurable": {"speculation": speculation}} if speculation is not None else None
+
+    @staticmethod
+    def _count_turn(final_state: ConversationState) -> None:
+        CHAT_TURNS.inc(org_id=final_state.context.get("org_id", ""), intent=final_state.intent.value)
+
+    @staticmethod
+    def _restore(state: ConversationState, stored: Optional[ConversationState]) -> ConversationState:
+        if stored is None:
+            return state
+        restored = state.copy()
+        restored.lead_data = {**stored.lead_data, **state.lead_data}
+        restored.appointment_id = state.appointment_id or stored.appointment_id
+        if not state.history:
+            # Client-supplied history still wins so older clients keep working.
+            restored.history = list(stored.history)
+        return restored
+
+    @staticmethod
+    def _session_snapshot(restored: ConversationState, final_state: ConversationState) -> ConversationState:
+        # Record the user's turn ahead of the messages the graph produced for it.
+        snapshot = final_state.copy()
+        prior = len(restored.history)
+        snapshot.history = (
+            final_state.history[:prior]
+            + [{"role": "user", "content": final_state.user_query}]
+            + final_state.history[prior:]
+        )
+        return snapshot
+
+    def lead_is_complete(self, lead_data: Dict[str, str], context: Optional[Mapping[str, str]] = None) -> bool:
+        return self._services_for(context or {}).lead_service.is_complete(lead_data)
 
-    def lead_is_complete(self, lead_data: Dict[str, str]) -> bool:
-        return self._lead_service.is_complete(lead_data)
\ No newline at end of file
+    @staticmethod
+    def _as_state(result: Any) -> ConversationState:
+        # Compiled graphs return the channel values as a plain mapping.
+        if isinstance(result, ConversationState):
+            return result
+        return ConversationState(**result)
\ No newline at end of file
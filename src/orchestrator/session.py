@@ -0,0 +1,242 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, Mapping, Optional, Protocol, Tuple
+
+from src.orchestrator.state import ConversationState
+from src.utils.aio import run_blocking
+from src.utils.metrics import observe_adapter
+
+logger = logging.getLogger(__name__)
+
+SessionKey = Tuple[str, str, str]
+
+
+def session_key(context: Mapping[str, str]) -> Optional[SessionKey]:
+    """Sessions are scoped to the tenant so a session id can never cross org/branch boundaries."""
+
+    session_id = context.get("user_session_id")
+    if not session_id:
+        return None
+    return (context.get("org_id", ""), context.get("branch_id", ""), session_id)
+
+
+class SessionBackend(Protocol):
+    """Durable storage behind the in-memory session cache."""
+
+    def load(self, key: SessionKey) -> Optional[bytes]:  # pragma: no cover - interface
+        ...
+
+    def save(self, key: SessionKey, payload: bytes, ttl_seconds: float) -> None:  # pragma: no cover
+        ...
+
+    def delete(self, key: SessionKey) -> None:  # pragma: no cover - interface
+        ...
+
+
+@dataclass
+class SessionStoreStats:
+    entries: int
+    bytes: int
+    hits: int
+    misses: int
+    evictions: int
+    expirations: int
+
+
+class SessionStore:
+    """LRU + TTL cache of serialized conversation states keyed by tenant and session id.
+
+    Entries are stored as the compact bytes produced by ``ConversationState.to_bytes`` so the
+    byte budget reflects real memory use. When a durable ``backend`` is configured the cache is
+    read-through and write-through, letting sessions survive restarts and move across pods.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: float = 1800.0,
+        max_entries: int = 10_000,
+        max_bytes: int = 64 * 1024 * 1024,
+        max_history: int = 50,
+        backend: Optional[SessionBackend] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._ttl = ttl_seconds
+        self._max_entries = max_entries
+        self._max_bytes = max_bytes
+        self._max_history = max_history
+        self._backend = backend
+        self._clock = clock
+        self._entries: "OrderedDict[SessionKey, Tuple[float, bytes]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+
+    def load(self, context: Mapping[str, str]) -> Optional[ConversationState]:
+        key = session_key(context)
+        if key is None:
+            return None
+        payload = self._get_cached(key)
+        if payload is None and self._backend is not None:
+            payload = self._load_durable(key)
+        return self._decode(payload, context)
+
+    async def aload(self, context: Mapping[str, str]) -> Optional[ConversationState]:
+        key = session_key(context)
+        if key is None:
+            return None
+        payload = self._get_cached(key)
+        if payload is None and self._backend is not None:
+            payload = await run_blocking(self._load_durable, key)
+        return self._decode(payload, context)
+
+    def save(self, state: ConversationState) -> None:
+        key = session_key(state.context)
+        if key is None:
+            return
+        payload = self._encode(state)
+        self._put_cached(key, payload)
+        if self._backend is not None:
+            self._backend.save(key, payload, self._ttl)
+
+    async def asave(self, state: ConversationState) -> None:
+        key = session_key(state.context)
+        if key is None:
+            return
+        payload = self._encode(state)
+        self._put_cached(key, payload)
+        if self._backend is not None:
+            await run_blocking(self._backend.save, key, payload, self._ttl)
+
+    def delete(self, context: Mapping[str, str]) -> None:
+        key = session_key(context)
+        if key is None:
+            return
+        with self._lock:
+            self._drop(key)
+        if self._backend is not None:
+            self._backend.delete(key)
+
+    def stats(self) -> SessionStoreStats:
+        with self._lock:
+            return SessionStoreStats(
+                entries=len(self._entries),
+                bytes=self._bytes,
+                hits=self._hits,
+                misses=self._misses,
+                evictions=self._evictions,
+                expirations=self._expirations,
+            )
+
+    def _encode(self, state: ConversationState) -> bytes:
+        trimmed = state
+        if self._max_history and len(state.history) > self._max_history:
+            trimmed = state.copy()
+            trimmed.history = trimmed.history[-self._max_history:]
+        return trimmed.to_bytes()
+
+    @staticmethod
+    def _decode(payload: Optional[bytes], context: Mapping[str, str]) -> Optional[ConversationState]:
+        if payload is None:
+            return None
+        try:
+            return ConversationState.from_bytes(payload, context=dict(context))
+        except ValueError:
+            logger.warning("Discarding unreadable session payload", extra={"context": dict(context)})
+            return None
+
+    def _load_durable(self, key: SessionKey) -> Optional[bytes]:
+        payload = self._backend.load(key) if self._backend is not None else None
+        if payload is not None:
+            self._put_cached(key, payload)
+        return payload
+
+    def _get_cached(self, key: SessionKey) -> Optional[bytes]:
+        now = self._clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._misses += 1
+                return None
+            expires_at, payload = entry
+            if expires_at <= now:
+                self._drop(key)
+                self._expirations += 1
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return payload
+
+    def _put_cached(self, key: SessionKey, payload: bytes) -> None:
+        if len(payload) > self._max_bytes:
+            return
+        expires_at = self._clock() + self._ttl
+        with self._lock:
+            self._drop(key)
+            self._entries[key] = (expires_at, payload)
+            self._bytes += len(payload)
+            while self._entries and (len(self._entries) > self._max_entries or self._bytes > self._max_bytes):
+                oldest, (_, oldest_payload) = self._entries.popitem(last=False)
+                self._bytes -= len(oldest_payload)
+                self._evictions += 1
+
+    def _drop(self, key: SessionKey) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= len(entry[1])
+
+
+class MongoSessionBackend:
+    """Stores session payloads in MongoDB with a TTL index on ``expires_at``."""
+
+    def __init__(self, collection) -> None:
+        self._collection = collection
+        self._index_ready = False
+
+    @staticmethod
+    def _document_id(key: SessionKey) -> str:
+        return "::".join(key)
+
+    def load(self, key: SessionKey) -> Optional[bytes]:
+        with observe_adapter("mongo", "session_load", key[0]):
+            document: Optional[Dict] = self._collection.find_one({"_id": self._document_id(key)})
+        if not document:
+            return None
+        expires_at = document.get("expires_at")
+        if expires_at is not None:
+            if expires_at.tzinfo is None:
+                expires_at = expires_at.replace(tzinfo=timezone.utc)
+            if expires_at <= datetime.now(timezone.utc):
+                return None
+        return bytes(document["payload"])
+
+    def save(self, key: SessionKey, payload: bytes, ttl_seconds: float) -> None:
+        self._ensure_index()
+        with observe_adapter("mongo", "session_save", key[0]):
+            self._collection.replace_one(
+                {"_id": self._document_id(key)},
+                {
+                    "_id": self._document_id(key),
+                    "payload": payload,
+                    "expires_at": datetime.now(timezone.utc) + timedelta(seconds=ttl_seconds),
+                },
+                upsert=True,
+            )
+
+    def delete(self, key: SessionKey) -> None:
+        self._collection.delete_one({"_id": self._document_id(key)})
+
+    def _ensure_index(self) -> None:
+        if self._index_ready:
+            return
+        self._collection.create_index("expires_at", expireAfterSeconds=0)
+        self._index_ready = True
@@ -1,10 +1,17 @@
 ﻿from __future__ import annotations
 
+import json
+import zlib
 from dataclasses import dataclass, field
-from typing import Dict, List, Optional
+from typing import Any, Dict, List, Optional
 
 from src.orchestrator.intents import Intent
 
+# Session payloads are a small JSON array, deflated once they grow past this size.
+_COMPRESS_THRESHOLD = 512
+_RAW_PREFIX = b"j"
+_DEFLATE_PREFIX = b"z"
+
 
 @dataclass
 class ConversationState:
@@ -14,6 +21,7 @@ class ConversationState:
     lead_data: Dict[str, Optional[str]] = field(default_factory=dict)
     appointment_id: Optional[str] = None
     history: List[Dict[str, str]] = field(default_factory=list)
+    retrieved: List[Dict[str, Any]] = field(default_factory=list)
 
     def copy(self) -> "ConversationState":
         return ConversationState(
@@ -23,4 +31,40 @@ class ConversationState:
             lead_data=dict(self.lead_data),
             appointment_id=self.appointment_id,
             history=list(self.history),
-        )
\ No newline at end of file
+            retrieved=list(self.retrieved),
+        )
+
+    def to_bytes(self) -> bytes:
+        """Serialize the cross-turn part of the state (intent, lead, appointment, history).
+
+        ``user_query``, ``context`` and ``retrieved`` are per-turn and are not persisted.
+        """
+
+        payload = [
+            self.intent.value,
+            self.lead_data,
+            self.appointment_id,
+            [[message.get("role", ""), message.get("content", "")] for message in self.history],
+        ]
+        raw = json.dumps(payload, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+        if len(raw) < _COMPRESS_THRESHOLD:
+            return _RAW_PREFIX + raw
+        return _DEFLATE_PREFIX + zlib.compress(raw, 6)
+
+    @classmethod
+    def from_bytes(cls, data: bytes, **overrides: Any) -> "ConversationState":
+        prefix, body = data[:1], data[1:]
+        if prefix == _DEFLATE_PREFIX:
+            body = zlib.decompress(body)
+        elif prefix != _RAW_PREFIX:
+            raise ValueError("Unsupported conversation state encoding")
+        intent, lead_data, appointment_id, history = json.loads(body.decode("utf-8"))
+        state = cls(
+            intent=Intent.from_label(intent),
+            lead_data=dict(lead_data),
+            appointment_id=appointment_id,
+            history=[{"role": role, "content": content} for role, content in history],
+        )
+        for name, value in overrides.items():
+            setattr(state, name, value)
+        return state
@@ -15,7 +15,10 @@ class ChatMessage(BaseModel):
 class ChatRequest(BaseModel):
     context: TenantContext
     message: ChatMessage
-    history: List[ChatMessage] = Field(default_factory=list)
+    history: List[ChatMessage] = Field(
+        default_factory=list,
+        description="Prior turns; when omitted the server restores them from the session store",
+    )
 
 
 class ChatResponse(BaseModel):
@@ -2,7 +2,7 @@
 
 from dataclasses import dataclass
 from datetime import datetime, timedelta
-from typing import Dict, Optional
+from typing import Any, Dict, Optional
 
 from src.adapters.calendar_client import CalendarClient
 from src.orchestrator.intents import Intent
@@ -29,28 +29,56 @@ class CalendarService:
         intent: Intent,
     ) -> BookingResult:
         calendar_id = self._calendar_for(context)
-        desired_start = datetime.utcnow() + timedelta(days=1)
-        desired_end = desired_start + timedelta(minutes=30)
+        if intent == Intent.CANCEL_BOOKING and appointment_id:
+            updated = self._client.patch_event(
+                calendar_id=calendar_id,
+                event_id=appointment_id,
+                body={"status": "cancelled"},
+                org_id=context["org_id"],
+            )
+            return BookingResult(appointment_id=updated.get("id"), message="Appointment cancelled")
 
-        event_body = {
-            "summary": lead_data.get("product_interest", "Consultation"),
-            "description": user_query,
-            "start": {"dateTime": desired_start.isoformat(), "timeZone": self._client.default_timezone},
-            "end": {"dateTime": desired_end.isoformat(), "timeZone": self._client.default_timezone},
-            "attendees": self._attendees_for(lead_data),
-        }
+        created = self._client.create_event(
+            calendar_id=calendar_id, body=self._event_body(user_query, lead_data), org_id=context["org_id"]
+        )
+        return BookingResult(appointment_id=created.get("id"), message="Appointment booked")
 
+    async def ahandle_booking(
+        self,
+        context: Dict[str, str],
+        user_query: str,
+        lead_data: Dict[str, str],
+        appointment_id: Optional[str],
+        intent: Intent,
+    ) -> BookingResult:
+        calendar_id = self._calendar_for(context)
         if intent == Intent.CANCEL_BOOKING and appointment_id:
-            updated = self._client.patch_event(
+            updated = await self._client.apatch_event(
                 calendar_id=calendar_id,
                 event_id=appointment_id,
                 body={"status": "cancelled"},
+                org_id=context["org_id"],
             )
             return BookingResult(appointment_id=updated.get("id"), message="Appointment cancelled")
 
-        created = self._client.create_event(calendar_id=calendar_id, body=event_body)
+        created = await self._client.acreate_event(
+            calendar_id=calendar_id, body=self._event_body(user_query, lead_data), org_id=context["org_id"]
+        )
         return BookingResult(appointment_id=created.get("id"), message="Appointment booked")
 
+    def _event_body(self, user_query: str, lead_data: Dict[str, str]) -> Dict[str, Any]:
+        desired_start = datetime.utcnow() + timedelta(days=1)
+        desired_end = desired_start + timedelta(minutes=30)
+
+        event_body = {
+            "summary": lead_data.get("product_interest", "Consultation"),
+            "description": user_query,
+            "start": {"dateTime": desired_start.isoformat(), "timeZone": self._client.default_timezone},
+            "end": {"dateTime": desired_end.isoformat(), "timeZone": self._client.default_timezone},
+            "attendees": self._attendees_for(lead_data),
+        }
+        return event_body
+
     def _calendar_for(self, context: Dict[str, str]) -> str:
         return f"{context['org_id']}__{context['branch_id']}@example.com"
 
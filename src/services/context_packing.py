@@ -0,0 +1,161 @@
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence
+
+from src.adapters.pinecone_client import match_to_dict
+
+
+def _numpy():
+    try:
+        import numpy  # type: ignore
+    except ImportError:  # pragma: no cover - numpy is listed in requirements
+        return None
+    return numpy
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about four characters per token for English text)."""
+
+    return max(1, math.ceil(len(text) / 4)) if text else 0
+
+
+def _overlap(left: Sequence[str], right: Sequence[str], limit: int) -> int:
+    """Length of the longest suffix of ``left`` that is also a prefix of ``right``."""
+
+    for size in range(min(len(left), len(right), limit), 0, -1):
+        if left[-size:] == right[:size]:
+            return size
+    return 0
+
+
+def _contains(haystack: Sequence[str], needle: Sequence[str]) -> bool:
+    if not needle or len(needle) > len(haystack):
+        return False
+    first = needle[0]
+    for start in range(len(haystack) - len(needle) + 1):
+        if haystack[start] == first and haystack[start:start + len(needle)] == needle:
+            return True
+    return False
+
+
+@dataclass
+class ContextPacker:
+    """Turns ranked matches into a compact, diverse context that fits a token budget.
+
+    1. Chunks from the same ``branch_id`` and ``source_path`` that repeat each other (the
+       ``simple_chunk`` overlap, or one chunk inside another) are trimmed or dropped;
+       higher-ranked text wins.
+    2. Maximal marginal relevance reorders the rest, trading relevance (``mmr_lambda``) against
+       similarity to snippets already picked. It uses the returned vectors, falling back to
+       word-set overlap for matches without values (e.g. lexical hits).
+    3. Snippets are added in that order while they fit ``token_budget``.
+    """
+
+    token_budget: int = 1024
+    mmr_lambda: float = 0.7
+    min_overlap_words: int = 5
+    max_overlap_words: int = 256
+
+    @property
+    def needs_vectors(self) -> bool:
+        return self.mmr_lambda < 1.0
+
+    def pack(self, matches: Sequence[Any]) -> List[Dict[str, Any]]:
+        """Pack ``matches``, given as dicts or Pinecone SDK ``ScoredVector`` objects."""
+
+        candidates = self._deduplicate([match for match in map(match_to_dict, matches) if match.get("metadata")])
+        packed: List[Dict[str, Any]] = []
+        remaining = self.token_budget
+        for match in self._mmr(candidates):
+            text = match["metadata"].get("text", "")
+            cost = estimate_tokens(text)
+            if cost > remaining:
+                if packed:
+                    continue
+                # Never return nothing: trim the best snippet to the budget.
+                text = text[: remaining * 4].rsplit(" ", 1)[0] if remaining else ""
+                match["metadata"]["text"] = text
+                cost = estimate_tokens(text)
+            if not text:
+                continue
+            match.pop("values", None)
+            packed.append(match)
+            remaining -= cost
+        return packed
+
+    def _deduplicate(self, matches: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        kept: List[Dict[str, Any]] = []
+        words_by_id: Dict[int, List[str]] = {}
+        for match in matches:
+            metadata = dict(match["metadata"])
+            match["metadata"] = metadata
+            words = metadata.get("text", "").split()
+            source = (metadata.get("branch_id"), metadata.get("source_path"))
+            for other in kept:
+                if not words or (other["metadata"].get("branch_id"), other["metadata"].get("source_path")) != source:
+                    continue
+                other_words = words_by_id[id(other)]
+                if _contains(other_words, words):
+                    words = []
+                    break
+                head = _overlap(other_words, words, self.max_overlap_words)
+                if head >= self.min_overlap_words:
+                    words = words[head:]
+                tail = _overlap(words, other_words, self.max_overlap_words)
+                if tail >= self.min_overlap_words:
+                    words = words[: len(words) - tail]
+            if not words:
+                continue
+            metadata["text"] = " ".join(words)
+            words_by_id[id(match)] = words
+            kept.append(match)
+        return kept
+
+    def _mmr(self, matches: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        if len(matches) < 3 or not self.needs_vectors:
+            return matches
+        np = _numpy()
+        scores = np.array([float(match.get("score") or 0.0) for match in matches])
+        top = scores.max()
+        relevance = scores / top if top > 0 else np.linspace(1.0, 0.0, len(matches))
+        similarity = self._similarity(matches)
+
+        order: List[int] = []
+        remaining = list(range(len(matches)))
+        while remaining:
+            if order:
+                redundancy = similarity[np.ix_(remaining, order)].max(axis=1)
+            else:
+                redundancy = np.zeros(len(remaining))
+            values = self.mmr_lambda * relevance[remaining] - (1 - self.mmr_lambda) * redundancy
+            best = remaining[int(np.argmax(values))]
+            order.append(best)
+            remaining.remove(best)
+        return [matches[index] for index in order]
+
+    @staticmethod
+    def _similarity(matches: List[Dict[str, Any]]):
+        np = _numpy()
+        size = len(matches)
+        similarity = np.zeros((size, size))
+        vectors: List[Optional[Any]] = []
+        for match in matches:
+            values = match.get("values")
+            if values is not None and len(values):
+                vector = np.asarray(values, dtype=np.float32)
+                norm = np.linalg.norm(vector)
+                vectors.append(vector / norm if norm else None)
+            else:
+                vectors.append(None)
+        words = [set(match["metadata"].get("text", "").lower().split()) for match in matches]
+        for i in range(size):
+            for j in range(i + 1, size):
+                if vectors[i] is not None and vectors[j] is not None and len(vectors[i]) == len(vectors[j]):
+                    value = float(vectors[i] @ vectors[j])
+                else:
+                    union = words[i] | words[j]
+                    value = len(words[i] & words[j]) / len(union) if union else 0.0
+                similarity[i, j] = similarity[j, i] = value
+        return similarity
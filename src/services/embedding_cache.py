@@ -0,0 +1,293 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from src.utils.aio import run_blocking
+from src.utils.vectors import CompactVector, as_float_list, check_dtype
+
+
+def normalize_text(text: str) -> str:
+    """Cache key for a query: case-folded with whitespace collapsed."""
+
+    return " ".join(text.split()).casefold()
+
+
+@dataclass
+class EmbeddingCacheStats:
+    entries: int
+    bytes: int
+    hits: int
+    misses: int
+    coalesced: int
+    evictions: int
+    expirations: int
+
+
+class CachingEmbedder:
+    """LRU + TTL cache in front of an embedding provider.
+
+    Vectors are stored as ``CompactVector`` buffers of ``vector_dtype`` (float16 by default, about
+    15x smaller than a list of floats), so ``max_bytes`` tracks their real size. The callers that
+    triggered an upstream call receive its full-precision result; later hits get the stored copy.
+    Concurrent lookups of the same normalized text share one upstream call, whether the callers
+    are worker threads (``embed``) or coroutines (``aembed``); failures are never cached. The
+    async upstream call runs in its own task, so cancelling the caller that started it leaves
+    the call running for the others.
+    ``embed_batch`` sends only the distinct texts it cannot serve from the cache to the inner
+    provider's ``embed_batch``.
+    """
+
+    def __init__(
+        self,
+        inner: Any,
+        ttl_seconds: float = 3600.0,
+        max_entries: int = 50_000,
+        max_bytes: int = 64 * 1024 * 1024,
+        clock: Callable[[], float] = time.monotonic,
+        vector_dtype: str = "float16",
+    ) -> None:
+        self._inner = inner
+        self._dtype = check_dtype(vector_dtype)
+        self._ttl = ttl_seconds
+        self._max_entries = max_entries
+        self._max_bytes = max_bytes
+        self._clock = clock
+        self._entries: "OrderedDict[str, Tuple[float, CompactVector]]" = OrderedDict()
+        self._inflight: Dict[str, Tuple[Future, int]] = {}
+        self._upstream_tasks: "set[asyncio.Task]" = set()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._coalesced = 0
+        self._evictions = 0
+        self._expirations = 0
+
+    @property
+    def inner(self) -> Any:
+        return self._inner
+
+    @property
+    def model_name(self) -> str:
+        return getattr(self._inner, "model_name", type(self._inner).__name__)
+
+    def embed(self, text: str) -> List[float]:
+        key = normalize_text(text)
+        cached, future, leader = self._lookup(key, blocking=True)
+        if cached is not None:
+            return cached
+        if not leader:
+            return list(future.result())
+        try:
+            values = self._inner.embed(text)
+        except BaseException as exc:
+            self._fail(key, future, exc)
+            raise
+        return self._complete(key, future, values)
+
+    async def aembed(self, text: str) -> List[float]:
+        key = normalize_text(text)
+        cached, future, leader = self._lookup(key, blocking=False)
+        if cached is not None:
+            return cached
+        if leader:
+            self._spawn(self._aembed_upstream(key, future, text))
+        return list(await self._shared(future))
+
+    def embed_batch(self, texts: Sequence[str]) -> List[List[float]]:
+        results, leaders, followers = self._plan(texts, blocking=True)
+        if leaders:
+            try:
+                values = self._embed_many([text for _, _, text in leaders.values()])
+                self._check_count(values, len(leaders))
+            except BaseException as exc:
+                self._fail_all(leaders, exc)
+                raise
+            self._fill(results, leaders, values)
+        for position, future in followers:
+            results[position] = list(future.result())
+        return results  # type: ignore[return-value]
+
+    async def aembed_batch(self, texts: Sequence[str]) -> List[List[float]]:
+        results, leaders, followers = self._plan(texts, blocking=False)
+        if leaders:
+            self._spawn(self._aembed_batch_upstream(leaders))
+            followers.extend(
+                (position, future) for future, positions, _ in leaders.values() for position in positions
+            )
+        for position, future in followers:
+            results[position] = list(await self._shared(future))
+        return results  # type: ignore[return-value]
+
+    async def _aembed_upstream(self, key: str, future: Future, text: str) -> None:
+        try:
+            aembed = getattr(self._inner, "aembed", None)
+            if aembed is not None:
+                values = await aembed(text)
+            else:
+                values = await run_blocking(self._inner.embed, text)
+            self._complete(key, future, values)
+        except BaseException as exc:
+            self._fail(key, future, exc)
+
+    async def _aembed_batch_upstream(self, leaders: Dict[str, Tuple[Future, List[int], str]]) -> None:
+        pending = [text for _, _, text in leaders.values()]
+        try:
+            aembed_batch = getattr(self._inner, "aembed_batch", None)
+            if aembed_batch is not None:
+                values = await aembed_batch(pending)
+            else:
+                values = await run_blocking(self._embed_many, pending)
+            self._check_count(values, len(leaders))
+        except BaseException as exc:
+            self._fail_all(leaders, exc)
+            return
+        for (key, (future, _, _)), vector in zip(leaders.items(), values):
+            self._complete(key, future, vector)
+
+    def _spawn(self, upstream) -> None:
+        # The loop only keeps weak references to tasks; hold one until the upstream call is done.
+        task = asyncio.ensure_future(upstream)
+        self._upstream_tasks.add(task)
+        task.add_done_callback(self._upstream_tasks.discard)
+
+    @staticmethod
+    async def _shared(future: Future) -> List[float]:
+        """Await a shared upstream result without letting this caller's cancellation cancel it."""
+
+        waiter = asyncio.wrap_future(future)
+        try:
+            return await asyncio.shield(waiter)
+        except asyncio.CancelledError:
+            waiter.add_done_callback(lambda done: done.cancelled() or done.exception())
+            raise
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> EmbeddingCacheStats:
+        with self._lock:
+            return EmbeddingCacheStats(
+                entries=len(self._entries),
+                bytes=self._bytes,
+                hits=self._hits,
+                misses=self._misses,
+                coalesced=self._coalesced,
+                evictions=self._evictions,
+                expirations=self._expirations,
+            )
+
+    def _lookup(self, key: str, blocking: bool) -> Tuple[Optional[List[float]], Optional[Future], bool]:
+        """Return a cached vector, or the in-flight future and whether this caller must fill it."""
+
+        now = self._clock()
+        caller = threading.get_ident()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, packed = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self._hits += 1
+                    return packed.tolist(), None, False
+                self._drop(key)
+                self._expirations += 1
+            pending = self._inflight.get(key)
+            # A blocking caller on the leader's own thread (a sync call made from the event loop
+            # that is awaiting the same text) would deadlock waiting on itself; let it lead.
+            if pending is not None and not (blocking and pending[1] == caller):
+                self._coalesced += 1
+                return None, pending[0], False
+            self._misses += 1
+            future: Future = Future()
+            if pending is None:
+                self._inflight[key] = (future, caller)
+            return None, future, True
+
+    def _plan(
+        self, texts: Sequence[str], blocking: bool
+    ) -> Tuple[List[Optional[List[float]]], Dict[str, Tuple[Future, List[int], str]], List[Tuple[int, Future]]]:
+        """Split a batch into cache hits, texts this caller must embed, and in-flight lookups."""
+
+        results: List[Optional[List[float]]] = [None] * len(texts)
+        leaders: Dict[str, Tuple[Future, List[int], str]] = {}
+        followers: List[Tuple[int, Future]] = []
+        for position, text in enumerate(texts):
+            key = normalize_text(text)
+            if key in leaders:
+                leaders[key][1].append(position)
+                continue
+            cached, future, leader = self._lookup(key, blocking)
+            if cached is not None:
+                results[position] = cached
+            elif leader:
+                leaders[key] = (future, [position], text)
+            else:
+                followers.append((position, future))
+        return results, leaders, followers
+
+    def _embed_many(self, texts: List[str]) -> List[List[float]]:
+        embed_batch = getattr(self._inner, "embed_batch", None)
+        if embed_batch is not None:
+            return embed_batch(texts)
+        return [self._inner.embed(text) for text in texts]
+
+    @staticmethod
+    def _check_count(values: Sequence[List[float]], expected: int) -> None:
+        if len(values) != expected:
+            raise RuntimeError(f"Embedding provider returned {len(values)} vectors for {expected} texts")
+
+    def _fill(
+        self,
+        results: List[Optional[List[float]]],
+        leaders: Dict[str, Tuple[Future, List[int], str]],
+        values: Sequence[List[float]],
+    ) -> None:
+        for (key, (future, positions, _)), vector in zip(leaders.items(), values):
+            vector = self._complete(key, future, vector)
+            for position in positions:
+                results[position] = list(vector)
+
+    def _fail_all(self, leaders: Dict[str, Tuple[Future, List[int], str]], exc: BaseException) -> None:
+        for key, (future, _, _) in leaders.items():
+            self._fail(key, future, exc)
+
+    def _complete(self, key: str, future: Future, values: List[float]) -> List[float]:
+        packed = CompactVector.encode(values, self._dtype)
+        size = packed.nbytes
+        with self._lock:
+            if self._inflight.get(key, (None,))[0] is future:
+                del self._inflight[key]
+            if size <= self._max_bytes and self._max_entries > 0:
+                self._drop(key)
+                self._entries[key] = (self._clock() + self._ttl, packed)
+                self._bytes += size
+                while self._entries and (
+                    len(self._entries) > self._max_entries or self._bytes > self._max_bytes
+                ):
+                    _, (_, oldest) = self._entries.popitem(last=False)
+                    self._bytes -= oldest.nbytes
+                    self._evictions += 1
+        # Callers sharing this upstream call get full precision; only the cached copy is quantized.
+        vector = as_float_list(values)
+        future.set_result(vector)
+        return list(vector)
+
+    def _fail(self, key: str, future: Future, exc: BaseException) -> None:
+        with self._lock:
+            if self._inflight.get(key, (None,))[0] is future:
+                del self._inflight[key]
+        future.set_exception(exc)
+
+    def _drop(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry[1].nbytes
@@ -0,0 +1,187 @@
+from __future__ import annotations
+
+import hashlib
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from src.utils.vectors import CompactVector, check_dtype
+
+# SQLite allows 999 bound parameters in older builds; one is taken by the model name.
+_LOOKUP_CHUNK = 900
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS embeddings (
+    model TEXT NOT NULL,
+    digest BLOB NOT NULL,
+    vector BLOB NOT NULL,
+    dtype TEXT NOT NULL DEFAULT 'float32',
+    scale REAL NOT NULL DEFAULT 1.0,
+    last_used REAL NOT NULL,
+    PRIMARY KEY (model, digest)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS embeddings_last_used ON embeddings (last_used);
+"""
+
+
+def content_digest(text: str) -> bytes:
+    return hashlib.sha256(text.encode("utf-8")).digest()
+
+
+@dataclass
+class EmbeddingStoreStats:
+    entries: int
+    bytes: int
+    hits: int
+    misses: int
+    writes: int
+    evictions: int
+
+
+class EmbeddingStore:
+    """On-disk embeddings keyed by (model name, SHA-256 of the exact chunk text).
+
+    ``IngestionPipeline`` looks chunks up in bulk before embedding, so re-ingesting unchanged
+    documents only embeds the text that changed. Vectors are ``CompactVector`` blobs of
+    ``vector_dtype`` in SQLite (WAL mode); rows written with another dtype stay readable. The
+    default is float32 because stored vectors are upserted into the primary index again. Once
+    their total size exceeds ``max_bytes``, the least recently used rows are deleted until the
+    store is back under 90% of the limit.
+    """
+
+    def __init__(
+        self,
+        path: str | Path,
+        max_bytes: int = 512 * 1024 * 1024,
+        clock: Callable[[], float] = time.time,
+        vector_dtype: str = "float32",
+    ) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._max_bytes = max_bytes
+        self._dtype = check_dtype(vector_dtype)
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.executescript(_SCHEMA)
+        columns = {row[1] for row in self._connection.execute("PRAGMA table_info(embeddings)")}
+        if "dtype" not in columns:
+            # Stores created before quantization hold raw float32 blobs.
+            self._connection.execute("ALTER TABLE embeddings ADD COLUMN dtype TEXT NOT NULL DEFAULT 'float32'")
+            self._connection.execute("ALTER TABLE embeddings ADD COLUMN scale REAL NOT NULL DEFAULT 1.0")
+        row = self._connection.execute("SELECT COUNT(*), COALESCE(SUM(LENGTH(vector)), 0) FROM embeddings").fetchone()
+        self._entries, self._bytes = int(row[0]), int(row[1])
+        self._hits = 0
+        self._misses = 0
+        self._writes = 0
+        self._evictions = 0
+
+    def get_many(self, model: str, texts: Sequence[str]) -> List[Optional[CompactVector]]:
+        """Stored vectors for ``texts`` in order, ``None`` where a text has not been embedded."""
+
+        digests = [content_digest(text) for text in texts]
+        found: Dict[bytes, CompactVector] = {}
+        unique = list(dict.fromkeys(digests))
+        with self._lock:
+            for start in range(0, len(unique), _LOOKUP_CHUNK):
+                chunk = unique[start:start + _LOOKUP_CHUNK]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._connection.execute(
+                    "SELECT digest, vector, dtype, scale FROM embeddings"
+                    f" WHERE model = ? AND digest IN ({placeholders})",
+                    [model, *chunk],
+                ).fetchall()
+                for digest, blob, dtype, scale in rows:
+                    found[bytes(digest)] = CompactVector.from_bytes(blob, dtype, scale)
+            if found:
+                now = self._clock()
+                self._connection.executemany(
+                    "UPDATE embeddings SET last_used = ? WHERE model = ? AND digest = ?",
+                    [(now, model, digest) for digest in found],
+                )
+            results = [found.get(digest) for digest in digests]
+            hits = sum(result is not None for result in results)
+            self._hits += hits
+            self._misses += len(results) - hits
+        return results
+
+    def put_many(self, model: str, texts: Sequence[str], vectors: Sequence[Any]) -> None:
+        if len(texts) != len(vectors):
+            raise ValueError("texts and vectors must have the same length")
+        now = self._clock()
+        rows: Dict[bytes, CompactVector] = {}
+        for text, vector in zip(texts, vectors):
+            rows[content_digest(text)] = CompactVector.encode(vector, self._dtype)
+        if not rows:
+            return
+        with self._lock:
+            self._connection.execute("BEGIN")
+            try:
+                for digest, vector in rows.items():
+                    previous = self._connection.execute(
+                        "SELECT LENGTH(vector) FROM embeddings WHERE model = ? AND digest = ?", (model, digest)
+                    ).fetchone()
+                    self._connection.execute(
+                        "INSERT OR REPLACE INTO embeddings (model, digest, vector, dtype, scale, last_used)"
+                        " VALUES (?, ?, ?, ?, ?, ?)",
+                        (model, digest, vector.tobytes(), vector.dtype, vector.scale, now),
+                    )
+                    if previous is None:
+                        self._entries += 1
+                        self._bytes += vector.nbytes
+                    else:
+                        self._bytes += vector.nbytes - int(previous[0])
+                self._connection.execute("COMMIT")
+            except BaseException:
+                self._connection.execute("ROLLBACK")
+                self._resync()
+                raise
+            self._writes += len(rows)
+            if self._bytes > self._max_bytes:
+                self._evict(int(self._max_bytes * 0.9))
+
+    def _evict(self, target_bytes: int) -> None:
+        while self._bytes > target_bytes and self._entries:
+            victims: List[Tuple[str, bytes, int]] = self._connection.execute(
+                "SELECT model, digest, LENGTH(vector) FROM embeddings ORDER BY last_used LIMIT 500"
+            ).fetchall()
+            if not victims:
+                break
+            freed = 0
+            dropped = 0
+            for model, digest, size in victims:
+                if self._bytes - freed <= target_bytes:
+                    break
+                freed += int(size)
+                dropped += 1
+            self._connection.executemany(
+                "DELETE FROM embeddings WHERE model = ? AND digest = ?",
+                [(model, digest) for model, digest, _ in victims[:dropped]],
+            )
+            self._entries -= dropped
+            self._bytes -= freed
+            self._evictions += dropped
+
+    def _resync(self) -> None:
+        row = self._connection.execute("SELECT COUNT(*), COALESCE(SUM(LENGTH(vector)), 0) FROM embeddings").fetchone()
+        self._entries, self._bytes = int(row[0]), int(row[1])
+
+    def stats(self) -> EmbeddingStoreStats:
+        with self._lock:
+            return EmbeddingStoreStats(
+                entries=self._entries,
+                bytes=self._bytes,
+                hits=self._hits,
+                misses=self._misses,
+                writes=self._writes,
+                evictions=self._evictions,
+            )
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
@@ -1,30 +1,311 @@
 from __future__ import annotations
 
-from typing import List
+import asyncio
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, List, Optional, Sequence
 
-try:
-    from google import genai  # type: ignore[attr-defined]
-except ImportError:  # pragma: no cover - optional dependency guard
-    genai = None  # type: ignore
+from src.utils.aio import run_blocking
+from src.utils.metrics import observe_adapter
+from src.utils.rate_limit import TokenBucket, backoff_delay
+
+# Gemini's batch endpoint accepts at most 100 contents per request.
+GEMINI_MAX_BATCH_SIZE = 100
+
+# Throttling, request timeouts and transient server errors are worth another attempt.
+RETRYABLE_STATUS_CODES = frozenset({408, 429, 500, 502, 503, 504})
+
+
+def _genai():
+    try:
+        from google import genai  # type: ignore[attr-defined]
+    except ImportError:  # pragma: no cover - optional dependency guard
+        return None
+    return genai
+
+
+def _status_code(exc: Exception) -> Any:
+    return getattr(exc, "code", None) or getattr(exc, "status_code", None)
+
+
+def _is_request_too_large(exc: Exception) -> bool:
+    code = _status_code(exc)
+    if code == 413:
+        return True
+    message = str(exc).lower()
+    return code == 400 and any(marker in message for marker in ("too large", "too many", "at most", "exceed"))
+
+
+def _is_retryable(exc: Exception) -> bool:
+    if _status_code(exc) in RETRYABLE_STATUS_CODES:
+        return True
+    # httpx raises ReadTimeout / ConnectTimeout etc., which are not TimeoutError subclasses.
+    return isinstance(exc, (TimeoutError, ConnectionError)) or "timeout" in type(exc).__name__.lower()
+
+
+def _retry_after(exc: Exception) -> float:
+    headers = getattr(getattr(exc, "response", None), "headers", None) or {}
+    try:
+        return max(0.0, float(headers.get("retry-after") or 0.0))
+    except (TypeError, ValueError):
+        return 0.0
+
+
+@dataclass
+class EmbeddingClientStats:
+    queued: int
+    in_flight: int
+    requests: int
+    retries: int
+    errors: int
+    throttled_seconds: float
+    latency_avg_ms: float
+    latency_max_ms: float
 
 
 class EmbeddingService:
-    """Wraps the Gemini embedding model for Pinecone compatibility."""
+    """Wraps the Gemini embedding model for Pinecone compatibility.
+
+    ``embed_batch`` sends several texts per ``embed_content`` call. Batches hold at most
+    ``max_batch_size`` texts and ``max_batch_chars`` characters. A request the API rejects as too
+    large is retried as two halves, and later batches stay below the rejected size. Each
+    successful batch grows the size again by a quarter, up to that learned ceiling.
+
+    Up to ``max_concurrency`` batch requests run at once, and every request first takes a token
+    from a bucket refilled at ``requests_per_minute`` (0 disables the limit). Throttling, timeouts
+    and 5xx responses are retried up to ``max_retries`` times with full-jitter exponential
+    backoff, waiting at least as long as a ``Retry-After`` header asks.
+    """
 
-    def __init__(self, model_name: str, api_key: str) -> None:
+    def __init__(
+        self,
+        model_name: str,
+        api_key: str,
+        max_batch_size: int = GEMINI_MAX_BATCH_SIZE,
+        max_batch_chars: int = 200_000,
+        max_concurrency: int = 4,
+        requests_per_minute: float = 0.0,
+        max_retries: int = 4,
+        timeout_s: float = 30.0,
+        backoff_base_s: float = 0.5,
+        backoff_max_s: float = 20.0,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        genai = _genai()
         if genai is None:
             raise RuntimeError("google-genai package is required for embeddings")
         if not api_key:
             raise RuntimeError("Gemini API key is required for embeddings")
-        self._client = genai.Client(api_key=api_key)
+        http_options = {"timeout": int(timeout_s * 1000)} if timeout_s > 0 else None
+        self._client = genai.Client(api_key=api_key, http_options=http_options)
         self._model_name = model_name
+        self._max_batch_size = max(1, min(max_batch_size, GEMINI_MAX_BATCH_SIZE))
+        self._max_batch_chars = max_batch_chars
+        self._batch_size = self._max_batch_size
+        self._ceiling = self._max_batch_size
+        self._max_concurrency = max(1, max_concurrency)
+        self._slots = threading.BoundedSemaphore(self._max_concurrency)
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._limiter = TokenBucket.per_minute(requests_per_minute, burst=self._max_concurrency)
+        self._max_retries = max(0, max_retries)
+        self._backoff_base_s = backoff_base_s
+        self._backoff_max_s = backoff_max_s
+        self._sleep = sleep
+        self._rng = random.Random()
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._in_flight = 0
+        self._requests = 0
+        self._retries = 0
+        self._errors = 0
+        self._throttled_seconds = 0.0
+        self._latency_total = 0.0
+        self._latency_max = 0.0
+
+    @property
+    def model_name(self) -> str:
+        return self._model_name
+
+    @property
+    def batch_size(self) -> int:
+        return self._batch_size
 
     def embed(self, text: str) -> List[float]:
-        response = self._client.models.embed_content(model=self._model_name, contents=text)
+        response = self._request("embed_content", text)
+        return self._extract_values(response)
+
+    async def aembed(self, text: str) -> List[float]:
+        response = await self._arequest("embed_content", text)
+        return self._extract_values(response)
+
+    def embed_batch(self, texts: Sequence[str]) -> List[List[float]]:
+        batches = self._plan(texts)
+        with self._lock:
+            self._queued += len(batches)
+        if len(batches) <= 1:
+            results = [self._embed_queued(batch) for batch in batches]
+        else:
+            results = list(self._pool().map(self._embed_queued, batches))
+        return [vector for vectors in results for vector in vectors]
+
+    async def aembed_batch(self, texts: Sequence[str]) -> List[List[float]]:
+        # Batch requests share the thread pool and concurrency slots with embed_batch.
+        return await run_blocking(self.embed_batch, texts)
+
+    def stats(self) -> EmbeddingClientStats:
+        with self._lock:
+            return EmbeddingClientStats(
+                queued=self._queued,
+                in_flight=self._in_flight,
+                requests=self._requests,
+                retries=self._retries,
+                errors=self._errors,
+                throttled_seconds=self._throttled_seconds,
+                latency_avg_ms=1000.0 * self._latency_total / self._requests if self._requests else 0.0,
+                latency_max_ms=1000.0 * self._latency_max,
+            )
+
+    def _pool(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self._max_concurrency, thread_name_prefix="gemini-embed"
+                )
+            return self._executor
+
+    def _plan(self, texts: Sequence[str]) -> List[List[str]]:
+        batches: List[List[str]] = []
+        start = 0
+        while start < len(texts):
+            batch = self._next_batch(texts, start)
+            batches.append(batch)
+            start += len(batch)
+        return batches
+
+    def _next_batch(self, texts: Sequence[str], start: int) -> List[str]:
+        batch: List[str] = []
+        chars = 0
+        for text in texts[start:start + self._batch_size]:
+            if batch and chars + len(text) > self._max_batch_chars:
+                break
+            batch.append(text)
+            chars += len(text)
+        return batch
+
+    def _embed_queued(self, batch: List[str]) -> List[List[float]]:
+        """Embed one planned batch once a concurrency slot is free, halving it while it is too large."""
+
+        with self._slots:
+            with self._lock:
+                self._queued -= 1
+            if len(batch) <= self._ceiling:
+                try:
+                    response = self._request("embed_content_batch", batch)
+                except Exception as exc:
+                    if not self._shrink(len(batch), exc):
+                        raise
+                else:
+                    vectors = self._extract_batch(response, len(batch))
+                    self._grow()
+                    return vectors
+        half = len(batch) // 2
+        with self._lock:
+            self._queued += 2
+        return self._embed_queued(batch[:half]) + self._embed_queued(batch[half:])
+
+    def _request(self, operation: str, contents: Any) -> Any:
+        attempt = 0
+        while True:
+            self._throttled(self._limiter.acquire(sleep=self._sleep))
+            started = self._begin()
+            try:
+                with observe_adapter("gemini", operation):
+                    return self._client.models.embed_content(model=self._model_name, contents=contents)
+            except Exception as exc:
+                attempt += 1
+                delay = self._retry_delay(attempt, exc)
+            finally:
+                self._end(started)
+            self._sleep(delay)
+
+    async def _arequest(self, operation: str, contents: Any) -> Any:
+        attempt = 0
+        while True:
+            self._throttled(await self._limiter.aacquire())
+            started = self._begin()
+            try:
+                with observe_adapter("gemini", operation):
+                    return await self._client.aio.models.embed_content(model=self._model_name, contents=contents)
+            except Exception as exc:
+                attempt += 1
+                delay = self._retry_delay(attempt, exc)
+            finally:
+                self._end(started)
+            await asyncio.sleep(delay)
+
+    def _retry_delay(self, attempt: int, exc: Exception) -> float:
+        """Seconds to wait before retrying ``exc``; re-raises it once retries are exhausted."""
+
+        with self._lock:
+            if attempt > self._max_retries or not _is_retryable(exc):
+                self._errors += 1
+                raise exc
+            self._retries += 1
+        delay = backoff_delay(attempt, self._backoff_base_s, self._backoff_max_s, self._rng)
+        return max(delay, _retry_after(exc))
+
+    def _throttled(self, waited: float) -> None:
+        if waited > 0:
+            with self._lock:
+                self._throttled_seconds += waited
+
+    def _begin(self) -> float:
+        with self._lock:
+            self._in_flight += 1
+        return time.perf_counter()
+
+    def _end(self, started: float) -> None:
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self._in_flight -= 1
+            self._requests += 1
+            self._latency_total += elapsed
+            self._latency_max = max(self._latency_max, elapsed)
+
+    def _shrink(self, sent: int, exc: Exception) -> bool:
+        """Lower the batch size after a too-large rejection; False if the error is not retryable."""
+
+        if sent <= 1 or not _is_request_too_large(exc):
+            return False
+        with self._lock:
+            self._ceiling = max(1, min(self._ceiling, sent - 1))
+            self._batch_size = max(1, min(self._batch_size, sent // 2))
+        return True
+
+    def _grow(self) -> None:
+        with self._lock:
+            self._batch_size = min(self._ceiling, self._batch_size + max(1, self._batch_size // 4))
+
+    @staticmethod
+    def _extract_values(response) -> List[float]:
         embeddings = getattr(response, "embeddings", None) or []
         if not embeddings:
             raise RuntimeError("Gemini returned no embeddings")
-        values = getattr(embeddings[0], "values", None)
+        return EmbeddingService._values(embeddings[0])
+
+    @staticmethod
+    def _extract_batch(response, expected: int) -> List[List[float]]:
+        embeddings = getattr(response, "embeddings", None) or []
+        if len(embeddings) != expected:
+            raise RuntimeError(f"Gemini returned {len(embeddings)} embeddings for {expected} texts")
+        return [EmbeddingService._values(embedding) for embedding in embeddings]
+
+    @staticmethod
+    def _values(embedding: Any) -> List[float]:
+        values = getattr(embedding, "values", None)
         if not values:
             raise RuntimeError("Gemini returned empty embedding values")
         return list(values)
@@ -1,12 +1,162 @@
 ﻿from __future__ import annotations
 
 import hashlib
-from typing import List
+import re
+import zlib
+from functools import lru_cache
+from typing import List, Sequence, Tuple
+
+from src.utils.aio import run_blocking
+
+_WORD = re.compile(r"\w+")
+
+
+def _numpy():
+    try:
+        import numpy  # type: ignore
+    except ImportError:  # pragma: no cover - numpy is listed in requirements
+        return None
+    return numpy
+
+
+@lru_cache(maxsize=65536)
+def _word_hash(word: str) -> int:
+    return zlib.crc32(word.encode("utf-8"))
 
 
 class DeterministicEmbedding:
     """Deterministic hash-based embeddings for local development."""
 
+    model_name = "sha256-digest"
+
     def embed(self, text: str) -> List[float]:
         digest = hashlib.sha256(text.encode("utf-8")).digest()
-        return [b / 255.0 for b in digest]
\ No newline at end of file
+        return [b / 255.0 for b in digest]
+
+    async def aembed(self, text: str) -> List[float]:
+        return self.embed(text)
+
+    def embed_batch(self, texts: Sequence[str]) -> List[List[float]]:
+        return [self.embed(text) for text in texts]
+
+    async def aembed_batch(self, texts: Sequence[str]) -> List[List[float]]:
+        return self.embed_batch(texts)
+
+
+class HashingEmbedding:
+    """CPU-only embeddings from hashed word and character n-grams.
+
+    Word 1..``word_ngrams``-grams and character ``char_ngrams`` windows are hashed into
+    ``dimension`` signed buckets (the sign comes from another hash bit, so collisions tend to
+    cancel instead of adding up). Bucket sums are damped with ``log1p`` as a sublinear term
+    frequency and every row is L2-normalized, so cosine similarity tracks shared vocabulary and
+    spelling. Character hashing runs as NumPy array arithmetic over the whole batch at once.
+    """
+
+    def __init__(
+        self,
+        dimension: int = 1536,
+        word_ngrams: int = 2,
+        char_ngrams: Tuple[int, int] = (3, 5),
+        char_weight: float = 0.5,
+    ) -> None:
+        np = _numpy()
+        if np is None:
+            raise RuntimeError("numpy is required for the hashing embedder")
+        if dimension <= 0:
+            raise ValueError("dimension must be positive")
+        self._np = np
+        self.dimension = dimension
+        self._word_ngrams = word_ngrams
+        self._char_ngrams = char_ngrams
+        self._char_weight = char_weight
+
+    @property
+    def model_name(self) -> str:
+        low, high = self._char_ngrams
+        return f"hashing-{self.dimension}-w{self._word_ngrams}-c{low}-{high}-{self._char_weight:g}"
+
+    def embed(self, text: str) -> List[float]:
+        return self.embed_matrix([text])[0].tolist()
+
+    async def aembed(self, text: str) -> List[float]:
+        return self.embed(text)
+
+    def embed_batch(self, texts: Sequence[str]) -> List[List[float]]:
+        return self.embed_matrix(texts).tolist()
+
+    async def aembed_batch(self, texts: Sequence[str]) -> List[List[float]]:
+        return await run_blocking(self.embed_batch, texts)
+
+    def embed_matrix(self, texts: Sequence[str]):
+        """Embed ``texts`` as one ``(len(texts), dimension)`` float32 array."""
+
+        np = self._np
+        word_rows, word_keys = self._word_features(texts)
+        char_rows, char_keys = self._char_features(texts)
+        rows = np.concatenate([word_rows, char_rows])
+        keys = self._mix(np.concatenate([word_keys, char_keys]))
+        weights = np.concatenate([np.ones(len(word_keys)), np.full(len(char_keys), self._char_weight)])
+
+        # Multiply-shift maps the high 32 bits onto [0, dimension); the low bit picks the sign.
+        buckets = (((keys >> np.uint64(32)) * np.uint64(self.dimension)) >> np.uint64(32)).astype(np.int64)
+        weights *= 1.0 - 2.0 * (keys & np.uint64(1))
+        sums = np.bincount(
+            rows * self.dimension + buckets, weights=weights, minlength=len(texts) * self.dimension
+        ).reshape(len(texts), self.dimension)
+        matrix = (np.sign(sums) * np.log1p(np.abs(sums))).astype(np.float32)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        np.divide(matrix, norms, out=matrix, where=norms > 0)
+        return matrix
+
+    def _word_features(self, texts: Sequence[str]):
+        np = self._np
+        words: List[str] = []
+        sizes = np.zeros(len(texts), dtype=np.int64)
+        for row, text in enumerate(texts):
+            tokens = _WORD.findall(text.lower())
+            words.extend(tokens)
+            sizes[row] = len(tokens)
+        hashes = np.fromiter(map(_word_hash, words), dtype=np.uint64, count=len(words))
+        owner = np.repeat(np.arange(len(texts), dtype=np.int64), sizes)
+        return self._ngrams(hashes, owner, range(1, self._word_ngrams + 1))
+
+    def _char_features(self, texts: Sequence[str]):
+        np = self._np
+        # One byte stream for the batch, with a separator (owner -1) after each text.
+        encoded = [(" " + " ".join(text.lower().split()) + " ").encode("utf-8") for text in texts]
+        data = np.frombuffer(b"".join(chunk + b"\0" for chunk in encoded), dtype=np.uint8).astype(np.uint64)
+        sizes = np.array([len(chunk) + 1 for chunk in encoded], dtype=np.int64)
+        owner = np.repeat(np.arange(len(texts), dtype=np.int64), sizes)
+        owner[np.cumsum(sizes) - 1] = -1
+        low, high = self._char_ngrams
+        return self._ngrams(data, owner, range(low, high + 1))
+
+    def _ngrams(self, symbols, owner, sizes: Sequence[int]):
+        """Fold each window of ``n`` symbols into one key; windows must lie within one text."""
+
+        np = self._np
+        row_parts = [np.zeros(0, dtype=np.int64)]
+        key_parts = [np.zeros(0, dtype=np.uint64)]
+        for n in sizes:
+            count = len(symbols) - n + 1
+            if count <= 0:
+                continue
+            # The seed keeps n-gram sizes apart.
+            keys = np.full(count, n, dtype=np.uint64)
+            for offset in range(n):
+                keys = keys * np.uint64(0x100000001B3) + symbols[offset:offset + count]
+            valid = (owner[:count] == owner[n - 1:n - 1 + count]) & (owner[:count] >= 0)
+            key_parts.append(keys[valid])
+            row_parts.append(owner[:count][valid])
+        return np.concatenate(row_parts), np.concatenate(key_parts)
+
+    def _mix(self, keys):
+        """64-bit finalizer (from MurmurHash3) so bucket and sign bits depend on every input bit."""
+
+        np = self._np
+        keys = keys ^ (keys >> np.uint64(33))
+        keys = keys * np.uint64(0xFF51AFD7ED558CCD)
+        keys = keys ^ (keys >> np.uint64(33))
+        keys = keys * np.uint64(0xC4CEB9FE1A85EC53)
+        return keys ^ (keys >> np.uint64(33))
@@ -1,17 +1,22 @@
 from __future__ import annotations
 
-try:
-    from google import genai  # type: ignore[attr-defined]
-except ImportError:  # pragma: no cover - optional dependency guard
-    genai = None  # type: ignore
-
 from src.orchestrator.intents import Intent
+from src.utils.metrics import observe_adapter
+
+
+def _genai():
+    try:
+        from google import genai  # type: ignore[attr-defined]
+    except ImportError:  # pragma: no cover - optional dependency guard
+        return None
+    return genai
 
 
 class IntentClassifier:
     """LLM-backed intent classifier using Gemini."""
 
     def __init__(self, model_name: str, api_key: str) -> None:
+        genai = _genai()
         if genai is None:
             raise RuntimeError("google-genai package is required for intent classification")
         if not api_key:
@@ -20,12 +25,26 @@ class IntentClassifier:
         self._model_name = model_name
 
     def classify(self, state) -> Intent:
-        prompt = (
+        with observe_adapter("gemini", "generate_content"):
+            response = self._client.models.generate_content(model=self._model_name, contents=self._prompt(state))
+        return self._parse_label(response)
+
+    async def aclassify(self, state) -> Intent:
+        with observe_adapter("gemini", "generate_content"):
+            response = await self._client.aio.models.generate_content(
+                model=self._model_name, contents=self._prompt(state)
+            )
+        return self._parse_label(response)
+
+    @staticmethod
+    def _prompt(state) -> str:
+        return (
             "Classify the user intent into one of RAG_INFO, PURCHASE_INTEREST, BOOKING,"
             " or CANCEL_BOOKING. Only return the label. Query: "
             f"{state.user_query}"
         )
-        response = self._client.models.generate_content(model=self._model_name, contents=prompt)
+
+    def _parse_label(self, response) -> Intent:
         text = self._extract_text(response)
         label = text.strip().upper()
         return Intent.from_label(label)
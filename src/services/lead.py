@@ -1,8 +1,10 @@
 ﻿from __future__ import annotations
 
-from typing import Dict, Optional
+from typing import Any, Dict, Optional
 
 from src.adapters.email_client import EmailClient
+from src.adapters.mongo_client import AsyncCollectionProtocol, ThreadedAsyncCollection
+from src.utils.metrics import observe_adapter
 
 
 class LeadService:
@@ -10,9 +12,15 @@ class LeadService:
 
     REQUIRED_FIELDS = {"name", "email", "product_interest", "interest_reason"}
 
-    def __init__(self, collection, email_client: EmailClient) -> None:
+    def __init__(
+        self,
+        collection,
+        email_client: EmailClient,
+        async_collection: Optional[AsyncCollectionProtocol] = None,
+    ) -> None:
         self._collection = collection
         self._email_client = email_client
+        self._async_collection = async_collection or ThreadedAsyncCollection(collection)
 
     def capture_lead_step(
         self,
@@ -34,7 +42,28 @@ class LeadService:
         return all(field in lead_data and lead_data[field] for field in self.REQUIRED_FIELDS)
 
     def persist_lead(self, context: Dict[str, str], lead_data: Dict[str, Optional[str]]):
-        payload = {
+        payload = self._lead_payload(context, lead_data)
+        with observe_adapter("mongo", "insert_one", context["org_id"]):
+            result = self._collection.insert_one(payload)
+        lead_id = str(result.inserted_id)
+        if payload["email"]:
+            with observe_adapter("email", "send", context["org_id"]):
+                self._email_client.send(**self._confirmation_email(payload))
+        return {"id": lead_id, **payload}
+
+    async def apersist_lead(self, context: Dict[str, str], lead_data: Dict[str, Optional[str]]):
+        payload = self._lead_payload(context, lead_data)
+        with observe_adapter("mongo", "insert_one", context["org_id"]):
+            result = await self._async_collection.insert_one(payload)
+        lead_id = str(result.inserted_id)
+        if payload["email"]:
+            with observe_adapter("email", "send", context["org_id"]):
+                await self._email_client.asend(**self._confirmation_email(payload))
+        return {"id": lead_id, **payload}
+
+    @staticmethod
+    def _lead_payload(context: Dict[str, str], lead_data: Dict[str, Optional[str]]) -> Dict[str, Any]:
+        return {
             "org_id": context["org_id"],
             "branch_id": context["branch_id"],
             "name": lead_data.get("name"),
@@ -45,12 +74,11 @@ class LeadService:
             "budget_expectation": lead_data.get("budget_expectation"),
             "lead_status": lead_data.get("lead_status", "NEW"),
         }
-        result = self._collection.insert_one(payload)
-        lead_id = str(result.inserted_id)
-        if payload["email"]:
-            self._email_client.send(
-                recipient=payload["email"],
-                subject="Thanks for your interest",
-                body="We will reach out shortly with more information.",
-            )
-        return {"id": lead_id, **payload}
\ No newline at end of file
+
+    @staticmethod
+    def _confirmation_email(payload: Dict[str, Any]) -> Dict[str, str]:
+        return {
+            "recipient": payload["email"],
+            "subject": "Thanks for your interest",
+            "body": "We will reach out shortly with more information.",
+        }
\ No newline at end of file
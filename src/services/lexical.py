@@ -0,0 +1,243 @@
+from __future__ import annotations
+
+import math
+import re
+import threading
+from array import array
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Mapping, Sequence, Tuple
+
+from src.adapters.pinecone_client import match_to_dict
+
+_TOKEN = re.compile(r"[0-9a-z]+(?:[-_./][0-9a-z]+)*")
+_PARTS = re.compile(r"[-_./]")
+
+Document = Tuple[str, str, Mapping[str, Any]]
+
+
+def _numpy():
+    try:
+        import numpy  # type: ignore
+    except ImportError:  # pragma: no cover - numpy is listed in requirements
+        return None
+    return numpy
+
+
+def tokenize(text: str) -> List[str]:
+    """Lower-cased word tokens; compounds such as ``SKU-1234`` also yield their parts."""
+
+    tokens: List[str] = []
+    for token in _TOKEN.findall(text.lower()):
+        tokens.append(token)
+        if _PARTS.search(token):
+            tokens.extend(part for part in _PARTS.split(token) if part)
+    return tokens
+
+
+@dataclass
+class LexicalIndexStats:
+    namespaces: int
+    documents: int
+    terms: int
+    postings_bytes: int
+
+
+class _Postings:
+    """Doc ids and term frequencies for one term as parallel packed arrays."""
+
+    __slots__ = ("docs", "freqs")
+
+    def __init__(self) -> None:
+        self.docs = array("I")
+        self.freqs = array("H")
+
+
+class _NamespaceIndex:
+    def __init__(self) -> None:
+        self.ids: List[str] = []
+        self.metadata: List[Mapping[str, Any]] = []
+        self.lengths = array("I")
+        self.total_length = 0
+        self.rows: Dict[str, int] = {}
+        self.dead = array("B")
+        self.dead_count = 0
+        self.postings: Dict[str, _Postings] = {}
+        self.lock = threading.Lock()
+
+    @property
+    def live_count(self) -> int:
+        return len(self.rows)
+
+    @property
+    def dead_ratio(self) -> float:
+        return self.dead_count / len(self.ids) if self.ids else 0.0
+
+    def add(self, record_id: str, text: str, metadata: Mapping[str, Any]) -> None:
+        counts: Dict[str, int] = {}
+        for token in tokenize(text):
+            counts[token] = counts.get(token, 0) + 1
+        with self.lock:
+            previous = self.rows.get(record_id)
+            if previous is not None:
+                self.dead[previous] = 1
+                self.dead_count += 1
+                self.total_length -= self.lengths[previous]
+            row = len(self.ids)
+            self.ids.append(record_id)
+            self.metadata.append(metadata)
+            length = sum(counts.values())
+            self.lengths.append(length)
+            self.dead.append(0)
+            self.total_length += length
+            self.rows[record_id] = row
+            for token, count in counts.items():
+                postings = self.postings.get(token)
+                if postings is None:
+                    postings = self.postings[token] = _Postings()
+                postings.docs.append(row)
+                postings.freqs.append(min(count, 0xFFFF))
+
+    def search(self, query: str, top_k: int, k1: float, b: float) -> List[Dict[str, Any]]:
+        np = _numpy()
+        terms = set(tokenize(query))
+        with self.lock:
+            live = self.live_count
+            if not live or not terms:
+                return []
+            size = len(self.ids)
+            avg_length = max(self.total_length / live, 1.0)
+            lengths = np.frombuffer(self.lengths, dtype=np.uint32, count=size).astype(np.float32)
+            dead = np.frombuffer(self.dead, dtype=np.uint8, count=size).astype(bool)
+            scores = np.zeros(size, dtype=np.float32)
+            for term in terms:
+                postings = self.postings.get(term)
+                if postings is None:
+                    continue
+                # astype copies, so no view keeps the growable array's buffer exported.
+                docs = np.frombuffer(postings.docs, dtype=np.uint32).astype(np.intp)
+                freqs = np.frombuffer(postings.freqs, dtype=np.uint16).astype(np.float32)
+                # Replaced rows keep their postings until compaction; IDF counts live documents only.
+                live_postings = ~dead[docs]
+                docs, freqs = docs[live_postings], freqs[live_postings]
+                frequency = len(docs)
+                if not frequency:
+                    continue
+                idf = math.log(1.0 + (live - frequency + 0.5) / (frequency + 0.5))
+                norm = k1 * (1.0 - b + b * lengths[docs] / avg_length)
+                scores[docs] += idf * freqs * (k1 + 1.0) / (freqs + norm)
+            ids, metadata = self.ids, self.metadata
+        scores[dead] = 0.0
+        hits = np.flatnonzero(scores > 0)
+        if not len(hits):
+            return []
+        k = min(top_k, len(hits))
+        best = hits[np.argpartition(-scores[hits], k - 1)[:k]]
+        best = best[np.argsort(-scores[best], kind="stable")]
+        return [{"id": ids[row], "score": float(scores[row]), "metadata": dict(metadata[row])} for row in best]
+
+    def compact(self) -> None:
+        """Rewrite the partition without replaced rows, renumbering the live ones."""
+
+        np = _numpy()
+        with self.lock:
+            if not self.dead_count:
+                return
+            size = len(self.ids)
+            alive = np.frombuffer(self.dead, dtype=np.uint8, count=size) == 0
+            renumber = np.cumsum(alive, dtype=np.int64) - 1
+            kept = np.flatnonzero(alive)
+            self.ids = [self.ids[row] for row in kept]
+            self.metadata = [self.metadata[row] for row in kept]
+            self.lengths = array("I", (self.lengths[row] for row in kept))
+            self.dead = array("B", bytes(len(kept)))
+            self.dead_count = 0
+            self.rows = {record_id: row for row, record_id in enumerate(self.ids)}
+            for term in list(self.postings):
+                postings = self.postings[term]
+                docs = np.frombuffer(postings.docs, dtype=np.uint32).astype(np.intp)
+                live = alive[docs]
+                if not live.any():
+                    del self.postings[term]
+                    continue
+                compacted = _Postings()
+                compacted.docs.frombytes(renumber[docs[live]].astype(np.uint32).tobytes())
+                compacted.freqs.frombytes(np.frombuffer(postings.freqs, dtype=np.uint16)[live].tobytes())
+                self.postings[term] = compacted
+
+    def postings_bytes(self) -> int:
+        with self.lock:
+            return sum(
+                postings.docs.itemsize * len(postings.docs) + postings.freqs.itemsize * len(postings.freqs)
+                for postings in self.postings.values()
+            )
+
+
+class LexicalIndex:
+    """In-process BM25 inverted index with one partition per vector-store namespace.
+
+    ``IngestionPipeline`` adds each chunk after its vectors are upserted, and ``RagService``
+    fuses the lexical ranking with the vector ranking. Exact terms such as product names and
+    SKUs can then match even when the embedding carries no meaning for them. Postings are packed
+    ``array`` buffers (4-byte doc ids, 2-byte term frequencies) scored with vectorized NumPy.
+    Re-adding an id replaces its row; once replaced rows make up ``compact_dead_ratio`` of a
+    partition, it is rewritten without them, so repeated re-ingestion keeps the index size flat.
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75, compact_dead_ratio: float = 0.5) -> None:
+        if _numpy() is None:
+            raise RuntimeError("numpy is required for the lexical index")
+        self._k1 = k1
+        self._b = b
+        self._compact_dead_ratio = compact_dead_ratio
+        self._namespaces: Dict[str, _NamespaceIndex] = {}
+        self._lock = threading.Lock()
+
+    def add(self, namespace: str, documents: Iterable[Document]) -> int:
+        with self._lock:
+            partition = self._namespaces.setdefault(namespace, _NamespaceIndex())
+        added = 0
+        for record_id, text, metadata in documents:
+            partition.add(record_id, text, metadata)
+            added += 1
+        if partition.dead_count and partition.dead_ratio >= self._compact_dead_ratio:
+            partition.compact()
+        return added
+
+    def search(self, namespace: str, query: str, top_k: int = 5) -> List[Dict[str, Any]]:
+        partition = self._namespaces.get(namespace)
+        if partition is None or top_k <= 0:
+            return []
+        return partition.search(query, top_k, self._k1, self._b)
+
+    def stats(self) -> LexicalIndexStats:
+        partitions = list(self._namespaces.values())
+        return LexicalIndexStats(
+            namespaces=len(partitions),
+            documents=sum(partition.live_count for partition in partitions),
+            terms=sum(len(partition.postings) for partition in partitions),
+            postings_bytes=sum(partition.postings_bytes() for partition in partitions),
+        )
+
+
+def reciprocal_rank_fusion(
+    rankings: Sequence[Sequence[Any]],
+    limit: int,
+    k: int = 60,
+) -> List[Dict[str, Any]]:
+    """Merge ranked match lists by summed ``1 / (k + rank)``; the fused value becomes ``score``.
+
+    Matches may be dicts or Pinecone SDK ``ScoredVector`` objects.
+    """
+
+    fused: Dict[str, Dict[str, Any]] = {}
+    totals: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, match in enumerate(map(match_to_dict, ranking), start=1):
+            match_id = match.get("id")
+            if match_id is None:
+                continue
+            totals[match_id] = totals.get(match_id, 0.0) + 1.0 / (k + rank)
+            if match_id not in fused or not fused[match_id].get("metadata"):
+                fused[match_id] = match
+    ordered = sorted(totals, key=totals.get, reverse=True)[:limit]
+    return [{**fused[match_id], "score": totals[match_id]} for match_id in ordered]
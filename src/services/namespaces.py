@@ -0,0 +1,36 @@
+from __future__ import annotations
+
+from typing import Any, Dict, Mapping
+
+DEFAULT_ORG_ID = "default_org"
+DEFAULT_BRANCH_ID = "default_branch"
+NAMESPACE_SEPARATOR = "::"
+
+# Namespace that held every tenant's vectors, separated only by org/branch metadata.
+LEGACY_NAMESPACE = ""
+
+
+def tenant_namespace(context: Mapping[str, Any]) -> str:
+    """Vector-store namespace for a tenant; ingestion writes and retrieval reads only here."""
+
+    org_id = context.get("org_id", DEFAULT_ORG_ID)
+    branch_id = context.get("branch_id", DEFAULT_BRANCH_ID)
+    return f"{org_id}{NAMESPACE_SEPARATOR}{branch_id}"
+
+
+def legacy_tenant_filter(context: Mapping[str, Any]) -> Dict[str, Any]:
+    """Metadata filter that selected a tenant's vectors in :data:`LEGACY_NAMESPACE`."""
+
+    return {
+        "$and": [
+            {"org_id": context.get("org_id", DEFAULT_ORG_ID)},
+            {"branch_id": context.get("branch_id", DEFAULT_BRANCH_ID)},
+        ]
+    }
+
+
+def org_namespaces(namespaces, org_id: str) -> Dict[str, str]:
+    """Map each of ``org_id``'s branch namespaces among ``namespaces`` to its branch id."""
+
+    prefix = f"{org_id}{NAMESPACE_SEPARATOR}"
+    return {namespace: namespace[len(prefix):] for namespace in namespaces if namespace.startswith(prefix)}
@@ -1,8 +1,32 @@
 ﻿from __future__ import annotations
 
-from typing import Dict, List, Protocol
+import asyncio
+import heapq
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Protocol
 
-from src.adapters.pinecone_client import PineconeIndexProtocol
+from src.adapters.pinecone_client import (
+    AsyncPineconeIndexProtocol,
+    PineconeIndexProtocol,
+    ThreadedAsyncIndex,
+    match_to_dict,
+)
+from src.services.context_packing import ContextPacker
+from src.services.lexical import LexicalIndex, reciprocal_rank_fusion
+from src.services.namespaces import (
+    LEGACY_NAMESPACE,
+    legacy_tenant_filter,
+    org_namespaces,
+    tenant_namespace,
+)
+from src.services.retrieval_cache import RetrievalCache
+from src.services.semantic_cache import SemanticCache
+from src.utils.aio import run_blocking
+from src.utils.metrics import observe_adapter
+
+logger = logging.getLogger(__name__)
 
 
 class EmbeddingProvider(Protocol):
@@ -10,30 +34,278 @@ class EmbeddingProvider(Protocol):
         ...
 
 
+@dataclass
+class RetrievalResult:
+    answer: str
+    snippets: List[Dict[str, Any]] = field(default_factory=list)
+
+    def copy(self) -> "RetrievalResult":
+        return RetrievalResult(answer=self.answer, snippets=[dict(snippet) for snippet in self.snippets])
+
+
+@dataclass
+class ShardStatus:
+    branch_id: str
+    namespace: str
+    status: str  # "ok", "timeout" or "error"
+    matches: int = 0
+    elapsed_ms: float = 0.0
+
+
+@dataclass
+class OrgRetrievalResult(RetrievalResult):
+    """Result of an org-wide fan-out; snippets carry the ``branch_id`` they came from."""
+
+    shards: List[ShardStatus] = field(default_factory=list)
+
+    @property
+    def partial(self) -> bool:
+        return any(shard.status != "ok" for shard in self.shards)
+
+
+NO_RESULTS_ANSWER = "I could not find information for that request."
+
+
 class RagService:
-    """Handles multi-tenant retrieval over the vector store."""
+    """Handles multi-tenant retrieval over the vector store.
 
-    def __init__(self, pinecone_index: PineconeIndexProtocol, embedder: EmbeddingProvider) -> None:
+    Each tenant's vectors live in their own namespace (see ``tenant_namespace``), so a query
+    only scans that tenant's data. ``legacy_fallback`` additionally searches the shared legacy
+    namespace with an org/branch filter when the tenant namespace has no matches, for tenants
+    whose vectors have not been migrated yet. With a ``lexical_index`` the BM25 ranking for the
+    same namespace is fused with the vector ranking by reciprocal rank. A ``packer`` then removes
+    overlapping chunks, diversifies them with MMR and fits them to a token budget. The exact
+    ``cache`` is consulted before embedding; the ``semantic_cache`` after it, so paraphrases of a
+    recent question reuse its result without querying the index.
+    """
+
+    def __init__(
+        self,
+        pinecone_index: PineconeIndexProtocol,
+        embedder: EmbeddingProvider,
+        async_index: Optional[AsyncPineconeIndexProtocol] = None,
+        cache: Optional[RetrievalCache] = None,
+        top_k: int = 5,
+        legacy_fallback: bool = False,
+        lexical_index: Optional[LexicalIndex] = None,
+        packer: Optional[ContextPacker] = None,
+        semantic_cache: Optional[SemanticCache] = None,
+        fanout_concurrency: int = 8,
+        shard_timeout_s: float = 1.5,
+    ) -> None:
         self._index = pinecone_index
         self._embedder = embedder
+        self._async_index = async_index or ThreadedAsyncIndex(pinecone_index)
+        self._cache = cache
+        self._top_k = top_k
+        self._legacy_fallback = legacy_fallback
+        self._lexical_index = lexical_index
+        self._packer = packer
+        self._semantic_cache = semantic_cache
+        self._fanout_concurrency = max(1, fanout_concurrency)
+        self._shard_timeout_s = shard_timeout_s
 
     def answer_query(self, context: Dict[str, str], query: str, history: List[Dict[str, str]]) -> str:
-        filter_payload = {
-            "$and": [
-                {"org_id": context["org_id"]},
-                {"branch_id": context["branch_id"]},
-            ]
-        }
+        return self.retrieve(context=context, query=query, history=history).answer
+
+    async def aanswer_query(self, context: Dict[str, str], query: str, history: List[Dict[str, str]]) -> str:
+        return (await self.aretrieve(context=context, query=query, history=history)).answer
+
+    def retrieve(self, context: Dict[str, str], query: str, history: List[Dict[str, str]]) -> RetrievalResult:
+        cache_key = self._cache.key(context, query, self._top_k) if self._cache else None
+        if cache_key is not None:
+            cached = self._cache.get(cache_key)
+            if cached is not None:
+                return cached
+        version = self._semantic_cache.versions.current(context) if self._semantic_cache else None
         vector = self._embedder.embed(query)
-        result = self._index.query(
-            vector=vector,
-            top_k=5,
-            include_metadata=True,
-            filter=filter_payload,
+        similar = self._semantic_cache.get(context, vector) if self._semantic_cache else None
+        if similar is not None:
+            return self._remember(cache_key, similar)
+        with observe_adapter("pinecone", "query", context.get("org_id", "")):
+            result = self._index.query(vector=vector, **self._query_kwargs(context))
+        if self._legacy_fallback and not result.get("matches"):
+            with observe_adapter("pinecone", "query_legacy", context.get("org_id", "")):
+                result = self._index.query(vector=vector, **self._legacy_query_kwargs(context))
+        composed = self._compose(self._pack(self._fuse(context, query, result)))
+        return self._remember(cache_key, composed, context, vector, version)
+
+    async def aretrieve(self, context: Dict[str, str], query: str, history: List[Dict[str, str]]) -> RetrievalResult:
+        cache_key = self._cache.key(context, query, self._top_k) if self._cache else None
+        if cache_key is not None:
+            cached = self._cache.get(cache_key)
+            if cached is not None:
+                return cached
+        version = self._semantic_cache.versions.current(context) if self._semantic_cache else None
+        vector = await self._aembed(query)
+        similar = self._semantic_cache.get(context, vector) if self._semantic_cache else None
+        if similar is not None:
+            return self._remember(cache_key, similar)
+        with observe_adapter("pinecone", "query", context.get("org_id", "")):
+            result = await self._async_index.query(vector=vector, **self._query_kwargs(context))
+        if self._legacy_fallback and not result.get("matches"):
+            with observe_adapter("pinecone", "query_legacy", context.get("org_id", "")):
+                result = await self._async_index.query(vector=vector, **self._legacy_query_kwargs(context))
+        composed = self._compose(self._pack(self._fuse(context, query, result)))
+        return self._remember(cache_key, composed, context, vector, version)
+
+    async def aretrieve_org(
+        self,
+        org_id: str,
+        query: str,
+        branch_ids: Optional[Iterable[str]] = None,
+        top_k: Optional[int] = None,
+    ) -> OrgRetrievalResult:
+        """Search every branch namespace of ``org_id`` (or just ``branch_ids``) concurrently.
+
+        At most ``fanout_concurrency`` shard queries run at once and each gets
+        ``shard_timeout_s``. Shards that time out or fail are reported in ``shards`` and the
+        merged global top-k is built from the rest.
+        """
+
+        limit = top_k or self._top_k
+        if branch_ids is None:
+            namespaces = await self._org_namespaces(org_id)
+        else:
+            namespaces = {tenant_namespace({"org_id": org_id, "branch_id": branch}): branch for branch in branch_ids}
+        if not namespaces:
+            return OrgRetrievalResult(answer=NO_RESULTS_ANSWER)
+
+        vector = await self._aembed(query)
+        semaphore = asyncio.Semaphore(self._fanout_concurrency)
+        query_kwargs: Dict[str, Any] = {"top_k": limit, "include_metadata": True}
+        if self._packer is not None and self._packer.needs_vectors:
+            query_kwargs["include_values"] = True
+
+        async def search(namespace: str, branch_id: str):
+            async with semaphore:
+                started = time.perf_counter()
+                try:
+                    with observe_adapter("pinecone", "query", org_id):
+                        result = await asyncio.wait_for(
+                            self._async_index.query(vector=vector, namespace=namespace, **query_kwargs),
+                            timeout=self._shard_timeout_s,
+                        )
+                except asyncio.TimeoutError:
+                    status, matches = "timeout", []
+                except Exception:
+                    logger.warning("Fan-out shard failed", exc_info=True, extra={"namespace": namespace})
+                    status, matches = "error", []
+                else:
+                    status, matches = "ok", result.get("matches", [])
+                elapsed_ms = (time.perf_counter() - started) * 1000
+            shard = ShardStatus(branch_id, namespace, status, len(matches), round(elapsed_ms, 2))
+            return shard, [self._with_branch(match_to_dict(match), branch_id) for match in matches]
+
+        outcomes = await asyncio.gather(*(search(namespace, branch) for namespace, branch in namespaces.items()))
+        merged = heapq.nlargest(
+            limit,
+            (match for _, matches in outcomes for match in matches),
+            key=lambda match: match.get("score") or 0.0,
         )
+        packed = self._pack({"matches": merged})
+        composed = self._compose(packed)
+        # Snippets follow the packed matches that carry metadata, which is where the branch travels.
+        with_metadata = [match for match in packed["matches"] if match.get("metadata")]
+        for snippet, match in zip(composed.snippets, with_metadata):
+            snippet["branch_id"] = match["metadata"]["branch_id"]
+        return OrgRetrievalResult(
+            answer=composed.answer,
+            snippets=composed.snippets,
+            shards=[shard for shard, _ in outcomes],
+        )
+
+    def retrieve_org(
+        self,
+        org_id: str,
+        query: str,
+        branch_ids: Optional[Iterable[str]] = None,
+        top_k: Optional[int] = None,
+    ) -> OrgRetrievalResult:
+        """Blocking wrapper around :meth:`aretrieve_org` for code outside the event loop."""
+
+        return asyncio.run(self.aretrieve_org(org_id, query, branch_ids=branch_ids, top_k=top_k))
+
+    async def _org_namespaces(self, org_id: str) -> Dict[str, str]:
+        describe = getattr(self._async_index, "describe_index_stats", None)
+        if describe is None:
+            raise RuntimeError("Org-wide retrieval needs an index that supports describe_index_stats")
+        with observe_adapter("pinecone", "describe_index_stats", org_id):
+            stats = await describe()
+        namespaces = stats.get("namespaces", {}) if isinstance(stats, dict) else getattr(stats, "namespaces", {})
+        return org_namespaces(namespaces, org_id)
+
+    def _remember(
+        self,
+        cache_key,
+        result: RetrievalResult,
+        context: Optional[Dict[str, str]] = None,
+        vector: Optional[List[float]] = None,
+        version: Optional[int] = None,
+    ) -> RetrievalResult:
+        # Both caches are tagged with the namespace version read before the query, so a result
+        # that raced an ingestion is never served afterwards.
+        if cache_key is not None:
+            self._cache.put(cache_key, result)
+        if self._semantic_cache is not None and vector is not None:
+            self._semantic_cache.put(context, vector, result, version)
+        return result
+
+    async def _aembed(self, text: str) -> List[float]:
+        aembed = getattr(self._embedder, "aembed", None)
+        if aembed is not None:
+            return await aembed(text)
+        return await run_blocking(self._embedder.embed, text)
+
+    def _fuse(self, context: Dict[str, str], query: str, result: Dict[str, Any]) -> Dict[str, Any]:
+        if self._lexical_index is None:
+            return result
+        lexical = self._lexical_index.search(tenant_namespace(context), query, top_k=self._top_k)
+        if not lexical:
+            return result
+        vector = [match_to_dict(match) for match in result.get("matches", [])]
+        return {"matches": reciprocal_rank_fusion([vector, lexical], limit=self._top_k)}
+
+    @staticmethod
+    def _with_branch(match: Dict[str, Any], branch_id: str) -> Dict[str, Any]:
+        # Shards of different branches can return the same id, so the branch rides in the metadata.
+        if match.get("metadata"):
+            match["metadata"] = {**match["metadata"], "branch_id": branch_id}
+        return match
+
+    def _pack(self, result: Dict[str, Any]) -> Dict[str, Any]:
+        if self._packer is None:
+            return result
+        return {"matches": self._packer.pack(result.get("matches", []))}
+
+    def _query_kwargs(self, context: Dict[str, str]) -> Dict[str, Any]:
+        kwargs = {"top_k": self._top_k, "include_metadata": True, "namespace": tenant_namespace(context)}
+        if self._packer is not None and self._packer.needs_vectors:
+            kwargs["include_values"] = True
+        return kwargs
+
+    def _legacy_query_kwargs(self, context: Dict[str, str]) -> Dict[str, Any]:
+        return {
+            **self._query_kwargs(context),
+            "namespace": LEGACY_NAMESPACE,
+            "filter": legacy_tenant_filter(context),
+        }
+
+    @staticmethod
+    def _compose(result: Dict[str, Any]) -> RetrievalResult:
         matches = result.get("matches", [])
-        context_snippets = [match["metadata"].get("text", "") for match in matches if match.get("metadata")]
+        snippets = [
+            {
+                "id": match.get("id"),
+                "score": match.get("score"),
+                "text": match["metadata"].get("text", ""),
+                "source_path": match["metadata"].get("source_path"),
+            }
+            for match in matches
+            if match.get("metadata")
+        ]
+        context_snippets = [snippet["text"] for snippet in snippets]
         if not context_snippets:
-            return "I could not find information for that request."
+            return RetrievalResult(answer=NO_RESULTS_ANSWER)
         response = "\n".join(context_snippets)
-        return response
\ No newline at end of file
+        return RetrievalResult(answer=response, snippets=snippets)
\ No newline at end of file
@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Callable, Dict, Mapping, Optional, Tuple
+
+from src.services.embedding_cache import normalize_text
+from src.services.namespaces import tenant_namespace
+
+if TYPE_CHECKING:  # pragma: no cover
+    from src.services.rag import RetrievalResult
+
+CacheKey = Tuple[str, str, int, int]
+
+
+class NamespaceVersions:
+    """Per-namespace version counters shared by ingestion and retrieval.
+
+    ``IngestionPipeline.run`` bumps the counter once new vectors are visible, which makes every
+    cached retrieval for that namespace unreachable without scanning the cache.
+    """
+
+    def __init__(self) -> None:
+        self._versions: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def current(self, context: Mapping[str, str]) -> int:
+        return self._versions.get(tenant_namespace(context), 0)
+
+    def bump(self, context: Mapping[str, str]) -> int:
+        key = tenant_namespace(context)
+        with self._lock:
+            version = self._versions.get(key, 0) + 1
+            self._versions[key] = version
+        return version
+
+
+@dataclass
+class RetrievalCacheStats:
+    entries: int
+    hits: int
+    misses: int
+    evictions: int
+    expirations: int
+
+
+class RetrievalCache:
+    """LRU + TTL cache of retrieval results keyed by namespace, normalized query, top_k and version.
+
+    Entries written before a namespace version bump are never served again and age out of the
+    LRU. The TTL bounds staleness for ingestions that ran in another process.
+    """
+
+    def __init__(
+        self,
+        versions: Optional[NamespaceVersions] = None,
+        ttl_seconds: float = 300.0,
+        max_entries: int = 10_000,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.versions = versions or NamespaceVersions()
+        self._ttl = ttl_seconds
+        self._max_entries = max_entries
+        self._clock = clock
+        self._entries: "OrderedDict[CacheKey, Tuple[float, RetrievalResult]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+
+    def key(self, context: Mapping[str, str], query: str, top_k: int) -> CacheKey:
+        namespace = tenant_namespace(context)
+        return (namespace, normalize_text(query), top_k, self.versions.current(context))
+
+    def get(self, key: CacheKey) -> Optional["RetrievalResult"]:
+        now = self._clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._misses += 1
+                return None
+            expires_at, result = entry
+            if expires_at <= now:
+                del self._entries[key]
+                self._expirations += 1
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+        return result.copy()
+
+    def put(self, key: CacheKey, result: "RetrievalResult") -> None:
+        if self._max_entries <= 0:
+            return
+        expires_at = self._clock() + self._ttl
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = (expires_at, result.copy())
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+
+    def stats(self) -> RetrievalCacheStats:
+        with self._lock:
+            return RetrievalCacheStats(
+                entries=len(self._entries),
+                hits=self._hits,
+                misses=self._misses,
+                evictions=self._evictions,
+                expirations=self._expirations,
+            )
@@ -0,0 +1,234 @@
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, List, Mapping, Optional, Sequence
+
+from src.services.namespaces import tenant_namespace
+from src.services.retrieval_cache import NamespaceVersions
+from src.utils.vectors import block_dot
+
+if TYPE_CHECKING:  # pragma: no cover
+    from src.services.rag import RetrievalResult
+
+
+def _numpy():
+    try:
+        import numpy  # type: ignore
+    except ImportError:  # pragma: no cover - numpy is listed in requirements
+        return None
+    return numpy
+
+
+def _text_bytes(result: "RetrievalResult") -> int:
+    return len(result.answer) + sum(len(snippet.get("text") or "") for snippet in result.snippets)
+
+
+@dataclass
+class SemanticCacheStats:
+    tenants: int
+    entries: int
+    bytes: int
+    hits: int
+    misses: int
+    evictions: int
+    invalidations: int
+
+
+class _TenantEntries:
+    """Unit-norm query embeddings as rows of one matrix, with their results and LRU ticks.
+
+    ``nbytes`` counts the matrix plus the characters of the cached answers and snippets.
+    """
+
+    def __init__(self, np, dimension: int, version: int, dtype: str) -> None:
+        self.np = np
+        self.version = version
+        self.matrix = np.zeros((8, dimension), dtype=dtype)
+        self.last_used = np.zeros(8, dtype=np.int64)
+        self.results: List[Optional["RetrievalResult"]] = []
+        self.text_bytes = 0
+
+    @property
+    def size(self) -> int:
+        return len(self.results)
+
+    @property
+    def nbytes(self) -> int:
+        return int(self.matrix.nbytes + self.last_used.nbytes) + self.text_bytes
+
+    def best(self, query) -> tuple:
+        if not self.results:
+            return -1, -1.0
+        scores = block_dot(self.matrix[: self.size], query)
+        row = int(scores.argmax())
+        return row, float(scores[row])
+
+    def put(self, query, result: "RetrievalResult", tick: int, capacity: int) -> bool:
+        """Store a row, replacing the least recently used one at capacity; True if it evicted."""
+
+        np = self.np
+        if self.size < capacity:
+            if self.size == len(self.matrix):
+                grown = min(capacity, len(self.matrix) * 2)
+                self.matrix = np.resize(self.matrix, (grown, self.matrix.shape[1]))
+                self.last_used = np.resize(self.last_used, grown)
+            row, evicted = self.size, False
+            self.results.append(result)
+        else:
+            row, evicted = int(self.last_used[: self.size].argmin()), True
+            self.text_bytes -= _text_bytes(self.results[row])
+            self.results[row] = result
+        self.text_bytes += _text_bytes(result)
+        self.matrix[row] = query
+        self.last_used[row] = tick
+        return evicted
+
+    def trim(self, max_bytes: int) -> int:
+        """Drop least recently used rows until ``nbytes`` fits ``max_bytes``; returns rows dropped."""
+
+        if self.nbytes <= max_bytes:
+            return 0
+        row_bytes = self.matrix.itemsize * self.matrix.shape[1] + self.last_used.itemsize
+        dropped = 0
+        while self.results and row_bytes * self.size + self.text_bytes > max_bytes:
+            row, last = int(self.last_used[: self.size].argmin()), self.size - 1
+            self.text_bytes -= _text_bytes(self.results[row])
+            self.matrix[row] = self.matrix[last]
+            self.last_used[row] = self.last_used[last]
+            self.results[row] = self.results[last]
+            self.results.pop()
+            dropped += 1
+        # Release spare capacity too; ``put`` grows the arrays again when rows are added.
+        rows = max(1, self.size)
+        self.matrix = self.matrix[:rows].copy()
+        self.last_used = self.last_used[:rows].copy()
+        return dropped
+
+
+class SemanticCache:
+    """Per-tenant cache of retrieval results looked up by query-embedding similarity.
+
+    A paraphrase whose embedding has cosine similarity of at least ``threshold`` with a recent
+    query for the same namespace reuses that query's result. Each tenant holds at most
+    ``max_entries_per_tenant`` rows (least recently used replaced first). To stay under
+    ``max_bytes`` whole tenants are dropped in LRU order, then the last tenant's own least
+    recently used rows. A tenant's rows are discarded as soon as
+    its namespace version moves, i.e. after it is re-ingested. Rows are kept as ``vector_dtype``
+    (float16 by default, or float32) and widened block by block when scored.
+    """
+
+    def __init__(
+        self,
+        versions: Optional[NamespaceVersions] = None,
+        threshold: float = 0.95,
+        max_entries_per_tenant: int = 512,
+        max_bytes: int = 32 * 1024 * 1024,
+        vector_dtype: str = "float16",
+    ) -> None:
+        np = _numpy()
+        if np is None:
+            raise RuntimeError("numpy is required for the semantic cache")
+        if vector_dtype not in ("float32", "float16"):
+            raise RuntimeError(f"Semantic cache stores float32 or float16 rows, not {vector_dtype}")
+        self._np = np
+        self._dtype = vector_dtype
+        self.versions = versions or NamespaceVersions()
+        self._threshold = threshold
+        self._max_entries = max_entries_per_tenant
+        self._max_bytes = max_bytes
+        self._tenants: "OrderedDict[str, _TenantEntries]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._tick = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._invalidations = 0
+
+    def _normalize(self, vector: Sequence[float]):
+        np = self._np
+        query = np.asarray(vector, dtype=np.float32)
+        norm = float(np.linalg.norm(query))
+        return query / norm if norm else None
+
+    def _entries(self, namespace: str, version: int, dimension: int) -> Optional[_TenantEntries]:
+        entries = self._tenants.get(namespace)
+        if entries is not None and (entries.version != version or entries.matrix.shape[1] != dimension):
+            del self._tenants[namespace]
+            self._bytes -= entries.nbytes
+            self._invalidations += 1
+            return None
+        return entries
+
+    def get(self, context: Mapping[str, Any], vector: Sequence[float]) -> Optional["RetrievalResult"]:
+        query = self._normalize(vector)
+        if query is None:
+            return None
+        namespace = tenant_namespace(context)
+        version = self.versions.current(context)
+        with self._lock:
+            entries = self._entries(namespace, version, len(query))
+            row, score = entries.best(query) if entries is not None else (-1, -1.0)
+            if row < 0 or score < self._threshold:
+                self._misses += 1
+                return None
+            self._tick += 1
+            entries.last_used[row] = self._tick
+            self._tenants.move_to_end(namespace)
+            self._hits += 1
+            result = entries.results[row]
+        return result.copy()
+
+    def put(
+        self,
+        context: Mapping[str, Any],
+        vector: Sequence[float],
+        result: "RetrievalResult",
+        version: Optional[int] = None,
+    ) -> None:
+        """Remember ``result``; pass the namespace version read before retrieval started."""
+
+        query = self._normalize(vector)
+        if query is None or self._max_entries <= 0:
+            return
+        namespace = tenant_namespace(context)
+        current = self.versions.current(context)
+        if version is not None and version != current:
+            return
+        with self._lock:
+            entries = self._entries(namespace, current, len(query))
+            if entries is None:
+                entries = _TenantEntries(self._np, len(query), current, self._dtype)
+                self._tenants[namespace] = entries
+                self._bytes += entries.nbytes
+            self._tick += 1
+            before = entries.nbytes
+            if entries.put(query, result.copy(), self._tick, self._max_entries):
+                self._evictions += 1
+            self._bytes += entries.nbytes - before
+            self._tenants.move_to_end(namespace)
+            while len(self._tenants) > 1 and self._bytes > self._max_bytes:
+                _, dropped = self._tenants.popitem(last=False)
+                self._bytes -= dropped.nbytes
+                self._evictions += dropped.size
+            if self._bytes > self._max_bytes:
+                before = entries.nbytes
+                self._evictions += entries.trim(self._max_bytes)
+                self._bytes += entries.nbytes - before
+                if not entries.size:
+                    del self._tenants[namespace]
+                    self._bytes -= entries.nbytes
+
+    def stats(self) -> SemanticCacheStats:
+        with self._lock:
+            return SemanticCacheStats(
+                tenants=len(self._tenants),
+                entries=sum(entries.size for entries in self._tenants.values()),
+                bytes=self._bytes,
+                hits=self._hits,
+                misses=self._misses,
+                evictions=self._evictions,
+                invalidations=self._invalidations,
+            )
@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional, TypeVar
+
+T = TypeVar("T")
+
+_DEFAULT_IO_WORKERS = 64
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+_max_workers = _DEFAULT_IO_WORKERS
+
+
+def configure_io_executor(max_workers: int) -> None:
+    """Set the size of the pool used to offload blocking SDK calls.
+
+    Only takes effect before the first offloaded call; the executor is created lazily.
+    """
+
+    global _max_workers
+    with _executor_lock:
+        _max_workers = max(1, max_workers)
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=_max_workers, thread_name_prefix="blocking-io")
+    return _executor
+
+
+async def run_blocking(func: Callable[..., T], /, *args: Any, **kwargs: Any) -> T:
+    """Run a blocking SDK call on the shared I/O pool without stalling the event loop."""
+
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()
+    call = functools.partial(context.run, func, *args, **kwargs)
+    return await loop.run_in_executor(_get_executor(), call)
+
+
+def shutdown_io_executor() -> None:
+    global _executor
+    with _executor_lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import asyncio
+import random
+import threading
+import time
+from typing import Callable, Optional
+
+
+class TokenBucket:
+    """Thread-safe token bucket refilled at ``rate`` tokens per second, holding up to ``capacity``.
+
+    ``reserve`` takes a token straight away and returns how long the caller must wait before
+    using it. The balance may go negative, so callers are served in arrival order without
+    polling. A rate of 0 or less disables limiting.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        capacity: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.rate = rate
+        self.capacity = max(1.0, capacity if capacity is not None else rate)
+        self._clock = clock
+        self._tokens = self.capacity
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def per_minute(cls, requests: float, burst: Optional[float] = None) -> "TokenBucket":
+        return cls(requests / 60.0, burst)
+
+    def reserve(self, tokens: float = 1.0) -> float:
+        if self.rate <= 0:
+            return 0.0
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= tokens
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+    def acquire(self, tokens: float = 1.0, sleep: Callable[[float], None] = time.sleep) -> float:
+        """Block until a token is available; returns the seconds spent waiting."""
+
+        wait = self.reserve(tokens)
+        if wait > 0:
+            sleep(wait)
+        return wait
+
+    async def aacquire(self, tokens: float = 1.0) -> float:
+        wait = self.reserve(tokens)
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+
+
+def backoff_delay(
+    attempt: int,
+    base: float = 0.5,
+    cap: float = 20.0,
+    rng: Optional[random.Random] = None,
+) -> float:
+    """Full-jitter exponential backoff: uniform in ``[0, min(cap, base * 2 ** (attempt - 1))]``."""
+
+    ceiling = min(cap, base * (2 ** max(0, attempt - 1)))
+    return (rng or random).uniform(0.0, ceiling)
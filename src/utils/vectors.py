@@ -0,0 +1,114 @@
+"""Packed embedding vectors for in-process caches, stores and the local index.
+
+A 1536-dimension embedding held as a Python ``List[float]`` costs about 49 KB of boxed floats.
+``CompactVector`` keeps it in one NumPy buffer instead: 6 KB as float32, 3 KB as float16, or
+1.5 KB as int8 with a per-vector scale. Code that hands vectors to an SDK converts them with
+``as_float_list`` at that boundary.
+"""
+
+from __future__ import annotations
+
+from typing import Any, List
+
+VECTOR_DTYPES = ("float32", "float16", "int8")
+
+
+def _numpy():
+    try:
+        import numpy  # type: ignore
+    except ImportError:  # pragma: no cover - numpy is listed in requirements
+        return None
+    return numpy
+
+
+def _require_numpy():
+    np = _numpy()
+    if np is None:
+        raise RuntimeError("numpy is required for compact vectors")
+    return np
+
+
+def check_dtype(dtype: str) -> str:
+    if dtype not in VECTOR_DTYPES:
+        raise RuntimeError(f"Unsupported vector dtype {dtype!r}; expected one of {', '.join(VECTOR_DTYPES)}")
+    return dtype
+
+
+class CompactVector:
+    """One embedding in a packed buffer; int8 vectors are scaled symmetrically by ``max(|v|) / 127``."""
+
+    __slots__ = ("data", "scale")
+
+    def __init__(self, data: Any, scale: float = 1.0) -> None:
+        self.data = data
+        self.scale = scale
+
+    @classmethod
+    def encode(cls, values: Any, dtype: str = "float32") -> "CompactVector":
+        np = _require_numpy()
+        if isinstance(values, CompactVector):
+            if values.dtype == check_dtype(dtype):
+                return values
+            values = values.to_numpy()
+        array = np.asarray(values, dtype=np.float32).ravel()
+        if check_dtype(dtype) != "int8":
+            return cls(array.astype(dtype))
+        peak = float(np.abs(array).max()) if len(array) else 0.0
+        scale = peak / 127.0 if peak else 1.0
+        return cls(np.round(array / scale).astype(np.int8), scale)
+
+    @classmethod
+    def from_bytes(cls, blob: bytes, dtype: str, scale: float = 1.0) -> "CompactVector":
+        np = _require_numpy()
+        return cls(np.frombuffer(blob, dtype=check_dtype(dtype)), scale)
+
+    @property
+    def dtype(self) -> str:
+        return str(self.data.dtype)
+
+    @property
+    def nbytes(self) -> int:
+        return int(self.data.nbytes)
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    def __array__(self, dtype: Any = None, copy: Any = None):
+        array = self.to_numpy()
+        return array if dtype is None else array.astype(dtype)
+
+    def to_numpy(self):
+        np = _require_numpy()
+        array = self.data.astype(np.float32)
+        if self.scale != 1.0:
+            array *= self.scale
+        return array
+
+    def tolist(self) -> List[float]:
+        return self.to_numpy().tolist()
+
+    def tobytes(self) -> bytes:
+        return self.data.tobytes()
+
+
+def as_float_list(values: Any) -> List[float]:
+    """Plain floats for SDK payloads, whatever the in-process representation."""
+
+    if isinstance(values, list):
+        return values
+    tolist = getattr(values, "tolist", None)
+    return tolist() if tolist is not None else [float(value) for value in values]
+
+
+def block_dot(matrix: Any, query: Any, block_rows: int = 32_768):
+    """``matrix @ query`` in float32, widening float16 rows one block at a time."""
+
+    np = _require_numpy()
+    if matrix.dtype == np.float32:
+        return np.asarray(matrix) @ query
+    scores = np.empty(len(matrix), dtype=np.float32)
+    for start in range(0, len(matrix), block_rows):
+        block = np.asarray(matrix[start:start + block_rows], dtype=np.float32)
+        scores[start:start + len(block)] = block @ query
+    return scores
+
@@ -0,0 +1,72 @@
+import threading
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+from src.adapters import calendar_client
+from src.adapters.calendar_client import CalendarClient
+
+
+class _FakeCredentials:
+    def __init__(self, expiry):
+        self.token = "token"
+        self.expiry = expiry
+        self.refreshes = 0
+        self.service_account_email = "agent@example.iam.gserviceaccount.com"
+
+    def with_subject(self, subject):
+        return self
+
+    def refresh(self, request):
+        self.refreshes += 1
+        self.expiry = datetime.utcnow() + timedelta(hours=1)
+
+
+class _FakeEvents:
+    def insert(self, calendarId, body):
+        return SimpleNamespace(execute=lambda: {"id": "evt-1", **body})
+
+
+def _install(monkeypatch, expiry):
+    credentials = _FakeCredentials(expiry)
+    loads, builds = [], []
+
+    def from_service_account_file(path, scopes):
+        loads.append(path)
+        return credentials
+
+    def build(name, version, credentials, cache_discovery):
+        builds.append(threading.get_ident())
+        return SimpleNamespace(events=_FakeEvents)
+
+    service_account = SimpleNamespace(
+        Credentials=SimpleNamespace(from_service_account_file=from_service_account_file)
+    )
+    monkeypatch.setattr(calendar_client, "_google_sdk", lambda: (service_account, build))
+    monkeypatch.setattr(calendar_client, "_auth_request", lambda: object())
+    return credentials, loads, builds
+
+
+def test_credentials_and_service_are_reused(monkeypatch):
+    credentials, loads, builds = _install(monkeypatch, datetime.utcnow() + timedelta(hours=1))
+    client = CalendarClient(service_account_file="sa.json", default_timezone="UTC")
+
+    for _ in range(3):
+        client.create_event("org__branch@example.com", {"summary": "Consultation"})
+    worker = threading.Thread(target=client.create_event, args=("org__branch@example.com", {}))
+    worker.start()
+    worker.join()
+
+    assert loads == ["sa.json"]
+    assert len(builds) == 2 and builds[0] != builds[1]
+    assert credentials.refreshes == 0
+
+
+def test_token_is_refreshed_before_expiry(monkeypatch):
+    credentials, loads, builds = _install(monkeypatch, datetime.utcnow() + timedelta(seconds=30))
+    client = CalendarClient(service_account_file="sa.json", default_timezone="UTC")
+
+    client.create_event("org__branch@example.com", {})
+    client.create_event("org__branch@example.com", {})
+
+    assert credentials.refreshes == 1
+    assert len(loads) == 1 and len(builds) == 1
@@ -0,0 +1,112 @@
+import json
+from types import SimpleNamespace
+
+from fastapi.testclient import TestClient
+
+from src.adapters.calendar_client import CalendarClient
+from src.app.dependencies import get_orchestrator
+from src.app.main import app
+from src.orchestrator.graph import AgentOrchestrator
+from src.services.calendar import CalendarService
+from src.services.embeddings_fallback import DeterministicEmbedding
+from src.services.intent_rules import RuleBasedIntentClassifier
+from src.services.lead import LeadService
+from src.services.rag import RagService
+
+
+class FakePineconeIndex:
+    def query(self, *, vector, top_k, include_metadata, namespace):
+        return {
+            "matches": [
+                {"id": "c1", "score": 0.9, "metadata": {"text": "We open at 9am.", "source_path": "faq.txt"}},
+                {"id": "c2", "score": 0.8, "metadata": {"text": "We close at 5pm.", "source_path": "faq.txt"}},
+            ]
+        }
+
+
+class FakeCollection:
+    def insert_one(self, document):
+        return SimpleNamespace(inserted_id="lead-1")
+
+
+class FakeEmailClient:
+    def send(self, recipient, subject, body):
+        return {"status": "queued"}
+
+    async def asend(self, recipient, subject, body):
+        return self.send(recipient, subject, body)
+
+
+class FakeCalendarClient(CalendarClient):
+    def create_event(self, calendar_id, body, org_id=""):
+        return {"id": "evt-42"}
+
+    def patch_event(self, calendar_id, event_id, body, org_id=""):
+        return {"id": event_id}
+
+
+def _client() -> TestClient:
+    orchestrator = AgentOrchestrator(
+        rag_service=RagService(pinecone_index=FakePineconeIndex(), embedder=DeterministicEmbedding()),
+        lead_service=LeadService(collection=FakeCollection(), email_client=FakeEmailClient()),
+        calendar_service=CalendarService(
+            calendar_client=FakeCalendarClient(service_account_file="", default_timezone="UTC")
+        ),
+        intent_classifier=RuleBasedIntentClassifier().classify,
+    )
+    app.dependency_overrides[get_orchestrator] = lambda: orchestrator
+    return TestClient(app)
+
+
+def _payload(content: str) -> dict:
+    return {
+        "context": {"org_id": "org_1", "branch_id": "branch_1", "user_session_id": "session_1"},
+        "message": {"role": "user", "content": content},
+    }
+
+
+def _parse_events(body: str) -> list:
+    events = []
+    for block in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+def test_chat_returns_rag_reply():
+    try:
+        response = _client().post("/api/v1/chat", json=_payload("What are your hours?"))
+    finally:
+        app.dependency_overrides.clear()
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["intent"] == "RAG_INFO"
+    assert data["reply"] == "We open at 9am.\nWe close at 5pm."
+
+
+def test_chat_stream_emits_node_events_then_response():
+    try:
+        response = _client().post("/api/v1/chat/stream", json=_payload("What are your hours?"))
+    finally:
+        app.dependency_overrides.clear()
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = _parse_events(response.text)
+    assert [name for name, _ in events] == ["intent", "retrieval", "response"]
+    assert events[0][1] == {"intent": "RAG_INFO"}
+    assert [snippet["id"] for snippet in events[1][1]["snippets"]] == ["c1", "c2"]
+    assert events[-1][1]["reply"] == "We open at 9am.\nWe close at 5pm."
+
+
+def test_chat_stream_reports_booking():
+    try:
+        response = _client().post("/api/v1/chat/stream", json=_payload("Can I book an appointment?"))
+    finally:
+        app.dependency_overrides.clear()
+
+    events = _parse_events(response.text)
+    assert [name for name, _ in events] == ["intent", "booking", "response"]
+    assert events[1][1] == {"appointment_id": "evt-42", "message": "Appointment booked"}
+    assert events[-1][1]["appointment_id"] == "evt-42"
@@ -0,0 +1,85 @@
+import pytest
+
+from src.ingestion.parsers import simple_chunk
+from src.services.context_packing import ContextPacker, estimate_tokens
+from src.services.rag import RagService
+
+
+def _match(match_id, text, score, values=None, source_path="faq.txt"):
+    match = {"id": match_id, "score": score, "metadata": {"text": text, "source_path": source_path}}
+    if values is not None:
+        match["values"] = values
+    return match
+
+
+def test_overlapping_chunks_of_the_same_source_are_trimmed():
+    words = [f"w{i}" for i in range(30)]
+    first, second = simple_chunk(" ".join(words), chunk_size=20, overlap=8)[:2]
+    packer = ContextPacker(mmr_lambda=1.0)
+
+    packed = packer.pack([_match("b", second, 0.9), _match("a", first, 0.8), _match("c", first, 0.7, source_path="other.txt")])
+
+    assert packed[0]["metadata"]["text"] == second
+    assert packed[1]["metadata"]["text"] == " ".join(words[:12])
+    assert packed[2]["metadata"]["text"] == first
+    assert packer.pack([_match("a", first, 0.9), _match("dup", " ".join(words[2:10]), 0.8)])[1:] == []
+
+
+def test_mmr_prefers_diverse_vectors_and_respects_the_token_budget():
+    matches = [
+        _match("a", "opening hours on weekdays " * 3, 0.95, [1.0, 0.0, 0.0]),
+        _match("a2", "opening hours during the week " * 3, 0.94, [0.99, 0.05, 0.0]),
+        _match("b", "parking is free for customers " * 3, 0.80, [0.0, 1.0, 0.0]),
+    ]
+
+    diverse = ContextPacker(mmr_lambda=0.5).pack(matches)
+    assert [match["id"] for match in diverse] == ["a", "b", "a2"]
+    assert all("values" not in match for match in diverse)
+
+    budget = estimate_tokens(matches[0]["metadata"]["text"]) + estimate_tokens(matches[2]["metadata"]["text"])
+    assert [match["id"] for match in ContextPacker(token_budget=budget, mmr_lambda=0.5).pack(matches)] == ["a", "b"]
+    tight = ContextPacker(token_budget=5).pack(matches)
+    assert len(tight) == 1 and estimate_tokens(tight[0]["metadata"]["text"]) <= 5
+
+
+def test_rag_service_requests_values_and_packs_the_answer():
+    class Index:
+        def query(self, **kwargs):
+            self.kwargs = kwargs
+            return {"matches": [_match("a", "We open at 9am.", 0.9, [1.0, 0.0]), _match("b", "We open at 9am.", 0.8, [1.0, 0.0])]}
+
+    class Embedder:
+        def embed(self, text):
+            return [1.0, 0.0]
+
+    index = Index()
+    rag = RagService(pinecone_index=index, embedder=Embedder(), packer=ContextPacker())
+
+    assert rag.retrieve({"org_id": "o", "branch_id": "b"}, "hours", []).answer == "We open at 9am."
+    assert index.kwargs["include_values"] is True
+
+
+def test_rag_service_packs_pinecone_sdk_query_responses():
+    pinecone = pytest.importorskip("pinecone")
+
+    class Index:
+        def query(self, **kwargs):
+            return pinecone.QueryResponse(
+                matches=[
+                    pinecone.ScoredVector(id="a", score=0.9, values=[1.0, 0.0], metadata={"text": "We open at 9am."}),
+                    pinecone.ScoredVector(id="b", score=0.8, values=[0.0, 1.0], metadata={"text": "Parking is free."}),
+                ],
+                namespace="o::b",
+                usage=None,
+            )
+
+    class Embedder:
+        def embed(self, text):
+            return [1.0, 0.0]
+
+    rag = RagService(pinecone_index=Index(), embedder=Embedder(), packer=ContextPacker())
+
+    result = rag.retrieve({"org_id": "o", "branch_id": "b"}, "hours", [])
+
+    assert [snippet["id"] for snippet in result.snippets] == ["a", "b"]
+    assert result.answer == "We open at 9am.\nParking is free."
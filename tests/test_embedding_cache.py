@@ -0,0 +1,167 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from src.services.embedding_cache import CachingEmbedder
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class CountingEmbedder:
+    def __init__(self, release: threading.Event | None = None) -> None:
+        self.calls = []
+        self._release = release
+
+    def embed(self, text: str):
+        self.calls.append(text)
+        if self._release is not None:
+            self._release.wait(5)
+        return [float(len(text)), 1.0, 0.5]
+
+    async def aembed(self, text: str):
+        self.calls.append(text)
+        await asyncio.sleep(0.01)
+        return [float(len(text)), 1.0, 0.5]
+
+
+def test_normalized_queries_hit_the_cache_until_ttl():
+    clock = FakeClock()
+    inner = CountingEmbedder()
+    cache = CachingEmbedder(inner, ttl_seconds=60, clock=clock)
+
+    first = cache.embed("What are your hours?")
+    assert cache.embed("  what ARE your   hours? ") == first
+    assert inner.calls == ["What are your hours?"]
+
+    clock.now = 61
+    cache.embed("what are your hours?")
+    stats = cache.stats()
+    assert len(inner.calls) == 2
+    assert (stats.hits, stats.misses, stats.expirations) == (1, 2, 1)
+
+
+def test_byte_budget_evicts_least_recently_used():
+    inner = CountingEmbedder()
+    # Three float16 components per vector: 6 bytes each.
+    cache = CachingEmbedder(inner, max_bytes=2 * 3 * 2)
+
+    cache.embed("pricing")
+    cache.embed("hours")
+    cache.embed("pricing")
+    cache.embed("location")
+
+    stats = cache.stats()
+    assert (stats.entries, stats.bytes, stats.evictions) == (2, 12, 1)
+    cache.embed("pricing")
+    assert inner.calls.count("pricing") == 1
+    cache.embed("hours")
+    assert inner.calls.count("hours") == 2
+
+
+def test_concurrent_threads_share_one_upstream_call():
+    release = threading.Event()
+    inner = CountingEmbedder(release)
+    cache = CachingEmbedder(inner)
+    results = []
+
+    threads = [threading.Thread(target=lambda: results.append(cache.embed("pricing"))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    deadline = time.monotonic() + 5
+    while cache.stats().coalesced < 7 and time.monotonic() < deadline:
+        time.sleep(0.001)
+    release.set()
+    assert cache.stats().coalesced == 7
+    for thread in threads:
+        thread.join()
+
+    assert inner.calls == ["pricing"]
+    assert len(results) == 8 and all(result == results[0] for result in results)
+
+
+def test_concurrent_coroutines_share_one_upstream_call_and_errors_are_not_cached():
+    inner = CountingEmbedder()
+    cache = CachingEmbedder(inner)
+
+    async def scenario():
+        return await asyncio.gather(*(cache.aembed("Pricing") for _ in range(10)))
+
+    results = asyncio.run(scenario())
+    assert inner.calls == ["Pricing"]
+    assert cache.stats().coalesced == 9
+    assert all(result == results[0] for result in results)
+
+    class Failing:
+        def embed(self, text):
+            raise RuntimeError("quota exceeded")
+
+    failing = CachingEmbedder(Failing())
+    with pytest.raises(RuntimeError):
+        failing.embed("hours")
+    assert failing.stats().entries == 0
+
+
+def test_cancelling_the_leading_coroutine_does_not_fail_its_followers():
+    inner = CountingEmbedder()
+    cache = CachingEmbedder(inner)
+
+    async def scenario():
+        leader = asyncio.ensure_future(cache.aembed("Pricing"))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(cache.aembed("pricing"))
+        await asyncio.sleep(0)
+        leader.cancel()
+        vector = await follower
+        assert leader.cancelled()
+        return vector
+
+    assert asyncio.run(scenario()) == [7.0, 1.0, 0.5]
+    assert inner.calls == ["Pricing"]
+    assert cache.stats().entries == 1
+
+
+class BatchEmbedder(CountingEmbedder):
+    def __init__(self) -> None:
+        super().__init__()
+        self.batches = []
+
+    def embed_batch(self, texts):
+        self.batches.append(list(texts))
+        return [[float(len(text)), 1.0, 0.5] for text in texts]
+
+
+def test_embed_batch_only_sends_uncached_distinct_texts():
+    inner = BatchEmbedder()
+    cache = CachingEmbedder(inner)
+    cache.embed("hours")
+
+    vectors = cache.embed_batch(["hours", "parking", " PARKING ", "menu"])
+    assert vectors == [[5.0, 1.0, 0.5], [7.0, 1.0, 0.5], [7.0, 1.0, 0.5], [4.0, 1.0, 0.5]]
+    assert inner.batches == [["parking", "menu"]]
+
+    assert asyncio.run(cache.aembed_batch(["menu", "parking"])) == [[4.0, 1.0, 0.5], [7.0, 1.0, 0.5]]
+    assert inner.batches == [["parking", "menu"]]
+    assert cache.stats().entries == 3
+
+
+def test_vectors_are_stored_compactly_in_the_requested_dtype():
+    values = [0.1 * index - 3.0 for index in range(64)]
+
+    class Fixed:
+        def embed(self, text):
+            return values
+
+    for dtype, size, tolerance in (("float32", 256, 1e-6), ("float16", 128, 2e-3), ("int8", 64, 3e-2)):
+        cache = CachingEmbedder(Fixed(), vector_dtype=dtype)
+        assert cache.embed("q") == values  # the miss is returned at full precision
+        cached = cache.embed("q")
+        assert cache.stats().bytes == size
+        assert max(abs(a - b) for a, b in zip(cached, values)) < tolerance
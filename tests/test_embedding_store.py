@@ -0,0 +1,95 @@
+from pathlib import Path
+
+from src.ingestion.pipeline import IngestionPipeline
+from src.services.embedding_store import EmbeddingStore
+from src.services.embeddings_fallback import DeterministicEmbedding
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        self.now += 1.0
+        return self.now
+
+
+class RecordingEmbedder(DeterministicEmbedding):
+    def __init__(self) -> None:
+        self.batches = []
+
+    def embed_batch(self, texts):
+        self.batches.append(list(texts))
+        return super().embed_batch(texts)
+
+
+def _lists(vectors):
+    return [vector.tolist() if vector is not None else None for vector in vectors]
+
+
+class FakeIndex:
+    def __init__(self) -> None:
+        self.upserts = []
+        self.namespaces = {}
+
+    def upsert(self, vectors, namespace=None):
+        self.upserts.append(vectors)
+        self.namespaces.setdefault(namespace, {}).update((vector["id"], vector) for vector in vectors)
+
+
+def test_store_round_trips_by_model_and_persists(tmp_path: Path):
+    path = tmp_path / "embeddings.sqlite3"
+    store = EmbeddingStore(path)
+    store.put_many("model-a", ["alpha", "beta"], [[0.5, 1.0], [0.25, -2.0]])
+
+    assert _lists(store.get_many("model-a", ["beta", "gamma", "alpha"])) == [[0.25, -2.0], None, [0.5, 1.0]]
+    assert store.get_many("model-b", ["alpha"]) == [None]
+    store.close()
+
+    reopened = EmbeddingStore(path)
+    assert _lists(reopened.get_many("model-a", ["alpha"])) == [[0.5, 1.0]]
+    stats = reopened.stats()
+    assert (stats.entries, stats.bytes, stats.hits) == (2, 16, 1)  # float32 by default
+
+
+def test_store_evicts_least_recently_used_rows_over_the_size_limit(tmp_path: Path):
+    store = EmbeddingStore(tmp_path / "embeddings.sqlite3", max_bytes=3 * 8, clock=FakeClock(), vector_dtype="float16")
+    store.put_many("m", ["a", "b", "c"], [[1.0] * 4, [2.0] * 4, [3.0] * 4])
+    store.get_many("m", ["a"])
+    store.put_many("m", ["d"], [[4.0] * 4])
+
+    assert _lists(store.get_many("m", ["a", "b", "c", "d"])) == [[1.0] * 4, None, None, [4.0] * 4]
+    stats = store.stats()
+    assert (stats.entries, stats.evictions) == (2, 2)
+    assert stats.bytes <= 0.9 * 3 * 8
+
+
+def test_reingestion_only_embeds_changed_chunks(tmp_path: Path):
+    embedder = RecordingEmbedder()
+    store = EmbeddingStore(tmp_path / "embeddings.sqlite3")
+    index = FakeIndex()
+    pipeline = IngestionPipeline(pinecone_index=index, embedder=embedder, chunk_overlap=0, embedding_store=store)
+    context = {"org_id": "acme", "branch_id": "main"}
+    hours = {"text": "Opening hours are nine to five.", "source_path": "hours.txt"}
+
+    pipeline.run(context=context, documents=[hours, {"text": "Parking is free.", "source_path": "parking.txt"}])
+    parking = {"text": "Parking costs two euros.", "source_path": "parking.txt"}
+    result = pipeline.run(context=context, documents=[hours, parking])
+
+    assert result == {"processed": 2, "failed": 0}
+    assert embedder.batches[-1] == ["Parking costs two euros."]
+    vectors = index.namespaces["acme::main"]
+    assert len(vectors) == 2  # the refresh overwrote both chunks instead of adding copies
+    assert sorted(vector["metadata"]["text"] for vector in vectors.values()) == [
+        "Opening hours are nine to five.",
+        "Parking costs two euros.",
+    ]
+
+
+def test_store_reads_rows_written_with_another_dtype(tmp_path: Path):
+    path = tmp_path / "embeddings.sqlite3"
+    EmbeddingStore(path, vector_dtype="int8").put_many("m", ["a"], [[0.5, -1.0, 0.25]])
+
+    [vector] = EmbeddingStore(path, vector_dtype="float32").get_many("m", ["a"])
+    assert vector.dtype == "int8" and vector.nbytes == 3
+    assert max(abs(a - b) for a, b in zip(vector.tolist(), [0.5, -1.0, 0.25])) < 0.01
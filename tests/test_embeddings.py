@@ -0,0 +1,129 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from src.services import embeddings
+from src.services.embeddings import EmbeddingService
+from src.services.embeddings_fallback import HashingEmbedding
+from src.utils.rate_limit import TokenBucket
+
+
+class TooLarge(Exception):
+    code = 400
+
+
+class Throttled(Exception):
+    code = 429
+
+
+class FakeModels:
+    def __init__(self, limit: int) -> None:
+        self.limit = limit
+        self.requests = []
+
+    def embed_content(self, model, contents):
+        self.requests.append(len(contents) if isinstance(contents, list) else 1)
+        if isinstance(contents, list) and len(contents) > self.limit:
+            raise TooLarge("Request payload too large")
+        texts = contents if isinstance(contents, list) else [contents]
+        return SimpleNamespace(embeddings=[SimpleNamespace(values=[float(len(text))]) for text in texts])
+
+
+class FlakyModels(FakeModels):
+    """Fails the first ``failures`` requests with 429s and records peak concurrency."""
+
+    def __init__(self, failures: int = 0, delay: float = 0.0) -> None:
+        super().__init__(limit=100)
+        self.failures = failures
+        self.delay = delay
+        self.active = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+
+    def embed_content(self, model, contents):
+        with self.lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+            fail = self.failures > 0
+            self.failures -= 1
+        try:
+            time.sleep(self.delay)
+            if fail:
+                raise Throttled("Resource has been exhausted")
+            return super().embed_content(model, contents)
+        finally:
+            with self.lock:
+                self.active -= 1
+
+
+def _service(monkeypatch, limit: int = 100, models=None, **kwargs) -> EmbeddingService:
+    models = models or FakeModels(limit)
+    client = SimpleNamespace(models=models)
+    monkeypatch.setattr(embeddings, "_genai", lambda: SimpleNamespace(Client=lambda **kwargs: client))
+    return EmbeddingService("text-embedding-004", "key", **kwargs)
+
+
+def test_embed_batch_shrinks_to_the_accepted_size_and_keeps_order(monkeypatch):
+    service = _service(monkeypatch, limit=30)
+    texts = [f"text {index}" for index in range(70)]
+
+    assert service.embed_batch(texts) == [[float(len(text))] for text in texts]
+    requests = service._client.models.requests
+    assert requests[:2] == [70, 35]
+    assert all(size <= 30 for size in requests[2:])
+    assert service.batch_size == 34  # below the rejected 35, growing back after successes
+
+
+def test_embed_batch_respects_char_budget_and_reraises_other_errors(monkeypatch):
+    service = _service(monkeypatch, limit=100, max_batch_chars=20)
+    service.embed_batch(["a" * 10, "b" * 10, "c" * 10, "d" * 25])
+    assert service._client.models.requests == [2, 1, 1]
+
+    single = _service(monkeypatch, limit=0)
+    with pytest.raises(TooLarge):
+        single.embed_batch(["only one"])
+
+
+def test_embed_batch_retries_throttling_and_runs_batches_concurrently(monkeypatch):
+    sleeps = []
+    models = FlakyModels(failures=2, delay=0.05)
+    service = _service(monkeypatch, models=models, max_batch_size=10, max_concurrency=4, sleep=sleeps.append)
+    texts = [f"chunk {index}" for index in range(80)]
+
+    assert service.embed_batch(texts) == [[float(len(text))] for text in texts]
+    assert models.peak == 4
+    assert len(sleeps) == 2 and all(0 <= delay <= 1.0 for delay in sleeps)
+    stats = service.stats()
+    assert (stats.requests, stats.retries, stats.errors, stats.queued, stats.in_flight) == (10, 2, 0, 0, 0)
+    assert stats.latency_max_ms >= 50
+
+    exhausted = _service(monkeypatch, models=FlakyModels(failures=10), max_retries=2, sleep=lambda _: None)
+    with pytest.raises(Throttled):
+        exhausted.embed("query")
+    assert exhausted.stats().requests == 3
+
+
+def test_token_bucket_queues_callers_in_arrival_order():
+    now = [0.0]
+    bucket = TokenBucket(rate=2.0, capacity=2, clock=lambda: now[0])
+
+    assert [bucket.reserve() for _ in range(4)] == [0.0, 0.0, 0.5, 1.0]
+    now[0] = 1.0
+    assert bucket.reserve() == 0.5
+    assert TokenBucket(rate=0).reserve() == 0.0
+
+
+def test_hashing_embedding_matches_dimension_and_batches_consistently():
+    embedder = HashingEmbedding(dimension=256)
+    texts = ["Store hours: open 9am to 6pm on weekdays", "When are you open on weekdays?", "Parking behind the mall", ""]
+
+    matrix = embedder.embed_matrix(texts)
+    assert matrix.shape == (4, 256)
+    assert np.allclose(np.linalg.norm(matrix[:3], axis=1), 1.0)
+    assert not matrix[3].any()
+    assert np.allclose(embedder.embed_batch(texts), matrix)
+    assert np.allclose(embedder.embed(texts[1]), matrix[1])
+    assert matrix[0] @ matrix[1] > matrix[0] @ matrix[2]
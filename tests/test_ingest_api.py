@@ -24,7 +24,6 @@ from pinecone.exceptions import NotFoundException  # type: ignore[attr-defined]
 
 from src.app.config import get_settings
 from src.app.main import app
-from src.services.embeddings_fallback import DeterministicEmbedding
 
 
 try:  # Pinecone >=3 provides the Pinecone client class.
@@ -116,9 +115,8 @@ def _wait_for_index_legacy(index_name: str, timeout: float = 180.0, interval: fl
 
 
 def _expected_dimension(settings) -> int:
-    if settings.gemini_api_key:
-        return settings.pinecone_dimension
-    return len(DeterministicEmbedding().embed("probe-dimension"))
+    # Gemini and the hashing fallback both produce vectors of the configured dimension.
+    return settings.pinecone_dimension
 
 
 @pytest.fixture(scope="module")
@@ -1,7 +1,10 @@
 ﻿from pathlib import Path
 
+import pytest
+
 from src.ingestion.pipeline import IngestionPipeline
 from src.services.embeddings_fallback import DeterministicEmbedding
+from src.services.retrieval_cache import NamespaceVersions
 
 
 class FakePineconeIndex:
@@ -12,6 +15,48 @@ class FakePineconeIndex:
         self.calls.append({"vectors": vectors, "namespace": namespace})
 
 
+class CrashingPineconeIndex(FakePineconeIndex):
+    """Keeps records by id and fails the upsert call numbered ``crash_on``."""
+
+    def __init__(self, crash_on: int = 0) -> None:
+        super().__init__()
+        self.records = {}
+        self.crash_on = crash_on
+
+    def upsert(self, *, vectors, namespace=None):
+        super().upsert(vectors=vectors, namespace=namespace)
+        if len(self.calls) == self.crash_on:
+            raise ConnectionError("connection reset")
+        self.records.update((vector["id"], vector) for vector in vectors)
+
+
+class LegacyPineconeIndex(FakePineconeIndex):
+    """Accepts only ``(id, values, metadata)`` tuples, like pinecone-client 2.x."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.rejected = 0
+
+    def upsert(self, *, vectors, namespace=None):
+        if isinstance(vectors[0], dict):
+            self.rejected += 1
+            raise TypeError("Vectors item must be a dict or tuple")
+        super().upsert(vectors=vectors, namespace=namespace)
+
+
+class FailingEmbedding(DeterministicEmbedding):
+    def __init__(self, fail_on_call: int) -> None:
+        super().__init__()
+        self.calls = 0
+        self.fail_on_call = fail_on_call
+
+    def embed_batch(self, texts):
+        self.calls += 1
+        if self.calls == self.fail_on_call:
+            raise RuntimeError("quota exhausted")
+        return super().embed_batch(texts)
+
+
 def test_pipeline_reads_source_file_and_upserts_vectors():
     index = FakePineconeIndex()
     embedder = DeterministicEmbedding()
@@ -27,10 +72,64 @@ def test_pipeline_reads_source_file_and_upserts_vectors():
     assert index.calls, "expected vectors to be upserted"
     call = index.calls[0]
     assert call["namespace"] == "org_1::branch_1"
-    vector_meta = call["vectors"][0]
-    chunk_id, vector, metadata = vector_meta
+    record = call["vectors"][0]
+    chunk_id, vector, metadata = record["id"], record["values"], record["metadata"]
     assert chunk_id, "chunk_id should be generated internally"
     assert isinstance(vector, list) and vector, "vector should be computed"
     assert metadata["org_id"] == "org_1"
     assert metadata["branch_id"] == "branch_1"
     assert metadata["source_path"].endswith("requirements.txt")
+
+
+def test_pipeline_streams_batches_and_detects_the_sdk_format_once():
+    index = LegacyPineconeIndex()
+    versions = NamespaceVersions()
+    pipeline = IngestionPipeline(
+        pinecone_index=index,
+        embedder=FailingEmbedding(fail_on_call=2),
+        chunk_size=5,
+        chunk_overlap=0,
+        versions=versions,
+        embed_batch_size=4,
+        upsert_batch_size=3,
+    )
+    context = {"org_id": "org_1", "branch_id": "branch_1"}
+    documents = ({"text": " ".join(f"doc{number} word{word}" for word in range(5))} for number in range(4))
+    reports = []
+
+    result = pipeline.run(
+        context=context, documents=documents, progress=lambda report: reports.append(report.processed)
+    )
+
+    # Two chunks per document, four chunks per embedding batch; the second batch failed to embed.
+    assert result == {"processed": 4, "failed": 2}
+    assert reports == [4, 4]
+    assert [len(call["vectors"]) for call in index.calls] == [3, 1]
+    assert index.rejected == 1
+    assert all(isinstance(vector, tuple) for call in index.calls for vector in call["vectors"])
+    assert versions.current(context) == 1
+
+
+def test_rerunning_a_crashed_ingestion_overwrites_the_batches_it_wrote():
+    index = CrashingPineconeIndex(crash_on=3)
+    pipeline = IngestionPipeline(
+        pinecone_index=index,
+        embedder=DeterministicEmbedding(),
+        chunk_size=5,
+        chunk_overlap=0,
+        embed_batch_size=2,
+    )
+    context = {"org_id": "org_1", "branch_id": "branch_1"}
+    # Two chunks per document, so the third upsert crashes after two of three documents.
+    documents = [
+        {"text": " ".join(f"doc{number} word{word}" for word in range(5)), "source_path": f"{number}.txt"}
+        for number in range(3)
+    ]
+
+    with pytest.raises(ConnectionError):
+        pipeline.run(context=context, documents=documents)
+    assert len(index.records) == 4
+
+    index.crash_on = 0
+    assert pipeline.run(context=context, documents=documents) == {"processed": 6, "failed": 0}
+    assert len(index.records) == 6
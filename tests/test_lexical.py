@@ -0,0 +1,91 @@
+import pytest
+
+from src.adapters.local_index import LocalVectorIndex
+from src.ingestion.pipeline import IngestionPipeline
+from src.services.embeddings_fallback import DeterministicEmbedding
+from src.services.lexical import LexicalIndex, reciprocal_rank_fusion, tokenize
+from src.services.rag import RagService
+
+
+def test_tokenize_keeps_compound_product_codes():
+    assert tokenize("Order SKU-1234/b now") == ["order", "sku-1234/b", "sku", "1234", "b", "now"]
+
+
+def test_bm25_ranks_rare_exact_terms_and_replaces_documents():
+    index = LexicalIndex()
+    index.add(
+        "acme::main",
+        [
+            ("c1", "The premium plan includes onboarding and support.", {"text": "premium"}),
+            ("c2", "Model ZX-900 ships with a two year warranty.", {"text": "zx"}),
+            ("c3", "Support is available on weekends for the basic plan.", {"text": "basic"}),
+        ],
+    )
+
+    assert [match["id"] for match in index.search("acme::main", "zx-900 warranty")] == ["c2"]
+    assert [match["id"] for match in index.search("acme::main", "plan support", top_k=2)] == ["c1", "c3"]
+    assert index.search("other::main", "plan") == []
+
+    index.add("acme::main", [("c2", "Model ZX-950 replaces the old model.", {"text": "zx950"})])
+    assert index.search("acme::main", "900") == []
+    assert index.stats().documents == 3
+
+
+def test_reindexing_the_same_documents_keeps_scores_and_size_stable():
+    index = LexicalIndex()
+    documents = [
+        ("c1", "Order SKU-1234 for the premium blender.", {"text": "sku"}),
+        ("c2", "Our stores open at nine on weekdays.", {"text": "hours"}),
+    ]
+    rounds = []
+    for _ in range(4):
+        index.add("acme::main", documents)
+        matches = index.search("acme::main", "SKU-1234")
+        rounds.append(([(match["id"], round(match["score"], 6)) for match in matches], index.stats()))
+
+    assert rounds[0][0] and rounds[0][0][0][0] == "c1"
+    assert all(result == rounds[0][0] for result, _ in rounds)
+    assert all(stats == rounds[0][1] for _, stats in rounds)
+
+
+def test_reciprocal_rank_fusion_merges_by_id():
+    vector = [{"id": "a", "score": 0.9, "metadata": {"text": "a"}}, {"id": "b", "score": 0.8, "metadata": {"text": "b"}}]
+    lexical = [{"id": "b", "score": 7.0, "metadata": {"text": "b"}}, {"id": "c", "score": 3.0, "metadata": {"text": "c"}}]
+
+    fused = reciprocal_rank_fusion([vector, lexical], limit=2)
+
+    assert [match["id"] for match in fused] == ["b", "a"]
+    assert fused[0]["metadata"] == {"text": "b"}
+
+
+def test_exact_sku_is_retrieved_when_embeddings_carry_no_meaning(tmp_path):
+    vectors = LocalVectorIndex(tmp_path)
+    lexical = LexicalIndex()
+    embedder = DeterministicEmbedding()
+    pipeline = IngestionPipeline(pinecone_index=vectors, embedder=embedder, lexical_index=lexical, chunk_size=60, chunk_overlap=0)
+    pipeline.run(
+        context={"org_id": "acme", "branch_id": "main"},
+        documents=[{"text": " ".join(f"Item {i} is a standard accessory." for i in range(20)) + " The ZX-900 blender costs 120."}],
+    )
+    rag = RagService(pinecone_index=vectors, embedder=embedder, top_k=3, lexical_index=lexical)
+
+    result = rag.retrieve({"org_id": "acme", "branch_id": "main"}, "price of the ZX-900", [])
+
+    assert "ZX-900" in result.snippets[0]["text"]
+
+
+def test_rag_service_fuses_pinecone_sdk_matches_with_lexical_hits():
+    pinecone = pytest.importorskip("pinecone")
+    lexical = LexicalIndex()
+    lexical.add("acme::main", [("sku", "The ZX-900 blender costs 120.", {"text": "The ZX-900 blender costs 120."})])
+
+    class Index:
+        def query(self, **kwargs):
+            match = pinecone.ScoredVector(id="hours", score=0.7, metadata={"text": "We open at 9am."})
+            return pinecone.QueryResponse(matches=[match], namespace="acme::main", usage=None)
+
+    rag = RagService(pinecone_index=Index(), embedder=DeterministicEmbedding(), top_k=2, lexical_index=lexical)
+
+    result = rag.retrieve({"org_id": "acme", "branch_id": "main"}, "price of the ZX-900", [])
+
+    assert sorted(snippet["id"] for snippet in result.snippets) == ["hours", "sku"]
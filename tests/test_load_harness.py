@@ -0,0 +1,34 @@
+import asyncio
+
+from benchmarks.fakes import FakePineconeIndex, Latency
+from benchmarks.load_test import percentile, run_load
+
+
+def test_percentile_uses_nearest_rank():
+    samples = [float(value) for value in range(1, 101)]
+
+    assert percentile(samples, 50) == 50.0
+    assert percentile(samples, 95) == 95.0
+    assert percentile(samples, 99) == 99.0
+    assert percentile([], 99) == 0.0
+
+
+def test_fake_index_accepts_dict_and_tuple_vectors():
+    index = FakePineconeIndex(Latency())
+    index.upsert(vectors=[{"id": "a", "values": [1.0, 0.0], "metadata": {"org_id": "o"}}], namespace="ns")
+    index.upsert(vectors=[("b", [0.0, 1.0], {"org_id": "p"})], namespace="ns")
+
+    result = index.query(vector=[1.0, 0.1], top_k=1, include_metadata=True, namespace="ns", filter={"org_id": "o"})
+
+    assert [match["id"] for match in result["matches"]] == ["a"]
+    assert index.describe_index_stats()["namespaces"]["ns"]["vector_count"] == 2
+
+
+def test_load_harness_covers_every_route_offline():
+    report = asyncio.run(run_load(requests=24, concurrency=6, latency=Latency(0.001), ingest_every=12))
+
+    routes = report.routes()
+    assert set(routes) == {"chat:RAG_INFO", "chat:PURCHASE_INTEREST", "chat:BOOKING", "chat:CANCEL_BOOKING", "ingest"}
+    assert sum(row["count"] for row in routes.values()) == 24
+    assert all(row["errors"] == 0 for row in routes.values())
+    assert report.throughput_rps > 0
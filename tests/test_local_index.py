@@ -0,0 +1,116 @@
+import random
+import threading
+
+from src.adapters.local_index import LocalVectorIndex, _Segment
+
+
+def _vector(*values):
+    return list(values) + [0.0] * (4 - len(values))
+
+
+def test_exact_top_k_with_filters_and_reload(tmp_path):
+    index = LocalVectorIndex(tmp_path)
+    index.upsert(
+        [
+            {"id": "a", "values": _vector(1, 0), "metadata": {"org_id": "o1", "text": "hours"}},
+            {"id": "b", "values": _vector(0.8, 0.2), "metadata": {"org_id": "o2", "text": "pricing"}},
+            ("c", _vector(0, 1), {"org_id": "o1", "text": "parking"}),
+        ],
+        namespace="o1::b1",
+    )
+
+    result = index.query(vector=_vector(1, 0), top_k=2, include_metadata=True, namespace="o1::b1")
+    assert [match["id"] for match in result["matches"]] == ["a", "b"]
+    assert abs(result["matches"][0]["score"] - 1.0) < 1e-6
+
+    filtered = index.query(vector=_vector(1, 0), top_k=5, filter={"$and": [{"org_id": {"$eq": "o1"}}]}, namespace="o1::b1")
+    assert [match["id"] for match in filtered["matches"]] == ["a", "c"]
+    assert index.query(vector=_vector(1, 0), namespace="missing")["matches"] == []
+
+    index.upsert([{"id": "a", "values": _vector(0, 1), "metadata": {"org_id": "o1"}}], namespace="o1::b1")
+    index.delete(ids=["b"], namespace="o1::b1")
+
+    reopened = LocalVectorIndex(tmp_path)
+    result = reopened.query(vector=_vector(0, 1), top_k=3, include_values=True, namespace="o1::b1")
+    assert sorted(match["id"] for match in result["matches"]) == ["a", "c"]
+    assert result["matches"][0]["values"] == [0.0, 1.0, 0.0, 0.0]
+    assert reopened.describe_index_stats()["namespaces"] == {"o1::b1": {"vector_count": 2}}
+
+
+def _random_vectors(count, seed=7):
+    rng = random.Random(seed)
+    return [{"id": f"v{i}", "values": [rng.gauss(0, 1) for _ in range(16)], "metadata": {}} for i in range(count)]
+
+
+def test_ivf_mode_finds_the_nearest_neighbour(tmp_path):
+    vectors = _random_vectors(2000)
+    index = LocalVectorIndex(tmp_path, ivf_min_vectors=1000, nprobe=8)
+    index.upsert(vectors, namespace="tenant")
+    assert index.build_ivf(namespace="tenant")
+
+    probe = vectors[123]["values"]
+    result = index.query(vector=probe, top_k=1, namespace="tenant")
+
+    assert result["matches"][0]["id"] == "v123"
+    assert index._segments["tenant"].ivf is not None
+
+
+def test_ivf_trains_in_the_background_while_queries_stay_exact(tmp_path, monkeypatch):
+    release = threading.Event()
+    train = _Segment._train
+
+    def gated_train(self, *args, **kwargs):
+        assert release.wait(10)
+        return train(self, *args, **kwargs)
+
+    monkeypatch.setattr(_Segment, "_train", gated_train)
+    vectors = _random_vectors(2000)
+    index = LocalVectorIndex(tmp_path, ivf_min_vectors=1000)
+    index.upsert(vectors, namespace="tenant")
+    segment = index._segments["tenant"]
+
+    result = index.query(vector=vectors[42]["values"], top_k=1, namespace="tenant")
+    assert result["matches"][0]["id"] == "v42"
+    assert segment.ivf is None and segment._training.is_alive()
+
+    index.upsert([{"id": "late", "values": vectors[42]["values"], "metadata": {}}], namespace="tenant")
+    release.set()
+    segment._training.join(timeout=10)
+    assert segment.ivf is not None
+    assert len(segment.ivf.assignments) == len(segment.ids) == 2001
+
+
+def test_float16_segments_keep_their_dtype_across_reloads(tmp_path):
+    index = LocalVectorIndex(tmp_path, vector_dtype="float16")
+    index.upsert([("a", _vector(1, 0), {"text": "hours"}), ("b", _vector(0.6, 0.8), {"text": "parking"})], namespace="ns")
+
+    assert (tmp_path / "ns" / "vectors.f16").stat().st_size == 2 * 4 * 2
+    reloaded = LocalVectorIndex(tmp_path)
+    result = reloaded.query(vector=_vector(0.6, 0.8), top_k=2, include_values=True, namespace="ns")
+    assert [match["id"] for match in result["matches"]] == ["b", "a"]
+    assert abs(result["matches"][0]["score"] - 1.0) < 1e-3
+    assert abs(result["matches"][1]["values"][0] - 1.0) < 1e-3
+
+
+def test_repeated_upserts_of_the_same_ids_compact_the_segment(tmp_path):
+    index = LocalVectorIndex(tmp_path)
+    records = [(f"r{i}", _vector(1, i), {"text": f"row {i}"}) for i in range(10)]
+    segment_dir = tmp_path / "ns"
+
+    sizes = []
+    for _ in range(5):
+        index.upsert(records, namespace="ns")
+        segment = index._segments["ns"]
+        assert len(segment.ids) == 10
+        sizes.append(((segment_dir / "vectors.f32").stat().st_size, (segment_dir / "records.jsonl").stat().st_size))
+    assert len(set(sizes)) == 1
+
+    index.delete(ids=["r0", "r1"], namespace="ns")
+    assert index.compact(namespace="ns") == 2
+    assert not list(segment_dir.glob("*.compact*"))
+
+    reopened = LocalVectorIndex(tmp_path)
+    result = reopened.query(vector=_vector(1, 9), top_k=1, include_metadata=True, namespace="ns")
+    assert result["matches"][0]["id"] == "r9"
+    assert result["matches"][0]["metadata"] == {"text": "row 9"}
+    assert reopened.describe_index_stats()["namespaces"] == {"ns": {"vector_count": 8}}
@@ -0,0 +1,84 @@
+from fastapi.testclient import TestClient
+
+from src.ingestion.pipeline import IngestionPipeline
+
+from src.app.main import app
+from src.orchestrator.graph import AgentOrchestrator
+from src.orchestrator.state import ConversationState
+from src.services.intent_rules import RuleBasedIntentClassifier
+from src.services.embeddings_fallback import DeterministicEmbedding
+from src.services.rag import RagService, RetrievalResult
+from src.utils.metrics import ADAPTER_CALL_SECONDS, GRAPH_NODE_SECONDS, MetricsRegistry
+
+
+def test_histogram_renders_cumulative_prometheus_buckets():
+    registry = MetricsRegistry()
+    histogram = registry.histogram("latency_seconds", "Latency.", ("route",), buckets=(0.1, 1.0))
+    counter = registry.counter("requests", "Requests.", ("route",))
+
+    histogram.observe(0.05, route="chat")
+    histogram.observe(0.5, route="chat")
+    histogram.observe(5, route="chat")
+    counter.inc(route="chat")
+
+    text = registry.render()
+    assert "# TYPE latency_seconds histogram" in text
+    assert 'latency_seconds_bucket{route="chat",le="0.1"} 1' in text
+    assert 'latency_seconds_bucket{route="chat",le="1"} 2' in text
+    assert 'latency_seconds_bucket{route="chat",le="+Inf"} 3' in text
+    assert 'latency_seconds_count{route="chat"} 3' in text
+    assert 'requests_total{route="chat"} 1' in text
+
+
+class FakeRagService:
+    def retrieve(self, context, query, history):
+        return RetrievalResult(answer="answer")
+
+
+def test_graph_nodes_are_timed_per_tenant_and_intent():
+    orchestrator = AgentOrchestrator(
+        rag_service=FakeRagService(),
+        lead_service=None,
+        calendar_service=None,
+        intent_classifier=RuleBasedIntentClassifier().classify,
+    )
+    labels = {"node": "rag_chain", "org_id": "metrics_org", "intent": "RAG_INFO", "outcome": "ok"}
+    before = GRAPH_NODE_SECONDS.count(**labels)
+
+    orchestrator.run(ConversationState(user_query="hours?", context={"org_id": "metrics_org", "branch_id": "b"}))
+
+    assert GRAPH_NODE_SECONDS.count(**labels) == before + 1
+    response = TestClient(app).get("/metrics")
+    assert response.status_code == 200
+    assert 'agent_graph_node_seconds_count{node="rag_chain",org_id="metrics_org"' in response.text
+    assert 'agent_chat_turns_total{org_id="metrics_org",intent="RAG_INFO"}' in response.text
+
+
+def test_adapter_calls_are_timed_per_tenant():
+    class Index:
+        def query(self, **kwargs):
+            return {"matches": []}
+
+    labels = {"adapter": "pinecone", "operation": "query", "org_id": "adapter_org", "outcome": "ok"}
+    before = ADAPTER_CALL_SECONDS.count(**labels)
+
+    RagService(pinecone_index=Index(), embedder=DeterministicEmbedding()).retrieve(
+        {"org_id": "adapter_org", "branch_id": "b"}, "hours?", []
+    )
+
+    assert ADAPTER_CALL_SECONDS.count(**labels) == before + 1
+
+
+def test_ingestion_upserts_are_timed_per_tenant():
+    class Index:
+        def upsert(self, *, vectors, namespace=None):
+            return {"upserted_count": len(vectors)}
+
+    labels = {"adapter": "pinecone", "operation": "upsert", "org_id": "ingest_org", "outcome": "ok"}
+    before = ADAPTER_CALL_SECONDS.count(**labels)
+
+    IngestionPipeline(pinecone_index=Index(), embedder=DeterministicEmbedding()).run(
+        context={"org_id": "ingest_org", "branch_id": "b"}, documents=[{"text": "Open nine to five."}]
+    )
+
+    assert ADAPTER_CALL_SECONDS.count(**labels) == before + 1
@@ -0,0 +1,26 @@
+import asyncio
+
+from src.adapters.mongo_client import MongoClientFactory
+
+
+def test_factory_shares_one_pooled_client_and_caches_collections():
+    factory = MongoClientFactory(
+        "mongodb://localhost:27017",
+        "sales_agent",
+        max_pool_size=7,
+        server_selection_timeout_ms=100,
+    )
+    try:
+        leads = factory.get_collection("leads")
+        sessions = factory.get_collection("sessions")
+
+        assert factory.get_collection("leads") is leads
+        assert leads.database.client is sessions.database.client
+        assert leads.database.client.options.pool_options.max_pool_size == 7
+        assert factory.get_async_collection("leads") is factory.get_async_collection("leads")
+    finally:
+        asyncio.run(factory.aclose())
+
+    assert factory._client is None
+    assert factory.get_collection("leads") is not leads
+    asyncio.run(factory.aclose())
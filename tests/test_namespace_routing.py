@@ -0,0 +1,51 @@
+from src.adapters.local_index import LocalVectorIndex
+from src.ingestion.migration import migrate_legacy_vectors
+from src.ingestion.pipeline import IngestionPipeline
+from src.services.embeddings_fallback import DeterministicEmbedding
+from src.services.namespaces import tenant_namespace
+from src.services.rag import NO_RESULTS_ANSWER, RagService
+from src.services.retrieval_cache import NamespaceVersions
+
+
+def _context(org_id: str, branch_id: str = "main") -> dict:
+    return {"org_id": org_id, "branch_id": branch_id, "user_session_id": "s1"}
+
+
+def test_retrieval_reads_the_namespace_ingestion_writes(tmp_path):
+    index = LocalVectorIndex(tmp_path)
+    embedder = DeterministicEmbedding()
+    pipeline = IngestionPipeline(pinecone_index=index, embedder=embedder)
+    rag = RagService(pinecone_index=index, embedder=embedder)
+
+    pipeline.run(context=_context("acme"), documents=[{"text": "Acme opens at 9am."}])
+    pipeline.run(context=_context("globex"), documents=[{"text": "Globex opens at 10am."}])
+
+    answer = rag.retrieve(_context("acme"), "Acme opens at 9am.", []).answer
+    assert "Acme opens at 9am." in answer and "Globex" not in answer
+    assert rag.retrieve(_context("initech"), "opening hours", []).answer == NO_RESULTS_ANSWER
+    assert set(index.describe_index_stats()["namespaces"]) == {"acme::main", "globex::main"}
+
+
+def test_legacy_vectors_are_migrated_into_tenant_namespaces(tmp_path):
+    index = LocalVectorIndex(tmp_path)
+    embedder = DeterministicEmbedding()
+    index.upsert(
+        [
+            {"id": "a1", "values": embedder.embed("Acme parking"), "metadata": {"org_id": "acme", "branch_id": "main", "text": "Acme parking"}},
+            {"id": "g1", "values": embedder.embed("Globex parking"), "metadata": {"org_id": "globex", "branch_id": "main", "text": "Globex parking"}},
+            {"id": "x1", "values": embedder.embed("orphan"), "metadata": {"text": "orphan"}},
+        ]
+    )
+    fallback = RagService(pinecone_index=index, embedder=embedder, legacy_fallback=True)
+    assert fallback.retrieve(_context("acme"), "Acme parking", []).answer == "Acme parking"
+
+    versions = NamespaceVersions()
+    report = migrate_legacy_vectors(index, batch_size=2, delete_source=True, versions=versions)
+
+    assert report.migrated == {"acme::main": 1, "globex::main": 1}
+    assert (report.scanned, report.skipped, report.deleted) == (3, 1, 2)
+    assert versions.current(_context("acme")) == 1
+    assert index.describe_index_stats()["namespaces"][""] == {"vector_count": 1}
+    rag = RagService(pinecone_index=index, embedder=embedder)
+    assert rag.retrieve(_context("globex"), "Globex parking", []).answer == "Globex parking"
+    assert tenant_namespace(_context("globex")) == "globex::main"
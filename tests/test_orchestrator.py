@@ -0,0 +1,186 @@
+import asyncio
+from typing import Optional
+
+from src.orchestrator.graph import AgentOrchestrator
+from src.orchestrator.intents import Intent
+from src.orchestrator.state import ConversationState
+from src.services.calendar import BookingResult
+from src.services.intent_rules import RuleBasedIntentClassifier
+from src.services.rag import RetrievalResult
+from src.utils.metrics import SPECULATIVE_RETRIEVALS, SPECULATIVE_WASTED_SECONDS
+
+
+class FakeRagService:
+    def __init__(self, answer: str) -> None:
+        self.answer = answer
+        self.calls = 0
+
+    def retrieve(self, context, query, history):
+        self.calls += 1
+        return RetrievalResult(answer=self.answer, snippets=[{"text": self.answer}])
+
+    async def aretrieve(self, context, query, history):
+        await asyncio.sleep(0)
+        return self.retrieve(context, query, history)
+
+
+class FakeLeadService:
+    def capture_lead_step(self, context, user_query, existing_lead):
+        return dict(existing_lead)
+
+    def is_complete(self, lead_data):
+        return False
+
+    def persist_lead(self, context, lead_data):  # pragma: no cover - never complete
+        raise AssertionError("lead should not be persisted")
+
+
+class FakeCalendarService:
+    def handle_booking(self, context, user_query, lead_data, appointment_id, intent):
+        return BookingResult(appointment_id="evt-1", message="Appointment booked")
+
+    async def ahandle_booking(self, context, user_query, lead_data, appointment_id, intent):
+        await asyncio.sleep(0)
+        return self.handle_booking(context, user_query, lead_data, appointment_id, intent)
+
+
+def _orchestrator(rag_service=None) -> AgentOrchestrator:
+    return AgentOrchestrator(
+        rag_service=rag_service or FakeRagService("default answer"),
+        lead_service=FakeLeadService(),
+        calendar_service=FakeCalendarService(),
+        intent_classifier=RuleBasedIntentClassifier().classify,
+    )
+
+
+def _state(query: str, org_id: str = "org_1", branch_id: str = "branch_1") -> ConversationState:
+    return ConversationState(
+        user_query=query,
+        context={"org_id": org_id, "branch_id": branch_id, "user_session_id": "session_1"},
+    )
+
+
+def test_run_reuses_compiled_graph_and_returns_state():
+    orchestrator = _orchestrator()
+    graph = orchestrator._graph
+
+    first = orchestrator.run(_state("what are your hours"))
+    second = orchestrator.run(_state("please book an appointment"))
+
+    assert orchestrator._graph is graph
+    assert isinstance(first, ConversationState)
+    assert first.intent == Intent.RAG_INFO
+    assert first.history[-1] == {"role": "assistant", "content": "default answer"}
+    assert second.intent == Intent.BOOKING
+    assert second.appointment_id == "evt-1"
+
+
+def test_configure_tenant_overrides_services_without_rebuilding_graph():
+    default_rag = FakeRagService("default answer")
+    tenant_rag = FakeRagService("tenant answer")
+    orchestrator = _orchestrator(default_rag)
+    graph = orchestrator._graph
+
+    orchestrator.configure_tenant("org_2", rag_service=tenant_rag)
+
+    tenant_state = orchestrator.run(_state("hours?", org_id="org_2", branch_id="any"))
+    default_state = orchestrator.run(_state("hours?"))
+
+    assert orchestrator._graph is graph
+    assert tenant_state.history[-1]["content"] == "tenant answer"
+    assert default_state.history[-1]["content"] == "default answer"
+
+    orchestrator.reset_tenant("org_2")
+    orchestrator.run(_state("hours?", org_id="org_2"))
+    assert default_rag.calls == 2
+    assert tenant_rag.calls == 1
+
+
+def test_arun_runs_async_nodes_concurrently():
+    rag_service = FakeRagService("async answer")
+    orchestrator = _orchestrator(rag_service)
+
+    async def _run_many():
+        queries = ["hours?", "book a visit", "where are you located"] * 10
+        return await asyncio.gather(*(orchestrator.arun(_state(query)) for query in queries))
+
+    results = asyncio.run(_run_many())
+
+    assert len(results) == 30
+    assert rag_service.calls == 20
+    booked = [state for state in results if state.intent == Intent.BOOKING]
+    assert len(booked) == 10
+    assert all(state.appointment_id == "evt-1" for state in booked)
+    assert all(isinstance(state, ConversationState) for state in results)
+
+
+class SlowRagService(FakeRagService):
+    def __init__(self, answer: str, delay: float, events: Optional[list] = None) -> None:
+        super().__init__(answer)
+        self.delay = delay
+        self.cancelled = 0
+        self.events = events if events is not None else []
+
+    async def aretrieve(self, context, query, history):
+        self.events.append("retrieval_started")
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        self.events.append("retrieval_finished")
+        return self.retrieve(context, query, history)
+
+
+def _speculative_orchestrator(rag_service, classifier_delay: float, events: Optional[list] = None) -> AgentOrchestrator:
+    rules = RuleBasedIntentClassifier()
+    events = events if events is not None else []
+
+    async def classify(state):
+        events.append("classification_started")
+        await asyncio.sleep(classifier_delay)
+        events.append("classification_finished")
+        return rules.classify(state)
+
+    return AgentOrchestrator(
+        rag_service=rag_service,
+        lead_service=FakeLeadService(),
+        calendar_service=FakeCalendarService(),
+        intent_classifier=rules.classify,
+        async_intent_classifier=classify,
+        speculative_retrieval=True,
+    )
+
+
+def test_speculative_retrieval_overlaps_classification():
+    events: list = []
+    rag_service = SlowRagService("speculative answer", delay=0.05, events=events)
+    orchestrator = _speculative_orchestrator(rag_service, classifier_delay=0.05, events=events)
+    used = SPECULATIVE_RETRIEVALS.value(org_id="org_spec", outcome="used")
+
+    result = asyncio.run(orchestrator.arun(_state("what are your hours", org_id="org_spec")))
+
+    assert result.history[-1]["content"] == "speculative answer"
+    assert rag_service.calls == 1
+    assert events.index("retrieval_started") < events.index("classification_finished")
+    assert SPECULATIVE_RETRIEVALS.value(org_id="org_spec", outcome="used") == used + 1
+
+
+def test_speculative_retrieval_is_cancelled_or_discarded_for_other_routes():
+    slow = SlowRagService("unused", delay=1.0)
+    fast = SlowRagService("unused", delay=0.0)
+    cancelled = SPECULATIVE_RETRIEVALS.value(org_id="org_spec", outcome="cancelled")
+    discarded = SPECULATIVE_RETRIEVALS.value(org_id="org_spec", outcome="discarded")
+
+    async def _run(rag_service, classifier_delay):
+        orchestrator = _speculative_orchestrator(rag_service, classifier_delay)
+        return [node async for node, _ in orchestrator.astream(_state("book a visit", org_id="org_spec"))]
+
+    assert asyncio.run(_run(slow, classifier_delay=0.0)) == ["intent_classifier", "booking"]
+    assert asyncio.run(_run(fast, classifier_delay=0.01)) == ["intent_classifier", "booking"]
+
+    assert slow.cancelled == 1 and slow.calls == 0
+    assert fast.calls == 1
+    assert SPECULATIVE_RETRIEVALS.value(org_id="org_spec", outcome="cancelled") == cancelled + 1
+    assert SPECULATIVE_RETRIEVALS.value(org_id="org_spec", outcome="discarded") == discarded + 1
+    assert SPECULATIVE_WASTED_SECONDS.count(org_id="org_spec", outcome="cancelled") >= 1
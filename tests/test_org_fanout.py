@@ -0,0 +1,93 @@
+import asyncio
+
+from benchmarks.fakes import FakeAsyncPineconeIndex, FakePineconeIndex, Latency
+from src.services.context_packing import ContextPacker
+from src.services.rag import RagService
+
+
+class Embedder:
+    def embed(self, text):
+        return [1.0, 0.0]
+
+
+class SlowBranchIndex(FakeAsyncPineconeIndex):
+    def __init__(self, index, slow_namespace):
+        super().__init__(index)
+        self.slow_namespace = slow_namespace
+        self.in_flight = 0
+        self.peak = 0
+
+    async def query(self, *args, **kwargs):
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        try:
+            await asyncio.sleep(1.0 if kwargs.get("namespace") == self.slow_namespace else 0.02)
+            return await super().query(*args, **kwargs)
+        finally:
+            self.in_flight -= 1
+
+
+def _index():
+    index = FakePineconeIndex(Latency())
+    for branch, score_vector in {"north": [1.0, 0.0], "south": [0.6, 0.8], "east": [0.9, 0.1], "west": [1.0, 0.0]}.items():
+        index.upsert(
+            [{"id": f"{branch}-1", "values": score_vector, "metadata": {"text": f"{branch} stocks the ZX-900"}}],
+            namespace=f"acme::{branch}",
+        )
+    index.upsert([{"id": "other", "values": [1.0, 0.0], "metadata": {"text": "globex"}}], namespace="globex::north")
+    return index
+
+
+def test_fanout_merges_branches_and_reports_slow_shards():
+    index = _index()
+    async_index = SlowBranchIndex(index, slow_namespace="acme::west")
+    rag = RagService(
+        pinecone_index=index,
+        embedder=Embedder(),
+        async_index=async_index,
+        top_k=2,
+        fanout_concurrency=2,
+        shard_timeout_s=0.3,
+    )
+
+    result = asyncio.run(rag.aretrieve_org("acme", "which branch has the ZX-900"))
+
+    assert [snippet["branch_id"] for snippet in result.snippets] == ["north", "east"]
+    assert {shard.branch_id: shard.status for shard in result.shards} == {
+        "north": "ok",
+        "south": "ok",
+        "east": "ok",
+        "west": "timeout",
+    }
+    assert result.partial
+    assert async_index.peak == 2
+
+
+def test_fanout_can_target_specific_branches():
+    index = _index()
+    rag = RagService(pinecone_index=index, embedder=Embedder(), async_index=FakeAsyncPineconeIndex(index))
+
+    result = rag.retrieve_org("acme", "ZX-900", branch_ids=["south"])
+
+    assert [snippet["id"] for snippet in result.snippets] == ["south-1"]
+    assert not result.partial
+
+
+def test_fanout_credits_each_branch_when_branches_share_a_document():
+    index = FakePineconeIndex(Latency())
+    for branch, values in {"north": [1.0, 0.0], "south": [0.9, 0.1]}.items():
+        metadata = {"text": "The ZX-900 is in stock at this branch", "source_path": "catalog.md"}
+        index.upsert([{"id": "catalog-0", "values": values, "metadata": metadata}], namespace=f"acme::{branch}")
+    rag = RagService(
+        pinecone_index=index,
+        embedder=Embedder(),
+        async_index=FakeAsyncPineconeIndex(index),
+        packer=ContextPacker(mmr_lambda=1.0),
+    )
+
+    result = rag.retrieve_org("acme", "ZX-900", branch_ids=["north", "south"])
+
+    assert [(snippet["id"], snippet["branch_id"]) for snippet in result.snippets] == [
+        ("catalog-0", "north"),
+        ("catalog-0", "south"),
+    ]
@@ -0,0 +1,43 @@
+from src.adapters import pinecone_client
+from src.adapters.pinecone_client import PineconeClientFactory
+
+
+class FakePineconeClient:
+    instances = []
+
+    def __init__(self, api_key, connection_pool_maxsize=None, timeout=None):
+        self.api_key = api_key
+        self.connection_pool_maxsize = connection_pool_maxsize
+        self.opened = []
+        FakePineconeClient.instances.append(self)
+
+    def Index(self, name, **kwargs):  # noqa: N802 - mirrors the SDK
+        self.opened.append((name, kwargs))
+        return object()
+
+
+def test_index_handles_are_cached_per_name_on_one_client(monkeypatch):
+    FakePineconeClient.instances = []
+    monkeypatch.setattr(pinecone_client, "_pinecone_sdk", lambda: (object(), FakePineconeClient))
+    factory = PineconeClientFactory(
+        api_key="key", environment="", index_name="kb", index_host="kb-123.svc.pinecone.io", pool_maxsize=32
+    )
+
+    first = factory.get_index()
+    second = factory.get_index()
+    other = factory.get_index("archive")
+
+    assert first is second
+    assert other is not first
+    assert factory.get_async_index() is factory.get_async_index()
+    assert len(FakePineconeClient.instances) == 1
+    client = FakePineconeClient.instances[0]
+    assert client.connection_pool_maxsize == 32
+    assert client.opened == [("kb", {"host": "kb-123.svc.pinecone.io"}), ("archive", {})]
+    assert factory.pool_stats() == {
+        "transport": "http",
+        "pool_maxsize": 32,
+        "cached_indexes": 2,
+        "handle_hits": 2,
+        "handle_misses": 2,
+    }
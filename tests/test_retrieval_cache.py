@@ -0,0 +1,62 @@
+import asyncio
+
+from src.ingestion.pipeline import IngestionPipeline
+from src.services.embeddings_fallback import DeterministicEmbedding
+from src.services.rag import RagService
+from src.services.retrieval_cache import RetrievalCache
+
+
+class CountingIndex:
+    def __init__(self) -> None:
+        self.queries = 0
+        self.texts = ["We open at 9am."]
+
+    def query(self, *, vector, top_k, include_metadata, namespace):
+        self.queries += 1
+        return {
+            "matches": [
+                {"id": f"c{i}", "score": 0.9, "metadata": {"text": text, "source_path": "faq.txt"}}
+                for i, text in enumerate(self.texts)
+            ]
+        }
+
+    def upsert(self, vectors, namespace=None):
+        self.texts.extend(vector["metadata"]["text"] for vector in vectors)
+        return {"upserted_count": len(vectors)}
+
+
+def _context(branch_id: str = "branch_1") -> dict:
+    return {"org_id": "org_1", "branch_id": branch_id, "user_session_id": "s1"}
+
+
+def test_repeated_queries_are_served_per_tenant_from_the_cache():
+    index = CountingIndex()
+    cache = RetrievalCache()
+    rag = RagService(pinecone_index=index, embedder=DeterministicEmbedding(), cache=cache)
+
+    first = rag.retrieve(_context(), "What are your hours?", [])
+    first.snippets[0]["text"] = "mutated by caller"
+    again = asyncio.run(rag.aretrieve(_context(), "what are your  hours?", []))
+    rag.retrieve(_context("branch_2"), "What are your hours?", [])
+
+    assert index.queries == 2
+    assert again.snippets[0]["text"] == "We open at 9am."
+    assert cache.stats().hits == 1
+
+
+def test_ingestion_bumps_the_namespace_version_and_skips_stale_hits():
+    index = CountingIndex()
+    cache = RetrievalCache()
+    rag = RagService(pinecone_index=index, embedder=DeterministicEmbedding(), cache=cache)
+    pipeline = IngestionPipeline(pinecone_index=index, embedder=DeterministicEmbedding(), versions=cache.versions)
+
+    assert rag.retrieve(_context(), "hours", []).answer == "We open at 9am."
+    pipeline.run(context=_context("branch_2"), documents=[{"text": "Branch two opens at 10am."}])
+    rag.retrieve(_context(), "hours", [])
+    assert index.queries == 1
+
+    pipeline.run(context=_context(), documents=[{"text": "We close at 5pm."}])
+    refreshed = rag.retrieve(_context(), "hours", [])
+
+    assert index.queries == 2
+    assert "We close at 5pm." in refreshed.answer
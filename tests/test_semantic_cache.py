@@ -0,0 +1,84 @@
+import asyncio
+
+from src.services.rag import RagService, RetrievalResult
+from src.services.retrieval_cache import NamespaceVersions
+from src.services.semantic_cache import SemanticCache
+
+ACME = {"org_id": "acme", "branch_id": "main"}
+GLOBEX = {"org_id": "globex", "branch_id": "main"}
+
+
+def test_paraphrases_above_the_threshold_share_an_answer_per_tenant():
+    cache = SemanticCache(threshold=0.9)
+    cache.put(ACME, [1.0, 0.0, 0.0], RetrievalResult(answer="We open at 9am."))
+
+    assert cache.get(ACME, [0.95, 0.1, 0.0]).answer == "We open at 9am."
+    assert cache.get(ACME, [0.5, 0.8, 0.0]) is None
+    assert cache.get(GLOBEX, [1.0, 0.0, 0.0]) is None
+    assert (cache.stats().hits, cache.stats().misses) == (1, 2)
+
+
+def test_reingestion_invalidates_and_lru_rows_are_replaced():
+    versions = NamespaceVersions()
+    cache = SemanticCache(versions=versions, threshold=0.9, max_entries_per_tenant=2)
+    cache.put(ACME, [1.0, 0.0], RetrievalResult(answer="hours"))
+    cache.put(ACME, [0.0, 1.0], RetrievalResult(answer="parking"))
+    cache.get(ACME, [1.0, 0.0])
+    cache.put(ACME, [-1.0, 0.0], RetrievalResult(answer="pricing"))
+
+    assert cache.get(ACME, [1.0, 0.0]).answer == "hours"
+    assert cache.get(ACME, [0.0, 1.0]) is None
+    assert cache.stats().evictions == 1
+
+    stale_version = versions.current(ACME)
+    versions.bump(ACME)
+    assert cache.get(ACME, [1.0, 0.0]) is None
+    cache.put(ACME, [1.0, 0.0], RetrievalResult(answer="raced ingestion"), version=stale_version)
+    assert cache.stats().entries == 0 and cache.stats().invalidations == 1
+
+
+def test_memory_cap_drops_least_recently_used_tenants():
+    cache = SemanticCache(threshold=0.9, max_bytes=150)
+    cache.put(ACME, [1.0, 0.0], RetrievalResult(answer="acme"))
+    cache.put(GLOBEX, [1.0, 0.0], RetrievalResult(answer="globex"))
+
+    assert cache.stats().tenants == 1
+    assert cache.get(GLOBEX, [1.0, 0.0]).answer == "globex"
+
+
+def test_memory_cap_trims_the_last_tenant_to_its_least_recently_used_rows():
+    cache = SemanticCache(threshold=0.9, max_bytes=400)
+    for position in range(20):
+        vector = [1.0 if axis == position else 0.0 for axis in range(20)]
+        cache.put(ACME, vector, RetrievalResult(answer=f"answer {position:02d}"))
+        stats = cache.stats()
+        assert stats.bytes <= 400
+        assert stats.bytes == sum(entries.nbytes for entries in cache._tenants.values())
+
+    assert 0 < stats.entries < 20
+    assert stats.evictions == 20 - stats.entries
+    assert cache.get(ACME, [1.0 if axis == 19 else 0.0 for axis in range(20)]).answer == "answer 19"
+    assert cache.get(ACME, [1.0] + [0.0] * 19) is None
+
+
+def test_rag_service_skips_the_index_for_similar_questions():
+    class Index:
+        queries = 0
+
+        def query(self, **kwargs):
+            Index.queries += 1
+            return {"matches": [{"id": "c1", "score": 0.9, "metadata": {"text": "We open at 9am."}}]}
+
+    class Embedder:
+        vectors = {"when are you open": [1.0, 0.05], "opening hours?": [1.0, 0.0]}
+
+        def embed(self, text):
+            return self.vectors[text]
+
+    rag = RagService(pinecone_index=Index(), embedder=Embedder(), semantic_cache=SemanticCache(threshold=0.95))
+
+    rag.retrieve(ACME, "when are you open", [])
+    result = asyncio.run(rag.aretrieve(ACME, "opening hours?", []))
+
+    assert result.answer == "We open at 9am."
+    assert Index.queries == 1
@@ -0,0 +1,108 @@
+from src.orchestrator.graph import AgentOrchestrator
+from src.orchestrator.intents import Intent
+from src.orchestrator.session import SessionStore
+from src.orchestrator.state import ConversationState
+from src.services.calendar import BookingResult
+from src.services.intent_rules import RuleBasedIntentClassifier
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _context(session_id: str = "session_1") -> dict:
+    return {"org_id": "org_1", "branch_id": "branch_1", "user_session_id": session_id}
+
+
+def _state(session_id: str = "session_1", history_size: int = 2) -> ConversationState:
+    return ConversationState(
+        intent=Intent.PURCHASE_INTEREST,
+        context=_context(session_id),
+        lead_data={"email": "lead@example.com"},
+        appointment_id="evt-1",
+        history=[{"role": "user", "content": f"message {i} " * 20} for i in range(history_size)],
+    )
+
+
+def test_state_round_trips_through_compact_bytes():
+    state = _state(history_size=30)
+
+    payload = state.to_bytes()
+    restored = ConversationState.from_bytes(payload, context=state.context)
+
+    assert payload[:1] == b"z"
+    assert restored.intent == state.intent
+    assert restored.lead_data == state.lead_data
+    assert restored.appointment_id == state.appointment_id
+    assert restored.history == state.history
+    assert restored.context == state.context
+
+
+def test_store_expires_entries_after_ttl():
+    clock = FakeClock()
+    store = SessionStore(ttl_seconds=10, clock=clock)
+    store.save(_state())
+
+    clock.now = 5
+    assert store.load(_context()).appointment_id == "evt-1"
+    clock.now = 16
+    assert store.load(_context()) is None
+    assert store.stats().expirations == 1
+
+
+def test_store_evicts_least_recently_used_within_byte_budget():
+    entry_size = len(_state().to_bytes())
+    store = SessionStore(max_bytes=entry_size * 2)
+
+    store.save(_state("a"))
+    store.save(_state("b"))
+    store.load(_context("a"))
+    store.save(_state("c"))
+
+    assert store.load(_context("b")) is None
+    assert store.load(_context("a")) is not None
+    assert store.stats().bytes <= entry_size * 2
+    assert store.stats().evictions == 1
+
+
+class FakeLeadService:
+    def capture_lead_step(self, context, user_query, existing_lead):
+        lead = dict(existing_lead)
+        if "@" in user_query:
+            lead["email"] = user_query
+        return lead
+
+    def is_complete(self, lead_data):
+        return False
+
+
+class FakeCalendarService:
+    def handle_booking(self, context, user_query, lead_data, appointment_id, intent):
+        if intent == Intent.CANCEL_BOOKING and appointment_id:
+            return BookingResult(appointment_id=appointment_id, message="Appointment cancelled")
+        return BookingResult(appointment_id="evt-9", message="Appointment booked")
+
+
+def test_orchestrator_carries_lead_and_appointment_across_turns():
+    store = SessionStore()
+    orchestrator = AgentOrchestrator(
+        rag_service=None,
+        lead_service=FakeLeadService(),
+        calendar_service=FakeCalendarService(),
+        intent_classifier=RuleBasedIntentClassifier().classify,
+        session_store=store,
+    )
+
+    orchestrator.run(ConversationState(user_query="I want to buy, me@example.com", context=_context()))
+    second = orchestrator.run(ConversationState(user_query="please cancel", context=_context()))
+
+    assert second.intent == Intent.CANCEL_BOOKING
+    assert second.lead_data["email"] == "I want to buy, me@example.com"
+    assert second.history[-1]["content"] == "Appointment cancelled"
+    saved = store.load(_context())
+    assert [message["role"] for message in saved.history] == ["user", "system", "user", "system"]
+    assert saved.appointment_id == "evt-9"
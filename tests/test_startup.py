@@ -0,0 +1,21 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+from benchmarks.startup import HEAVY_MODULES
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+
+
+def test_importing_app_does_not_load_sdks():
+    code = (
+        "import json, sys\n"
+        "import src.app.main\n"
+        f"print(json.dumps([name for name in {HEAVY_MODULES!r} if name in sys.modules]))\n"
+    )
+    completed = subprocess.run(
+        [sys.executable, "-c", code], cwd=REPO_ROOT, capture_output=True, text=True, check=True
+    )
+
+    assert json.loads(completed.stdout.strip().splitlines()[-1]) == []
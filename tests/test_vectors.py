@@ -0,0 +1,28 @@
+import sys
+
+import numpy as np
+
+from src.utils.vectors import CompactVector, as_float_list, block_dot
+
+
+def test_compact_vectors_round_trip_and_shrink_memory():
+    values = [float(value) for value in np.random.default_rng(0).normal(size=1536)]
+    as_list = sys.getsizeof(values) + sum(sys.getsizeof(value) for value in values)
+
+    for dtype, ratio, tolerance in (("float32", 7, 1e-6), ("float16", 14, 5e-3), ("int8", 25, 3e-2)):
+        vector = CompactVector.encode(values, dtype)
+        restored = vector.tolist()
+        assert vector.dtype == dtype and len(vector) == 1536
+        assert as_list / (sys.getsizeof(vector) + sys.getsizeof(vector.data)) > ratio
+        assert max(abs(a - b) for a, b in zip(restored, values)) < tolerance * max(map(abs, values))
+        assert CompactVector.from_bytes(vector.tobytes(), dtype, vector.scale).tolist() == restored
+
+    assert as_float_list(CompactVector.encode([0.5, 1.0])) == [0.5, 1.0]
+    assert np.allclose(np.asarray(CompactVector.encode([0.5, 1.0], "int8")), [0.5, 1.0], atol=0.01)
+
+
+def test_block_dot_widens_float16_rows():
+    matrix = np.random.default_rng(1).normal(size=(100, 8)).astype(np.float16)
+    query = np.ones(8, dtype=np.float32)
+
+    assert np.allclose(block_dot(matrix, query, block_rows=7), matrix.astype(np.float32) @ query, atol=1e-3)